@@ -1,7 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from .models import Region, PerfilUsuario
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .models import MedicionEjecucion, MedicionEtapa, Region, PerfilUsuario, Trabajo
+from .services.medicion import resumen_duraciones
 
 
 class PerfilUsuarioInline(admin.StackedInline):
@@ -17,3 +21,65 @@ class UserAdmin(BaseUserAdmin):
 admin.site.unregister(User)
 admin.site.register(User, UserAdmin)
 admin.site.register(Region)
+
+
+@admin.register(Trabajo)
+class TrabajoAdmin(admin.ModelAdmin):
+    list_display = ("id", "tipo", "region", "anio", "mes", "estado", "usuario", "creado")
+    list_filter = ("tipo", "estado", "region")
+
+
+class MedicionEtapaInline(admin.TabularInline):
+    model = MedicionEtapa
+    extra = 0
+    can_delete = False
+    readonly_fields = (
+        "etapa",
+        "veces",
+        "segundos",
+        "filas_entrada",
+        "filas_salida",
+        "memoria_pico_mb",
+        "rss_max_mb",
+    )
+    fields = readonly_fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(MedicionEjecucion)
+class MedicionEjecucionAdmin(admin.ModelAdmin):
+    list_display = ("id", "proceso", "region", "anio", "mes", "inicio", "segundos", "rss_max_mb")
+    list_filter = ("proceso", "region")
+    date_hierarchy = "inicio"
+    inlines = (MedicionEtapaInline,)
+    change_list_template = "admin/analyst/medicionejecucion/change_list.html"
+
+    def get_urls(self):
+        urls = [
+            path(
+                "duraciones/",
+                self.admin_site.admin_view(self.duraciones_view),
+                name="analyst_medicionejecucion_duraciones",
+            )
+        ]
+        return urls + super().get_urls()
+
+    def duraciones_view(self, request):
+        try:
+            dias = max(1, int(request.GET.get("dias", 30)))
+        except ValueError:
+            dias = 30
+        proceso = request.GET.get("proceso") or None
+        contexto = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Duraciones por etapa (p50 / p95)",
+            "dias": dias,
+            "proceso": proceso,
+            **resumen_duraciones(dias, proceso),
+        }
+        return TemplateResponse(
+            request, "admin/analyst/medicionejecucion/duraciones.html", contexto
+        )
@@ -1,4 +1,4 @@
-import pandas as pd
+from ..fechas import parsear_fechas
 
 
 def agregar_antiguedad_dias(
@@ -6,20 +6,19 @@ def agregar_antiguedad_dias(
 ):
     """
     Calcula la antigüedad en días desde la fecha de contrato hasta la fecha de referencia.
+    Las filas que ya tienen errores se omiten.
     """
     df = df.copy()
-    for idx, row in df.iterrows():
-        if df.at[idx, "TIENE_ERRORES"]:
-            continue
-        try:
-            fecha_contrato = pd.to_datetime(row[col_fecha], errors="coerce")
-            if pd.isna(fecha_contrato):
-                df.at[idx, "TIENE_ERRORES"] = True
-                df.at[idx, "LOG_ERRORES"] += f"{col_fecha} inválida;"
-                continue
-            dias = (fecha_referencia - fecha_contrato).days
-            df.at[idx, "ANTIGUEDAD_DIAS"] = dias
-        except Exception:
-            df.at[idx, "TIENE_ERRORES"] = True
-            df.at[idx, "LOG_ERRORES"] += "Error calculando antigüedad;"
+    pendientes = ~df["TIENE_ERRORES"].astype(bool)
+
+    fechas = parsear_fechas(df[col_fecha])
+    invalidas = pendientes & fechas.isna()
+    validas = pendientes & ~invalidas
+
+    dias = (fecha_referencia - fechas).dt.days.astype(float)
+    df["ANTIGUEDAD_DIAS"] = dias.where(validas)
+    df["TIENE_ERRORES"] = df["TIENE_ERRORES"] | invalidas
+    df["LOG_ERRORES"] = df["LOG_ERRORES"].mask(
+        invalidas, df["LOG_ERRORES"] + f"{col_fecha} inválida;"
+    )
     return df
@@ -1,27 +1,55 @@
+import numpy as np
+import pandas as pd
+
+
+def decodificar_region(codigos: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Obtiene la región desde el código de establecimiento.
+
+    Los códigos de 7 dígitos traen la región en el primer dígito y los de 8 en
+    los dos primeros, así que en ambos casos es el código // 1_000_000. Cada
+    código distinto se decodifica una sola vez y el resultado se reparte a
+    todas sus filas.
+
+    Retorna la serie de regiones (Int64, nula si el código es inválido) y una
+    serie con el mensaje de error de cada fila ("" si es válido).
+    """
+    # En una columna de objetos, valores iguales de distinto tipo (5 y 5.0,
+    # None y NaN) se escriben distinto: se agrupan por su texto
+    claves = codigos.astype(str) if codigos.dtype == object else codigos
+    posiciones, unicos = pd.factorize(claves, use_na_sentinel=False)
+
+    texto = pd.Series(unicos, dtype=object).astype(str).str.strip()
+    es_numerico = texto.str.isdigit()
+    largo_valido = texto.str.len().isin([7, 8])
+    validos = (es_numerico & largo_valido).to_numpy()
+
+    regiones = np.full(len(unicos), pd.NA, dtype=object)
+    regiones[validos] = texto[validos].astype(np.int64).to_numpy() // 1_000_000
+
+    mensajes = np.where(
+        es_numerico,
+        "Error calculando región; Longitud inválida: " + texto,
+        "Error calculando región; Código no numérico: " + texto,
+    ).astype(object)
+    mensajes[validos] = ""
+
+    return (
+        pd.Series(pd.array(regiones[posiciones], dtype="Int64"), index=codigos.index),
+        pd.Series(mensajes[posiciones], index=codigos.index),
+    )
+
+
 def agregar_columna_region(df):
     """
     Agrega la columna REGION a partir del código del establecimiento.
     """
     df = df.copy()
-    df["COD_REGION"] = None
-
-    for idx, row in df.iterrows():
-        try:
-            codigo = str(row["CODIGO_ESTABLECIMIENTO"]).strip()
-            if not codigo.isdigit():
-                raise ValueError(f"Código no numérico: {codigo}")
-
-            if len(codigo) == 7:
-                region = int(codigo[0])
-            elif len(codigo) == 8:
-                region = int(codigo[:2])
-            else:
-                raise ValueError(f"Longitud inválida: {codigo}")
-
-            df.at[idx, "COD_REGION"] = region
-
-        except Exception as e:
-            df.at[idx, "TIENE_ERRORES"] = True
-            df.at[idx, "LOG_ERRORES"] += f"Error calculando región; {e}"
+    regiones, errores = decodificar_region(df["CODIGO_ESTABLECIMIENTO"])
+    df["COD_REGION"] = regiones
+
+    invalidos = regiones.isna()
+    df["TIENE_ERRORES"] = df["TIENE_ERRORES"] | invalidos
+    df["LOG_ERRORES"] = df["LOG_ERRORES"] + errores
 
     return df
@@ -0,0 +1,98 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ..constants.validaciones_config import VALID_TYPES, VALID_VALUES
+from .esquema import aplicar_esquema
+
+
+def esquema_arrow(esquema: pa.Schema, tipo: str = None) -> pa.Schema:
+    """
+    Esquema fijo con que se guarda un archivo, para que todos los bloques de
+    una misma planilla (y todas las planillas) queden con los mismos tipos.
+
+    - columnas enumeradas: diccionario de texto
+    - numerico: float64 (los enteros compactos se recuperan al leer)
+    - fecha: timestamp
+    - resto: se respeta el tipo del primer bloque, con los enteros en int64
+      y el texto o las categorías como texto
+    """
+    tipos = VALID_TYPES.get(tipo, {})
+    enumeradas = VALID_VALUES.get(tipo, {})
+
+    campos = []
+    for campo in esquema:
+        tipo_col = tipos.get(campo.name)
+        if campo.name in enumeradas:
+            tipo_arrow = pa.dictionary(pa.int32(), pa.string())
+        elif tipo_col == "numerico":
+            tipo_arrow = pa.float64()
+        elif tipo_col == "fecha":
+            tipo_arrow = pa.timestamp("ns")
+        elif pa.types.is_integer(campo.type):
+            tipo_arrow = pa.int64()
+        elif (
+            pa.types.is_floating(campo.type)
+            or pa.types.is_boolean(campo.type)
+            or pa.types.is_timestamp(campo.type)
+        ):
+            tipo_arrow = campo.type
+        else:
+            tipo_arrow = pa.string()
+        campos.append(pa.field(campo.name, tipo_arrow))
+    return pa.schema(campos)
+
+
+class EscritorParquet:
+    """
+    Escribe un DataFrame en Parquet por bloques, sin tener el archivo completo
+    en memoria. El esquema se fija con el primer bloque (ver esquema_arrow).
+    """
+
+    def __init__(self, destino, tipo: str = None):
+        self.destino = destino
+        self.tipo = tipo
+        self.esquema = None
+        self._writer = None
+
+    def escribir(self, df: pd.DataFrame):
+        tabla = pa.Table.from_pandas(aplicar_esquema(df, self.tipo), preserve_index=False)
+        if self._writer is None:
+            self.esquema = esquema_arrow(tabla.schema, self.tipo)
+            self._writer = pq.ParquetWriter(self.destino, self.esquema)
+        self._writer.write_table(tabla.select(self.esquema.names).cast(self.esquema))
+
+    def cerrar(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def dataframe_a_parquet(df: pd.DataFrame, tipo: str = None) -> bytes:
+    """
+    Serializa el DataFrame tipado según el esquema a Parquet (columnar, comprimido).
+    """
+    buffer = io.BytesIO()
+    with EscritorParquet(buffer, tipo) as escritor:
+        escritor.escribir(df)
+    return buffer.getvalue()
+
+
+def leer_archivo_guardado(ruta: str, tipo: str = None) -> pd.DataFrame:
+    """
+    Lee un archivo guardado por la aplicación: Parquet o, para archivos
+    anteriores a la migración, CSV. A ambos se les aplica el esquema.
+    """
+    if ruta.endswith(".parquet"):
+        return aplicar_esquema(pd.read_parquet(ruta), tipo)
+    elif ruta.endswith(".csv"):
+        return aplicar_esquema(pd.read_csv(ruta), tipo)
+    else:
+        raise ValueError("Formato de archivo no soportado")
@@ -1,7 +1,12 @@
+from typing import NamedTuple
+
 import pandas as pd
 import numpy as np
 
 from analyst.models import ParametroRemuneracional
+from analyst.df_utils.almacenamiento import leer_archivo_guardado
+from analyst.df_utils.fechas import parsear_fechas
+from analyst.df_utils.lectura import leer_xlsx
 
 
 # Diccionario de meses abreviados en español
@@ -25,29 +30,129 @@ def calcular_antiguedad(df: pd.DataFrame, col_inicio: str, col_fin: str) -> pd.S
     """
     Calcula antigüedad en años entre dos columnas de fechas.
     """
-    return (pd.to_datetime(df[col_fin]) - pd.to_datetime(df[col_inicio])).dt.days / 365
+    return (parsear_fechas(df[col_fin]) - parsear_fechas(df[col_inicio])).dt.days / 365
+
+
+def anio_parametro(anio_consultado: int, mes_consultado: int) -> int:
+    """
+    Año del parámetro remuneracional que usa el cálculo de un mes: desde
+    julio se usa el del año siguiente.
+    """
+    if mes_consultado > 6:
+        return anio_consultado + 1
+    return anio_consultado
+
+
+def leer_parametro_remuneracional(parametro: ParametroRemuneracional) -> pd.DataFrame:
+    """
+    Lee el archivo de un ParametroRemuneracional.
+    """
+    # Ruta completa del archivo
+    archivo_path = parametro.archivo.path
+
+    # Detectar formato y cargar en DataFrame
+    if archivo_path.endswith(".xlsx"):
+        return leer_xlsx(archivo_path)
+    if archivo_path.endswith(".xls"):
+        return pd.read_excel(archivo_path)
+    return leer_archivo_guardado(archivo_path)
 
 
 def obtener_parametro_remuneracional_df(anio: int) -> pd.DataFrame:
     try:
         # Busca el registro por año
         parametro = ParametroRemuneracional.objects.get(anio=anio)
+        return leer_parametro_remuneracional(parametro)
 
-        # Ruta completa del archivo
-        archivo_path = parametro.archivo.path
+    except ParametroRemuneracional.DoesNotExist:
+        raise ValueError(f"No existe parámetro remuneracional para el año {anio}")
 
-        # Detectar formato y cargar en DataFrame
-        if archivo_path.endswith(".xlsx") or archivo_path.endswith(".xls"):
-            df = pd.read_excel(archivo_path)
-        elif archivo_path.endswith(".csv"):
-            df = pd.read_csv(archivo_path)
-        else:
-            raise ValueError("Formato de archivo no soportado")
 
-        return df
+class TablaParametros(NamedTuple):
+    """
+    Parámetro remuneracional compilado a una matriz densa región × cargo.
+    El valor de una persona es valores[fila_region[region], cargos.get_loc(cargo)].
+    """
 
-    except ParametroRemuneracional.DoesNotExist:
-        raise ValueError(f"No existe parámetro remuneracional para el año {anio}")
+    fila_region: np.ndarray  # código de región → fila de `valores` (-1 si no está)
+    cargos: pd.Index  # cargos en mayúsculas, una columna de `valores` cada uno
+    valores: np.ndarray
+
+
+def compilar_parametros(
+    df_valores: pd.DataFrame, col_region: str = "COD_REGION"
+) -> TablaParametros:
+    """
+    Compila el parámetro remuneracional (una fila por región y una columna por
+    cargo) a una TablaParametros. Si una región o un cargo se repite, se usa
+    la primera aparición.
+    """
+    df_valores = df_valores.rename(columns={c: str(c).upper() for c in df_valores.columns})
+    df_cargos = df_valores.drop(columns=col_region)
+    cargos = pd.Index(df_cargos.columns)
+    unicos = ~cargos.duplicated()
+    cargos = cargos[unicos]
+    valores = df_cargos.to_numpy()[:, unicos]
+
+    regiones = pd.to_numeric(df_valores[col_region], errors="coerce").to_numpy(
+        dtype=float, na_value=np.nan
+    )
+    validas = np.flatnonzero(
+        ~np.isnan(regiones) & (regiones >= 0) & (regiones == np.round(regiones))
+    )
+    codigos, primeras = np.unique(regiones[validas].astype(np.int64), return_index=True)
+
+    fila_region = np.full(codigos.max() + 1 if len(codigos) else 0, -1, dtype=np.int64)
+    fila_region[codigos] = np.arange(len(codigos))
+    valores = valores[validas[primeras]]
+
+    fila_region.flags.writeable = False
+    valores.flags.writeable = False
+    return TablaParametros(fila_region, cargos, valores)
+
+
+def asignar_valores_parametro(
+    df_personas: pd.DataFrame,
+    tabla: TablaParametros,
+    col_region: str = "COD_REGION",
+    col_cargo: str = "CARGO",
+    nombre_col_valor: str = "VALOR_PR",
+) -> pd.DataFrame:
+    """
+    Asigna a cada persona el valor de la tabla según su región y cargo, con
+    búsquedas directas por posición. Sin valor para la región o el cargo
+    queda NaN.
+    """
+    # Normalizar a mayúsculas para evitar problemas de matching
+    df_personas[col_cargo] = df_personas[col_cargo].str.upper()
+
+    regiones = pd.to_numeric(df_personas[col_region], errors="coerce").to_numpy(
+        dtype=float, na_value=np.nan
+    )
+    en_tabla = (
+        ~np.isnan(regiones)
+        & (regiones >= 0)
+        & (regiones < len(tabla.fila_region))
+        & (regiones == np.round(regiones))
+    )
+    filas = np.full(len(regiones), -1, dtype=np.int64)
+    filas[en_tabla] = tabla.fila_region[regiones[en_tabla].astype(np.int64)]
+
+    # Cada cargo distinto se busca una sola vez
+    codigos, cargos_unicos = pd.factorize(df_personas[col_cargo])
+    columnas = np.append(tabla.cargos.get_indexer(cargos_unicos), -1)[codigos]
+
+    encontrados = (filas >= 0) & (columnas >= 0)
+    if encontrados.all():
+        valores = tabla.valores[filas, columnas]
+    else:
+        valores = np.full(len(filas), np.nan)
+        valores[encontrados] = tabla.valores[filas[encontrados], columnas[encontrados]]
+
+    # Igual que un merge: índice nuevo y la columna de valor al final
+    df_resultado = df_personas.reset_index(drop=True)
+    df_resultado[nombre_col_valor] = valores
+    return df_resultado
 
 
 def obtener_valores_por_region_cargo(
@@ -80,41 +185,39 @@ def obtener_valores_por_region_cargo(
         df_personas con una columna extra [nombre_col_valor] que contiene
         el valor correspondiente según región y cargo.
     """
-
-    # Normalizar a mayúsculas para evitar problemas de matching
-    df_personas[col_cargo] = df_personas[col_cargo].str.upper()
-    df_valores = df_valores.rename(
-        columns={c: c.upper() for c in df_valores.columns}
-    )  # asegurar columnas en mayúscula también
-
-    # Paso 1: convertir df_valores a formato largo
-    df_valores_melt = df_valores.melt(
-        id_vars=col_region, var_name=col_cargo, value_name=nombre_col_valor
+    return asignar_valores_parametro(
+        df_personas,
+        compilar_parametros(df_valores, col_region),
+        col_region=col_region,
+        col_cargo=col_cargo,
+        nombre_col_valor=nombre_col_valor,
     )
 
-    # Normalizar también la columna de cargos del melt
-    df_valores_melt[col_cargo] = df_valores_melt[col_cargo].str.upper()
 
-    # Paso 2: unir con df_personas
-    df_resultado = df_personas.merge(
-        df_valores_melt, on=[col_region, col_cargo], how="left"
-    )
-
-    return df_resultado
-
-
-def calcular_promedio_semestre_anterior(
-    row, mes_consultado, anio_consultado, col_sueldos, antiguedad_col="ANTIGUEDAD_DIAS"
-):
+def calcular_promedios_semestre_anterior(
+    df: pd.DataFrame,
+    mes_consultado: int,
+    anio_consultado: int,
+    col_sueldos: list,
+    antiguedad_col: str = "ANTIGUEDAD_DIAS",
+) -> pd.DataFrame:
     """
     Calcula el promedio de sueldos del semestre anterior en base a antigüedad.
     Devuelve también el detalle de los meses y sueldos utilizados.
-    """
 
-    # Antigüedad expresada en meses y días
-    antiguedad_total_dias = int(row[antiguedad_col])
-    antiguedad_meses = antiguedad_total_dias // 30
-    dias_restantes = antiguedad_total_dias % 30
+    Los sueldos del semestre se toman como una matriz (personas x 6 meses) y
+    las reglas se aplican con máscaras sobre toda la matriz:
+
+    - Se usan los últimos N meses del semestre, con N = meses de antigüedad
+      acotado entre 1 y 6.
+    - Si falta sueldo en alguno de esos meses, o menos de 4 meses de
+      antigüedad, el promedio queda vacío y DETALLE_MESES indica el error.
+    - Con exactamente 4 meses y días adicionales el promedio es proporcional
+      a antigüedad_dias / 120.
+
+    Retorna un DataFrame con las columnas PROMEDIO_SUELDO y DETALLE_MESES,
+    con el mismo índice que `df`.
+    """
 
     # Determinar semestre anterior
     if mes_consultado >= 7:
@@ -124,59 +227,64 @@ def calcular_promedio_semestre_anterior(
         anio_semestre = anio_consultado - 1
         meses_objetivo = list(range(7, 13))  # julio–diciembre
 
-    # Determinar cuántos meses usar
-    meses_a_considerar = min(6, max(1, int(antiguedad_meses)))
+    cols_semestre = [f"{anio_semestre}_{m}" for m in meses_objetivo]
+    presentes = np.array([col in col_sueldos for col in cols_semestre])
+    etiquetas = np.array([f"{MESES[m]}_{anio_semestre}" for m in meses_objetivo])
 
-    # Seleccionar últimos N meses del semestre anterior
-    meses_finales = meses_objetivo[-meses_a_considerar:]
+    # Matriz de sueldos; los meses sin columna quedan vacíos
+    n_filas = len(df)
+    sueldos = np.full((n_filas, len(cols_semestre)), np.nan)
+    valores = np.full((n_filas, len(cols_semestre)), None, dtype=object)
+    if presentes.any():
+        cols_presentes = [c for c, p in zip(cols_semestre, presentes) if p]
+        sueldos[:, presentes] = df[cols_presentes].to_numpy(dtype=float)
+        valores[:, presentes] = df[cols_presentes].to_numpy(dtype=object)
 
-    # Seleccionar columnas de sueldo correspondientes
-    cols_objetivo = [
-        f"{anio_semestre}_{m}"
-        for m in meses_finales
-        if f"{anio_semestre}_{m}" in col_sueldos
-    ]
+    # Antigüedad expresada en meses y días
+    antiguedad = df[antiguedad_col].to_numpy(dtype=float)
+    sin_antiguedad = np.isnan(antiguedad)
+    antiguedad_total_dias = np.where(sin_antiguedad, 0, antiguedad).astype(np.int64)
+    antiguedad_meses = antiguedad_total_dias // 30
+    dias_restantes = antiguedad_total_dias % 30
 
-    # Extraer sueldos
-    sueldos = row[cols_objetivo]
+    # Seleccionar últimos N meses del semestre anterior
+    meses_a_considerar = np.clip(antiguedad_meses, 1, 6)
+    posiciones = np.arange(len(cols_semestre))
+    seleccion = (posiciones >= len(cols_semestre) - meses_a_considerar[:, None]) & presentes
+    cantidad = seleccion.sum(axis=1)
 
     # Validación: si debería haber sueldo en esos meses y no está → error
-    if sueldos.isna().any() or sueldos.empty:
-        return pd.Series(
-            {
-                "PROMEDIO_SUELDO": np.nan,
-                "DETALLE_MESES": "ERROR: falta sueldo en meses requeridos",
-            }
-        )
-
-    # Crear detalle con formato ENE_2025
-    detalle = [
-        (f"{MESES[int(col.split('_')[1])]}_{col.split('_')[0]}", row[col])
-        for col in cols_objetivo
-    ]
-
-    if antiguedad_meses < 4:
-        return pd.Series(
-            {
-                "PROMEDIO_SUELDO": np.nan,
-                "DETALLE_MESES": "ERROR: menos de 4 meses de antigüedad",
-            }
-        )
-    elif antiguedad_meses == 4 and dias_restantes == 0:
-        # ✅ Caso exacto 4 meses
-        promedio = sueldos.mean()
-    elif antiguedad_meses == 4 and dias_restantes > 0:
-        # ⚡ regla especial: proporcional
-        promedio = sueldos.mean() * (antiguedad_total_dias / (4 * 30))
-    elif antiguedad_meses < 6:
-        # 5 meses (con o sin días)
-        promedio = sueldos.mean()
-    else:
-        # 6 o más meses
-        # promedio de hasta 6 últimos meses
-        promedio = sueldos.mean()
+    falta_sueldo = (cantidad == 0) | (seleccion & np.isnan(sueldos)).any(axis=1)
+    menos_de_4 = ~falta_sueldo & (antiguedad_meses < 4)
+    validos = ~(sin_antiguedad | falta_sueldo | menos_de_4)
+
+    suma = np.where(seleccion, sueldos, 0.0).sum(axis=1)
+    promedio = np.divide(
+        suma, cantidad, out=np.full(n_filas, np.nan), where=validos & (cantidad > 0)
+    )
+
+    # ⚡ regla especial: 4 meses y días adicionales → proporcional
+    proporcional = (antiguedad_meses == 4) & (dias_restantes > 0)
+    promedio = np.where(
+        proporcional, promedio * (antiguedad_total_dias / (4 * 30)), promedio
+    )
 
-    return pd.Series({"PROMEDIO_SUELDO": promedio, "DETALLE_MESES": detalle})
+    detalle = np.full(n_filas, None, dtype=object)
+    detalle[sin_antiguedad] = "ERROR: sin antigüedad calculada"
+    detalle[falta_sueldo & ~sin_antiguedad] = "ERROR: falta sueldo en meses requeridos"
+    detalle[menos_de_4 & ~sin_antiguedad] = "ERROR: menos de 4 meses de antigüedad"
+
+    # Crear detalle con formato ENE_2025, agrupando filas por meses usados
+    for meses in np.unique(meses_a_considerar[validos]):
+        filas = np.flatnonzero(validos & (meses_a_considerar == meses))
+        cols = np.flatnonzero(seleccion[filas[0]])
+        etiquetas_filas = etiquetas[cols].tolist()
+        for fila, sueldos_fila in zip(filas, valores[np.ix_(filas, cols)].tolist()):
+            detalle[fila] = list(zip(etiquetas_filas, sueldos_fila))
+
+    return pd.DataFrame(
+        {"PROMEDIO_SUELDO": promedio, "DETALLE_MESES": detalle}, index=df.index
+    )
 
 
 def calcular_brecha(df: pd.DataFrame) -> pd.DataFrame:
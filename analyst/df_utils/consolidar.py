@@ -31,3 +31,99 @@ def consolidar_sueldos(df: pd.DataFrame) -> pd.DataFrame:
     )
 
     return df_consolidado
+
+
+CLAVES_SUELDO = ["CODIGO_ESTABLECIMIENTO", "RUT"]
+COLUMNA_SUELDO = "SUELDO_BRUTO_O_TOTAL_HABERES"
+
+
+def nombre_columna_mes(anio: int, mes: int) -> str:
+    return f"{anio}_{mes}"
+
+
+def remuneraciones_del_mes(df: pd.DataFrame, anio: int, mes: int, montos: list):
+    """
+    Filas de un archivo para cargar en RemuneracionMensual: las del ANIO y
+    MES indicados, con claves, y una por (CODIGO_ESTABLECIMIENTO, RUT). Como
+    en consolidar_sueldos, de cada clave se toma la primera fila con sueldo
+    (o la primera, si ninguna lo tiene).
+
+    Returns:
+        pd.DataFrame: claves y `montos` (float, vacíos como NaN)
+    """
+    df = df[(df["ANIO"] == anio) & (df["MES"] == mes)]
+    df = df.dropna(subset=CLAVES_SUELDO)
+    if COLUMNA_SUELDO in df.columns:
+        orden = df[COLUMNA_SUELDO].isna().to_numpy().argsort(kind="stable")
+        df = df.iloc[orden]
+    df = df.drop_duplicates(subset=CLAVES_SUELDO).sort_index()
+
+    salida = pd.DataFrame(
+        {
+            "CODIGO_ESTABLECIMIENTO": pd.to_numeric(df["CODIGO_ESTABLECIMIENTO"]).astype(
+                "int64"
+            ),
+            "RUT": df["RUT"].astype(str),
+        }
+    )
+    for col in montos:
+        salida[col] = (
+            pd.to_numeric(df[col], errors="coerce").astype(float)
+            if col in df.columns
+            else float("nan")
+        )
+    return salida.reset_index(drop=True)
+
+
+def matriz_sueldos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Matriz (CODIGO_ESTABLECIMIENTO, RUT) × mes desde filas con ANIO, MES y
+    sueldo, tomando el primer sueldo no vacío de cada clave y mes en el orden
+    de las filas.
+    """
+    matriz = (
+        df.dropna(subset=[COLUMNA_SUELDO])
+        .groupby(CLAVES_SUELDO + ["ANIO", "MES"], sort=False)[COLUMNA_SUELDO]
+        .first()
+        .unstack(["ANIO", "MES"])
+    )
+    matriz.columns = [nombre_columna_mes(anio, mes) for anio, mes in matriz.columns]
+    return matriz.astype(float)
+
+
+def reemplazar_mes_matriz(
+    matriz: pd.DataFrame, columna: str, sueldos: pd.Series = None
+) -> pd.DataFrame:
+    """
+    Reemplaza (o quita, si `sueldos` es None) la columna de un mes en la
+    matriz de sueldos indexada por (CODIGO_ESTABLECIMIENTO, RUT). Las filas
+    que quedan sin ningún sueldo se eliminan.
+    """
+    matriz = matriz.drop(columns=columna, errors="ignore")
+    if sueldos is not None and len(sueldos):
+        matriz = matriz.join(sueldos.rename(columna).astype(float), how="outer")
+    return matriz.dropna(how="all")
+
+
+def seleccionar_meses_matriz(
+    matriz: pd.DataFrame, meses: list, columnas_enteras=()
+) -> pd.DataFrame:
+    """
+    Toma de la matriz de sueldos los meses (anio, mes) pedidos y la deja con
+    la forma que entrega consolidar_sueldos para esos mismos archivos: meses
+    en orden, sin columnas ni filas vacías y ordenada por las claves.
+
+    La matriz guarda todo como float; las `columnas_enteras` (meses cuyos
+    sueldos eran enteros) vuelven a int si no les falta ningún valor, como
+    en el pivot.
+    """
+    columnas = [
+        nombre_columna_mes(anio, mes)
+        for anio, mes in sorted(meses)
+        if nombre_columna_mes(anio, mes) in matriz.columns
+    ]
+    df = matriz[columnas].dropna(how="all").dropna(axis=1, how="all")
+    for col in df.columns:
+        if col in columnas_enteras and df[col].notna().all():
+            df[col] = df[col].astype("int64")
+    return df.sort_index().reset_index()
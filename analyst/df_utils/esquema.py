@@ -0,0 +1,93 @@
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+from ..constants.validaciones_config import VALID_TYPES, VALID_VALUES
+from .fechas import parsear_fechas
+
+
+# Una columna de texto se guarda como categoría si tiene a lo más esta
+# proporción de valores distintos (establecimientos, títulos, funciones...).
+PROPORCION_MAX_CATEGORIA = 0.5
+
+
+def dtypes_categoricos(tipo: str) -> dict:
+    """
+    Columnas con valores enumerados (VALID_VALUES) y su dtype categórico,
+    con las categorías normalizadas como quedan después de validar.
+    """
+    return {
+        col: CategoricalDtype(
+            categories=[v.strip().lower() for v in reglas.get("allowed", [])]
+        )
+        for col, reglas in VALID_VALUES.get(tipo, {}).items()
+    }
+
+
+def dtypes_lectura(tipo: str) -> dict:
+    """
+    Mapa de dtypes para leer un archivo sin validar (read_csv / read_excel).
+
+    Solo las columnas enumeradas se leen como categorías: el resto se deja
+    sin tipar para que la validación pueda informar los valores inválidos.
+    """
+    return {col: "category" for col in VALID_VALUES.get(tipo, {})}
+
+
+def a_numero_compacto(serie: pd.Series) -> pd.Series:
+    """
+    Convierte a número usando el entero más chico que sirva. Las columnas con
+    decimales o vacíos quedan en float64 para no perder precisión en montos.
+    """
+    numeros = pd.to_numeric(serie, errors="coerce")
+    if pd.api.types.is_bool_dtype(numeros):
+        return numeros
+    if pd.api.types.is_float_dtype(numeros) and not (
+        numeros.notna().all() and (numeros % 1 == 0).all()
+    ):
+        return numeros
+    return pd.to_numeric(numeros.astype("int64"), downcast="integer")
+
+
+def a_categoria(serie: pd.Series, dtype: CategoricalDtype) -> pd.Series:
+    """
+    Convierte a categoría normalizando el texto. Si aparecen valores fuera de
+    las categorías esperadas la columna se deja como texto para no perderlos.
+    """
+    if isinstance(serie.dtype, CategoricalDtype) and serie.dtype == dtype:
+        return serie
+    texto = serie.astype(str).str.strip().str.lower().where(serie.notna())
+    if not texto.dropna().isin(dtype.categories).all():
+        return texto
+    return texto.astype(dtype)
+
+
+def aplicar_esquema(df: pd.DataFrame, tipo: str = None) -> pd.DataFrame:
+    """
+    Convierte las columnas a los tipos definidos en VALID_TYPES[tipo].
+
+    - numerico: entero compacto (int8..int64) o float64
+    - fecha: datetime64, detectando un formato explícito por columna
+    - columnas enumeradas en VALID_VALUES: categoría
+    - texto y columnas sin tipo definido: texto, conservando los vacíos; como
+      categoría si tiene pocos valores distintos (PROPORCION_MAX_CATEGORIA)
+    """
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+    tipos = VALID_TYPES.get(tipo, {})
+    categoricos = dtypes_categoricos(tipo)
+
+    for col in df.columns:
+        tipo_col = tipos.get(col, "texto")
+        if col in categoricos:
+            df[col] = a_categoria(df[col], categoricos[col])
+        elif tipo_col == "numerico":
+            df[col] = a_numero_compacto(df[col])
+        elif tipo_col == "fecha":
+            df[col] = parsear_fechas(df[col])
+        elif df[col].dtype == object:
+            texto = df[col].where(df[col].isna(), df[col].astype(str))
+            if texto.nunique() <= PROPORCION_MAX_CATEGORIA * len(texto):
+                texto = texto.astype("category")
+            df[col] = texto
+
+    return df
@@ -0,0 +1,208 @@
+import shutil
+import zlib
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+
+# Filas de datos por hoja: el límite de Excel (1.048.576) menos el encabezado
+MAX_FILAS_HOJA = 1_048_575
+FILAS_POR_BLOQUE = 10_000
+FORMATOS_ARCHIVO = ("csv", "xlsx", "parquet")
+
+
+def _contenedores_a_texto(serie: pd.Series) -> pd.Series:
+    """
+    Pasa a texto las listas, tuplas y diccionarios (p. ej. DETALLE_MESES),
+    tal como quedan escritos en el Excel.
+    """
+    contenedor = serie.map(lambda v: isinstance(v, (list, tuple, dict, set)))
+    if contenedor.any():
+        return serie.where(~contenedor, serie.astype(str))
+    return serie
+
+
+def preparar_para_exportar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Deja las columnas de texto en un tipo que Parquet pueda guardar: los
+    contenedores y las columnas con tipos mezclados se pasan a texto.
+    """
+    df = df.copy()
+    for col in df.columns:
+        serie = df[col]
+        if serie.dtype != object:
+            continue
+        serie = _contenedores_a_texto(serie)
+        try:
+            pa.array(serie, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            serie = serie.where(serie.isna(), serie.astype(str))
+        df[col] = serie
+    return df
+
+
+def resultado_a_parquet(df: pd.DataFrame, destino):
+    """
+    Guarda un resultado (homologación o consolidado) en Parquet, el formato
+    desde el que luego se exporta a XLSX o CSV por bloques.
+    """
+    tabla = pa.Table.from_pandas(preparar_para_exportar(df), preserve_index=False)
+    pq.write_table(tabla, destino)
+
+
+def bloques_dataframe(df: pd.DataFrame, tamano_bloque: int = FILAS_POR_BLOQUE):
+    if df.empty:
+        yield df
+    for inicio in range(0, len(df), tamano_bloque):
+        yield df.iloc[inicio : inicio + tamano_bloque]
+
+
+def bloques_parquet(origen, tamano_bloque: int = FILAS_POR_BLOQUE, filtros=None):
+    """
+    Lee un Parquet por bloques de filas, sin cargarlo completo. Con
+    `filtros` (formato de pyarrow, p. ej. [("REGION", "==", 5)]) se leen
+    solo las filas que cumplen, que sí quedan en memoria.
+    """
+    if filtros is None:
+        archivo = pq.ParquetFile(origen)
+        esquema = archivo.schema_arrow
+        lotes = archivo.iter_batches(batch_size=tamano_bloque)
+    else:
+        tabla = pq.read_table(origen, filters=filtros)
+        esquema = tabla.schema
+        lotes = tabla.to_batches(max_chunksize=tamano_bloque)
+
+    vacio = True
+    for lote in lotes:
+        vacio = False
+        yield lote.to_pandas()
+    if vacio:
+        # Un resultado sin filas igual debe exportar su encabezado
+        yield esquema.empty_table().to_pandas()
+
+
+def valores_columna_parquet(origen, columna: str) -> list:
+    """
+    Valores distintos (ordenados) de una columna, leyendo solo esa columna.
+    """
+    valores = pq.read_table(origen, columns=[columna]).column(columna).unique()
+    return sorted(v for v in valores.to_pylist() if v is not None)
+
+
+def _a_bloques(datos):
+    if isinstance(datos, pd.DataFrame):
+        return bloques_dataframe(datos)
+    return iter(datos)
+
+
+def _nombre_hoja(nombre: str, numero: int) -> str:
+    if numero == 1:
+        return nombre[:31]
+    sufijo = f"_{numero}"
+    return nombre[: 31 - len(sufijo)] + sufijo
+
+
+def escribir_excel(destino, hojas: dict, max_filas_hoja: int = MAX_FILAS_HOJA):
+    """
+    Escribe un XLSX fila a fila con xlsxwriter en modo constant_memory: la
+    memoria no depende del tamaño del resultado.
+
+    Args:
+        destino: ruta o archivo abierto en modo binario
+        hojas (dict): nombre de hoja → DataFrame o iterable de bloques
+            (DataFrames con las mismas columnas)
+        max_filas_hoja (int): al superarlo los datos siguen en una hoja
+            nueva (Consolidado, Consolidado_2, ...), repitiendo el encabezado
+    """
+    libro = xlsxwriter.Workbook(
+        destino,
+        {
+            "constant_memory": True,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+            "nan_inf_to_errors": True,
+        },
+    )
+    negrita = libro.add_format({"bold": True, "border": 1, "align": "center"})
+
+    for nombre, datos in hojas.items():
+        numero = 0
+        hoja = None
+        fila = 0
+
+        for bloque in _a_bloques(datos):
+            if hoja is None:
+                columnas = [str(c) for c in bloque.columns]
+            bloque = bloque.copy()
+            for col in bloque.columns[bloque.dtypes == object]:
+                bloque[col] = _contenedores_a_texto(bloque[col])
+            valores = bloque.astype(object).where(bloque.notna(), None).to_numpy()
+
+            inicio = 0
+            while hoja is None or inicio < len(valores):
+                if hoja is None or fila > max_filas_hoja:
+                    numero += 1
+                    hoja = libro.add_worksheet(_nombre_hoja(nombre, numero))
+                    hoja.write_row(0, 0, columnas, negrita)
+                    fila = 1
+                cabe = min(len(valores) - inicio, max_filas_hoja + 1 - fila)
+                for registro in valores[inicio : inicio + cabe]:
+                    hoja.write_row(fila, 0, registro)
+                    fila += 1
+                inicio += cabe
+
+        if hoja is None:
+            libro.add_worksheet(_nombre_hoja(nombre, 1))
+
+    libro.close()
+
+
+def csv_en_bloques(datos, comprimir: bool = False):
+    """
+    Genera el CSV (o CSV gzip) en trozos de bytes a medida que se producen
+    las filas, para enviarlo con un StreamingHttpResponse.
+    """
+    compresor = zlib.compressobj(wbits=31) if comprimir else None  # 31: gzip
+    encabezado = True
+
+    for bloque in _a_bloques(datos):
+        texto = bloque.to_csv(index=False, header=encabezado).encode("utf-8")
+        encabezado = False
+        if compresor is None:
+            yield texto
+        else:
+            comprimido = compresor.compress(texto)
+            if comprimido:
+                yield comprimido
+
+    if compresor is not None:
+        yield compresor.flush()
+
+
+def exportar_parquet(origen, destino: str, formato: str):
+    """
+    Escribe en `destino` un resultado guardado en Parquet, convertido por
+    bloques al formato pedido ("csv", "xlsx" o "parquet").
+
+    Args:
+        origen: ruta o archivo binario abierto con el Parquet
+        destino (str): ruta del archivo a escribir
+        formato (str): uno de FORMATOS_ARCHIVO
+    """
+    if formato not in FORMATOS_ARCHIVO:
+        raise ValueError(f"Formato no soportado: {formato}")
+
+    if formato == "xlsx":
+        escribir_excel(destino, {"Consolidado": bloques_parquet(origen)})
+        return
+
+    with open(destino, "wb") as salida:
+        if formato == "csv":
+            for trozo in csv_en_bloques(bloques_parquet(origen)):
+                salida.write(trozo)
+        elif isinstance(origen, str):
+            with open(origen, "rb") as entrada:
+                shutil.copyfileobj(entrada, salida)
+        else:
+            origen.seek(0)
+            shutil.copyfileobj(origen, salida)
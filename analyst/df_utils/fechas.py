@@ -0,0 +1,196 @@
+import datetime
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Fechas ya interpretadas, por valor original. Los mismos contratos aparecen
+# en todas las planillas mensuales, así que se reutilizan entre llamadas. Se
+# comparte entre los hilos del ejecutor: se lee y modifica con el candado.
+_CACHE_FECHAS = {}
+_LOCK_FECHAS = threading.Lock()
+MAX_CACHE_FECHAS = 200_000
+
+# Formatos de texto que se detectan por columna. Todos son con día primero o
+# con año primero, así que un texto se interpreta igual en cualquier columna.
+FORMATOS_FECHA = (
+    "%d/%m/%Y",
+    "%Y-%m-%d",
+    "%d-%m-%Y",
+    "%Y-%m-%d %H:%M:%S",
+    "%d/%m/%Y %H:%M:%S",
+    "%Y/%m/%d",
+    "%Y%m%d",
+)
+
+# Valores distintos con que se elige el formato de una columna
+MUESTRA_FORMATO = 1_000
+
+# Números de serie de Excel: días desde el 30/12/1899, hasta el 31/12/9999
+ORIGEN_EXCEL = "1899-12-30"
+MAX_SERIE_EXCEL = 2_958_465
+
+NAT = np.datetime64("NaT", "ns")
+
+
+def detectar_formato(textos: pd.Series):
+    """
+    Formato de FORMATOS_FECHA que interpreta más valores de una muestra de
+    la columna, o None si ninguno interpreta alguno.
+    """
+    muestra = textos.iloc[:MUESTRA_FORMATO]
+    mejor, aciertos = None, 0
+    for formato in FORMATOS_FECHA:
+        validos = pd.to_datetime(muestra, format=formato, errors="coerce").notna().sum()
+        if validos > aciertos:
+            mejor, aciertos = formato, validos
+            if aciertos == len(muestra):
+                break
+    return mejor
+
+
+def _desde_numeros(numeros: np.ndarray) -> np.ndarray:
+    """
+    Fechas desde números: enteros de 8 dígitos como aaaammdd y el resto como
+    número de serie de Excel. Los demás quedan como NaT.
+    """
+    numeros = np.asarray(numeros, dtype=float)
+    fechas = np.full(len(numeros), NAT)
+    with np.errstate(invalid="ignore"):
+        aaaammdd = (numeros >= 19_000_101) & (numeros <= 29_991_231) & (numeros % 1 == 0)
+        serie_excel = ~aaaammdd & (numeros >= 1) & (numeros <= MAX_SERIE_EXCEL)
+    if aaaammdd.any():
+        fechas[aaaammdd] = pd.to_datetime(
+            numeros[aaaammdd].astype(np.int64).astype(str), format="%Y%m%d", errors="coerce"
+        ).to_numpy("datetime64[ns]")
+    if serie_excel.any():
+        fechas[serie_excel] = pd.to_datetime(
+            numeros[serie_excel], unit="D", origin=ORIGEN_EXCEL, errors="coerce"
+        ).to_numpy("datetime64[ns]")
+    return fechas
+
+
+def _desde_textos(textos: pd.Series) -> np.ndarray:
+    """
+    Fechas desde textos distintos y sin espacios. Se prueba primero el
+    formato detectado para la columna y luego, solo con lo que quede sin
+    interpretar, los demás formatos, los números (serie de Excel) y por
+    último la interpretación valor a valor con día primero (dd/mm/aaaa).
+    """
+    fechas = np.full(len(textos), NAT)
+    pendientes = np.ones(len(textos), dtype=bool)
+
+    formato = detectar_formato(textos)
+    formatos = ([formato] if formato else []) + [f for f in FORMATOS_FECHA if f != formato]
+    for formato in formatos:
+        interpretadas = pd.to_datetime(
+            textos[pendientes], format=formato, errors="coerce"
+        ).to_numpy("datetime64[ns]")
+        indices = np.flatnonzero(pendientes)[~np.isnat(interpretadas)]
+        fechas[indices] = interpretadas[~np.isnat(interpretadas)]
+        pendientes[indices] = False
+        if not pendientes.any():
+            return fechas
+
+    numeros = pd.to_numeric(textos[pendientes], errors="coerce").to_numpy(float)
+    fechas[np.flatnonzero(pendientes)] = _desde_numeros(numeros)
+    pendientes &= np.isnat(fechas)
+
+    if pendientes.any():
+        fechas[pendientes] = pd.to_datetime(
+            textos[pendientes], dayfirst=True, format="mixed", errors="coerce"
+        ).to_numpy("datetime64[ns]")
+    return fechas
+
+
+def _interpretar_unicos(unicos: list) -> np.ndarray:
+    """
+    Fechas de una lista de valores distintos de cualquier tipo (texto,
+    número, fecha), como NaT los que no son fecha.
+    """
+    fechas = np.full(len(unicos), NAT)
+    textos, numeros, otros = [], [], []
+    for i, valor in enumerate(unicos):
+        if isinstance(valor, str):
+            textos.append(i)
+        elif isinstance(valor, (int, float, np.number)) and not isinstance(
+            valor, (bool, np.bool_)
+        ):
+            numeros.append(i)
+        elif isinstance(valor, (datetime.date, np.datetime64)):
+            otros.append(i)
+
+    if textos:
+        fechas[textos] = _desde_textos(
+            pd.Series([unicos[i] for i in textos], dtype=object).str.strip()
+        )
+    if numeros:
+        fechas[numeros] = _desde_numeros([unicos[i] for i in numeros])
+    if otros:
+        fechas[otros] = pd.to_datetime(
+            pd.Series([unicos[i] for i in otros], dtype=object), errors="coerce"
+        ).to_numpy("datetime64[ns]")
+    return fechas
+
+
+def interpretar_fechas(serie: pd.Series):
+    """
+    Motor de fechas común a la validación y al cálculo. Interpreta cada valor
+    distinto de la columna una sola vez (y lo recuerda para las siguientes
+    llamadas): textos con el formato detectado para la columna (dd/mm/aaaa,
+    ISO, ...), números como serie de Excel o aaaammdd, y fechas tal cual.
+
+    Returns:
+        tuple: (arreglo datetime64[ns] con NaT en lo no interpretable,
+            máscara booleana de las celdas con valor que no son fecha; las
+            vacías y los textos en blanco no se marcan)
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        if getattr(serie.dt, "tz", None) is not None:
+            serie = serie.dt.tz_localize(None)
+        return serie.to_numpy("datetime64[ns]"), np.zeros(len(serie), dtype=bool)
+
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(object)
+
+    posiciones, unicos = pd.factorize(serie)
+    if pd.api.types.is_bool_dtype(unicos.dtype):
+        fechas_unicas = np.full(len(unicos), NAT)
+    elif pd.api.types.is_numeric_dtype(unicos.dtype):
+        fechas_unicas = _desde_numeros(unicos)
+    else:
+        unicos = list(unicos)
+        with _LOCK_FECHAS:
+            conocidas = {v: _CACHE_FECHAS[v] for v in unicos if v in _CACHE_FECHAS}
+        pendientes = [v for v in unicos if v not in conocidas]
+        if pendientes:
+            # Se interpretan fuera del candado; otro hilo puede vaciar el
+            # caché entretanto, por eso se usa la copia local
+            nuevas = dict(zip(pendientes, _interpretar_unicos(pendientes)))
+            with _LOCK_FECHAS:
+                if len(_CACHE_FECHAS) + len(nuevas) > MAX_CACHE_FECHAS:
+                    _CACHE_FECHAS.clear()
+                _CACHE_FECHAS.update(nuevas)
+            conocidas.update(nuevas)
+        fechas_unicas = np.array([conocidas[v] for v in unicos], dtype="datetime64[ns]")
+
+    en_blanco = np.array(
+        [isinstance(v, str) and not v.strip() for v in unicos], dtype=bool
+    )
+    invalidos_unicos = np.isnat(fechas_unicas) & ~en_blanco
+
+    # La posición -1 (valor vacío) toma el último elemento: NaT y válido
+    fechas = np.append(fechas_unicas, NAT)[posiciones]
+    invalidos = np.append(invalidos_unicos, False)[posiciones]
+    return fechas, invalidos
+
+
+def parsear_fechas(serie: pd.Series) -> pd.Series:
+    """
+    Convierte una serie a datetime64 con interpretar_fechas; los valores no
+    interpretables quedan como NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    fechas, _ = interpretar_fechas(serie)
+    return pd.Series(fechas, index=serie.index, name=serie.name)
@@ -1,21 +1,222 @@
+from contextlib import contextmanager
+from itertools import islice, zip_longest
+
+import numpy as np
 import pandas as pd
+from openpyxl import load_workbook
+from pandas.api.types import union_categoricals
+
+from .esquema import dtypes_lectura
+from .limpieza import limpiar_columnas, limpiar_dataframe, normalizar_nombres_columnas
+
+# Filas que se leen del XLSX antes de pasarlas a los buffers por columna
+FILAS_POR_LOTE_XLSX = 10_000
+
 
+def _a_dtype_lectura(serie: pd.Series, dtype) -> pd.Series:
+    # Excel puede traer tipos mezclados en una columna: se pasan a texto antes
+    # de convertir, ya que las categorías deben ser comparables.
+    return serie.where(serie.isna(), serie.astype(str)).astype(dtype)
 
-def cargar_archivo(archivo):
+
+def _aplicar_dtypes(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
     """
-    Carga un archivo Excel o CSV en un DataFrame limpio.
+    Normaliza los encabezados y aplica el mapa de dtypes a las columnas que
+    no lo traen ya (p. ej. un CSV con encabezados en minúsculas).
+    """
+    df = limpiar_columnas(df)
+    for col, dtype in dtypes.items():
+        if col in df.columns and df[col].dtype != dtype:
+            df[col] = _a_dtype_lectura(df[col], dtype)
+    return df
+
+
+def leer_planilla(archivo, tipo: str = None) -> pd.DataFrame:
+    """
+    Lee un archivo Excel o CSV sin limpiar, con los encabezados normalizados
+    (limpiar_columnas). Si se indica el tipo de planilla, las columnas
+    enumeradas se leen como categorías.
     """
     ext = archivo.name.split(".")[-1].lower()
+    dtypes = dtypes_lectura(tipo)
+    if ext == "xlsx":
+        return leer_xlsx(archivo, dtypes)
+    elif ext == "xls":
+        # openpyxl no lee .xls: se usa read_excel, que carga el libro completo
+        df = pd.read_excel(archivo, dtype={col: str for col in dtypes})
+        return _aplicar_dtypes(df, dtypes)
+    elif ext == "csv":
+        return _aplicar_dtypes(pd.read_csv(archivo, dtype=dtypes), dtypes)
+    else:
+        raise ValueError(f"Formato de archivo no soportado: {ext}")
+
+
+def _nombres_columnas(encabezado) -> list:
+    """
+    Nombres de columna desde la fila de encabezado, como los arma pandas:
+    sin celdas vacías al final y 'Unnamed: i' para las vacías intermedias.
+    """
+    encabezado = list(encabezado)
+    while encabezado and encabezado[-1] is None:
+        encabezado.pop()
+    return [
+        f"Unnamed: {i}" if valor is None else str(valor)
+        for i, valor in enumerate(encabezado)
+    ]
+
+
+@contextmanager
+def _hoja_xlsx(archivo):
+    """
+    Abre la primera hoja con el iterador de solo lectura de openpyxl, que
+    entrega los valores fila a fila sin armar el modelo de celdas del libro.
+
+    Yields:
+        tuple: (columnas normalizadas, iterador de filas de datos)
+    """
+    libro = load_workbook(archivo, read_only=True, data_only=True)
     try:
-        if ext in ["xls", "xlsx"]:
-            df = pd.read_excel(archivo)
-        elif ext == "csv":
-            df = pd.read_csv(archivo)
-        else:
-            raise ValueError(f"Formato de archivo no soportado: {ext}")
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        columnas = list(normalizar_nombres_columnas(_nombres_columnas(next(filas, ()))))
+        yield columnas, filas
+    finally:
+        libro.close()
+
+
+def _lotes_por_columna(filas, ancho: int, tamano_lote: int):
+    """
+    Transpone las filas, de a `tamano_lote`, a una tupla de valores por
+    columna. Las filas más cortas que el encabezado se completan con None.
+    """
+    while True:
+        lote = [fila[:ancho] for fila in islice(filas, tamano_lote)]
+        if not lote:
+            return
+        columnas = list(zip_longest(*lote))
+        faltantes = ancho - len(columnas)
+        if faltantes > 0:
+            columnas.extend([(None,) * len(lote)] * faltantes)
+        yield len(lote), columnas
+
+
+def _tramo_tipado(valores, dtype=None) -> pd.Series:
+    """
+    Serie de un lote de valores de una columna: con el dtype del mapa de
+    lectura si lo tiene y, si no, con el tipo que infiere pandas (entero,
+    decimal, fecha o texto). Las celdas vacías quedan como NaN, como en
+    read_excel.
+    """
+    if dtype is not None:
+        return _a_dtype_lectura(pd.Series(valores, dtype=object), dtype)
+    serie = pd.Series(valores)
+    if serie.dtype == object:
+        datos = serie.to_numpy(copy=True)
+        vacios = pd.isna(datos)
+        if vacios.all():
+            return pd.Series(np.full(len(datos), np.nan))
+        datos[vacios] = np.nan
+        serie = pd.Series(datos, dtype=object)
+    return serie
 
-        from .limpieza import limpiar_dataframe
 
+def _unir_tramos(tramos: list) -> pd.Series:
+    """
+    Une los lotes tipados de una columna. Si los lotes quedaron con tipos
+    distintos (p. ej. uno con solo enteros y otro con vacíos) se vuelve a
+    inferir el tipo sobre la columna completa.
+    """
+    if not tramos:
+        return pd.Series([], dtype=object)
+    if len(tramos) == 1:
+        return tramos[0].reset_index(drop=True)
+    if isinstance(tramos[0].dtype, pd.CategoricalDtype):
+        return pd.Series(union_categoricals(tramos, sort_categories=True))
+    if all(t.dtype == tramos[0].dtype for t in tramos):
+        return pd.Series(np.concatenate([t.to_numpy() for t in tramos]))
+    datos = np.concatenate([t.to_numpy(dtype=object) for t in tramos])
+    return pd.Series(datos, dtype=object).infer_objects()
+
+
+def _dataframe_xlsx(columnas: list, series: list, inicio: int = 0) -> pd.DataFrame:
+    df = pd.DataFrame({i: serie for i, serie in enumerate(series)})
+    df.columns = columnas
+    df.index = pd.RangeIndex(inicio, inicio + len(df))
+    return df
+
+
+def leer_xlsx(archivo, dtypes: dict = None) -> pd.DataFrame:
+    """
+    Lee la primera hoja de un XLSX recorriéndola en modo solo lectura. Cada
+    lote de filas se pasa a un buffer tipado por columna (arreglos de
+    enteros, decimales, fechas o categorías), así en memoria no quedan
+    objetos por celda ni el libro completo, como con read_excel.
+
+    Args:
+        archivo: ruta o archivo binario abierto
+        dtypes (dict): columna (normalizada) → dtype, p. ej. dtypes_lectura
+
+    Returns:
+        pd.DataFrame: con encabezados normalizados y sin las filas vacías del
+            final de la hoja
+    """
+    dtypes = dtypes or {}
+    with _hoja_xlsx(archivo) as (columnas, filas):
+        tramos = [[] for _ in columnas]
+        for _, lote in _lotes_por_columna(filas, len(columnas), FILAS_POR_LOTE_XLSX):
+            for col, buffer, valores in zip(columnas, tramos, lote):
+                buffer.append(_tramo_tipado(valores, dtypes.get(col)))
+
+    df = _dataframe_xlsx(columnas, [_unir_tramos(t) for t in tramos])
+    # El rango usado de la hoja puede incluir filas vacías al final
+    con_datos = np.flatnonzero(df.notna().any(axis=1).to_numpy())
+    fin = con_datos[-1] + 1 if len(con_datos) else 0
+    return df.iloc[:fin] if fin < len(df) else df
+
+
+def _leer_xlsx_por_bloques(archivo, dtypes: dict, tamano_bloque: int):
+    """
+    Recorre la primera hoja en modo solo lectura, armando un DataFrame por
+    cada `tamano_bloque` filas.
+    """
+    with _hoja_xlsx(archivo) as (columnas, filas):
+        inicio = 0
+        for filas_lote, lote in _lotes_por_columna(filas, len(columnas), tamano_bloque):
+            series = [
+                _tramo_tipado(valores, dtypes.get(col))
+                for col, valores in zip(columnas, lote)
+            ]
+            yield _dataframe_xlsx(columnas, series, inicio)
+            inicio += filas_lote
+
+
+def leer_planilla_por_bloques(archivo, tipo: str = None, tamano_bloque: int = 20_000):
+    """
+    Lee un archivo Excel o CSV por bloques de `tamano_bloque` filas, sin
+    cargarlo completo en memoria. El índice de cada bloque sigue la numeración
+    del archivo completo.
+    """
+    ext = archivo.name.split(".")[-1].lower()
+    dtypes = dtypes_lectura(tipo)
+    if ext == "csv":
+        for bloque in pd.read_csv(archivo, dtype=dtypes, chunksize=tamano_bloque):
+            yield _aplicar_dtypes(bloque, dtypes)
+    elif ext == "xlsx":
+        yield from _leer_xlsx_por_bloques(archivo, dtypes, tamano_bloque)
+    elif ext == "xls":
+        # openpyxl no lee .xls: se carga completo y se entrega por tramos
+        df = leer_planilla(archivo, tipo)
+        for inicio in range(0, len(df), tamano_bloque):
+            yield df.iloc[inicio : inicio + tamano_bloque]
+    else:
+        raise ValueError(f"Formato de archivo no soportado: {ext}")
+
+
+def cargar_archivo(archivo, tipo: str = None):
+    """
+    Carga un archivo Excel o CSV en un DataFrame limpio.
+    """
+    try:
+        df = leer_planilla(archivo, tipo)
         return limpiar_dataframe(df)
 
     except Exception as e:
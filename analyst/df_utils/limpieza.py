@@ -1,22 +1,53 @@
+import numpy as np
 import pandas as pd
 
 
+def limpiar_categorica(serie: pd.Series) -> pd.Series:
+    """
+    Quita espacios a una columna categórica operando sobre sus categorías,
+    sin expandirla a texto. Las categorías vacías pasan a ser nulos.
+    """
+    categorias = serie.cat.categories.astype(str).str.strip()
+    nuevas, posicion = np.unique(categorias.to_numpy(dtype=str), return_inverse=True)
+    codigos = serie.cat.codes.to_numpy()
+    if len(nuevas) == 0:
+        # Columna sin categorías: todos los valores son nulos
+        return serie
+    nuevos_codigos = np.where(codigos >= 0, posicion[np.maximum(codigos, 0)], -1)
+    if "" in nuevas:
+        nuevos_codigos[nuevos_codigos == np.searchsorted(nuevas, "")] = -1
+    return pd.Series(
+        pd.Categorical.from_codes(nuevos_codigos, categories=nuevas),
+        index=serie.index,
+    ).cat.remove_unused_categories()
+
+
 def limpiar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
     Limpia un DataFrame: quita espacios, normaliza vacíos, elimina filas vacías.
     """
     for col in df.select_dtypes(include=["object"]).columns:
-        df[col] = df[col].astype(str).str.strip()
+        serie = df[col]
+        df[col] = serie.where(serie.isna(), serie.astype(str).str.strip())
         df[col] = df[col].replace(r"^\s*$", pd.NA, regex=True)
+    for col in df.select_dtypes(include=["category"]).columns:
+        df[col] = limpiar_categorica(df[col])
     df.dropna(how="all", inplace=True)
     return df
 
 
+def normalizar_nombres_columnas(columnas) -> pd.Index:
+    """
+    Nombres de columnas en mayúsculas y sin espacios al inicio/fin.
+    """
+    return pd.Index(columnas).astype(str).str.strip().str.upper()
+
+
 def limpiar_columnas(df: pd.DataFrame) -> pd.DataFrame:
     """
     Normaliza nombres de columnas: mayúsculas, sin espacios al inicio/fin.
     """
-    df.columns = df.columns.str.strip().str.upper()
+    df.columns = normalizar_nombres_columnas(df.columns)
     return df
 
 
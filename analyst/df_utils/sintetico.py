@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+from analyst.constants.validaciones_config import (
+    COLUMNS_ALLOW_EMPTY,
+    VALID_COLUMNS,
+    VALID_RANGES,
+    VALID_TYPES,
+    VALID_VALUES,
+)
+from analyst.df_utils.validaciones_rut import calcular_dv_vectorizado
+
+TIPO = "planilla_validadora"
+
+NOMBRES = ["maria", "jose", "ana", "juan", "carolina", "pedro", "camila", "luis"]
+APELLIDOS = ["gonzalez", "munoz", "rojas", "diaz", "perez", "soto", "silva", "torres"]
+
+# Errores que se pueden inyectar, uno por fila afectada: dígito verificador
+# del RUT, texto en SUELDO_BASE, JORNADA_HORAS fuera de rango, CARGO no
+# permitido y NOMBRE vacío
+TIPOS_ERROR = ("rut", "tipo", "rango", "valor", "vacio")
+
+# Rango de los montos en pesos de las columnas numéricas sin rango definido
+RANGO_MONTOS = (0, 200_000)
+RANGO_SUELDOS = (450_000, 1_500_000)
+RANGO_FECHAS = ("1990-01-01", "2024-12-31")
+
+
+def _fechas(rng, filas: int, rango) -> np.ndarray:
+    inicio, termino = (np.datetime64(f, "D") for f in rango)
+    dias = rng.integers(0, (termino - inicio).astype(int) + 1, filas)
+    # Se formatea cada día distinto una vez (strftime es lento por celda)
+    unicos, posiciones = np.unique(dias, return_inverse=True)
+    texto = pd.DatetimeIndex(inicio + unicos).strftime("%d/%m/%Y").to_numpy(object)
+    return texto[posiciones]
+
+
+def _ruts(rng, filas: int) -> np.ndarray:
+    cuerpos = rng.choice(np.arange(5_000_000, 26_000_000), filas, replace=False)
+    cuerpos = pd.Series(cuerpos.astype(str))
+    return (cuerpos + "-" + calcular_dv_vectorizado(cuerpos)).to_numpy(object)
+
+
+def _inyectar_errores(df: pd.DataFrame, rng, tasa_errores: float, tipos_error):
+    """
+    Marca una fracción `tasa_errores` de las filas con un error cada una,
+    repartiendo los tipos de error en partes iguales.
+    """
+    afectadas = int(round(len(df) * tasa_errores))
+    if afectadas == 0 or not tipos_error:
+        return df
+
+    filas = rng.choice(len(df), afectadas, replace=False)
+    rangos = VALID_RANGES[TIPO]
+
+    for i, tipo_error in enumerate(tipos_error):
+        grupo = filas[i :: len(tipos_error)]
+        if len(grupo) == 0:
+            continue
+        if tipo_error == "rut":
+            # Se cambia el dígito verificador por uno que no corresponde
+            ruts = df["RUT"].iloc[grupo].str[:-1]
+            dv = df["RUT"].iloc[grupo].str[-1]
+            df.loc[df.index[grupo], "RUT"] = ruts + np.where(dv == "1", "2", "1")
+        elif tipo_error == "tipo":
+            columna = "SUELDO_BASE"
+            df[columna] = df[columna].astype(object)
+            df.loc[df.index[grupo], columna] = "sin dato"
+        elif tipo_error == "rango":
+            df.loc[df.index[grupo], "JORNADA_HORAS"] = rangos["JORNADA_HORAS"][1] + 1
+        elif tipo_error == "valor":
+            df.loc[df.index[grupo], "CARGO"] = "no permitido"
+        elif tipo_error == "vacio":
+            df.loc[df.index[grupo], "NOMBRE"] = np.nan
+        else:
+            raise ValueError(f"Tipo de error desconocido: {tipo_error}")
+    return df
+
+
+def generar_planilla(
+    filas: int,
+    anio: int,
+    mes: int,
+    region: int = 13,
+    tasa_errores: float = 0.0,
+    tipos_error=TIPOS_ERROR,
+    semilla: int = 0,
+    establecimientos: int = None,
+) -> pd.DataFrame:
+    """
+    Planilla validadora sintética con las columnas, tipos, rangos y valores
+    de validaciones_config y RUT con dígito verificador válido.
+
+    Las personas (RUT, nombres, establecimiento, cargo y fechas) dependen solo
+    de `semilla` y `filas`, así las planillas de distintos meses con la misma
+    semilla describen a las mismas personas, como en los datos reales. Los
+    montos cambian con el mes.
+
+    Args:
+        filas (int): cantidad de filas
+        anio (int), mes (int): periodo de la planilla (ANIO y MES)
+        region (int): región de los códigos de establecimiento
+        tasa_errores (float): fracción de filas (0 a 1) con un error
+        tipos_error: errores a inyectar, de TIPOS_ERROR
+        semilla (int): semilla de las personas
+        establecimientos (int, opcional): cantidad de establecimientos; por
+            defecto uno cada 25 filas
+
+    Returns:
+        pd.DataFrame: planilla lista para guardar como CSV o XLSX
+    """
+    personas = np.random.default_rng(semilla)
+    montos = np.random.default_rng([semilla, anio, mes])
+    rangos = VALID_RANGES[TIPO]
+    valores = VALID_VALUES[TIPO]
+
+    establecimientos = establecimientos or max(1, filas // 25)
+    codigos = np.sort(
+        region * 1_000_000
+        + personas.choice(np.arange(1, 999_999), establecimientos, replace=False)
+    )
+
+    datos = {}
+    for columna in VALID_COLUMNS[TIPO]:
+        tipo = VALID_TYPES[TIPO].get(columna, "texto")
+        rng = montos if tipo == "numerico" else personas
+
+        if columna in valores:
+            datos[columna] = rng.choice(valores[columna]["allowed"], filas)
+        elif tipo == "numerico":
+            minimo, maximo = rangos.get(columna, RANGO_MONTOS)
+            datos[columna] = rng.integers(minimo, maximo + 1, filas)
+        elif tipo == "fecha":
+            datos[columna] = _fechas(rng, filas, rangos.get(columna, RANGO_FECHAS))
+        else:
+            datos[columna] = np.full(filas, columna.lower(), dtype=object)
+
+    datos["CODIGO_ESTABLECIMIENTO"] = personas.choice(codigos, filas)
+    nombres = np.array([f"jardin {c}" for c in codigos], dtype=object)
+    datos["NOMBRE_ESTABLECIMIENTO"] = nombres[
+        np.searchsorted(codigos, datos["CODIGO_ESTABLECIMIENTO"])
+    ]
+    datos["ANIO"] = np.full(filas, anio)
+    datos["MES"] = np.full(filas, mes)
+    datos["RUT"] = _ruts(personas, filas)
+    datos["NOMBRE"] = personas.choice(NOMBRES, filas)
+    datos["APELLIDO_PATERNO"] = personas.choice(APELLIDOS, filas)
+    datos["APELLIDO_MATERNO"] = personas.choice(APELLIDOS, filas)
+    # GRUPO es texto en VALID_TYPES: un número se leería como numérico
+    grupos = np.array([f"grupo {g}" for g in range(rangos["GRUPO"][1] + 1)], object)
+    datos["GRUPO"] = grupos[personas.integers(*rangos["GRUPO"], filas, endpoint=True)]
+    datos["SUELDO_BRUTO_O_TOTAL_HABERES"] = montos.integers(*RANGO_SUELDOS, filas)
+
+    # Algunas celdas opcionales vacías
+    for columna in COLUMNS_ALLOW_EMPTY[TIPO]:
+        vacias = personas.random(filas) < 0.3
+        datos[columna] = np.where(vacias, None, datos[columna])
+
+    df = pd.DataFrame(datos, columns=VALID_COLUMNS[TIPO])
+    return _inyectar_errores(df, montos, tasa_errores, tipos_error)
+
+
+def generar_parametros(regiones=range(1, 17)) -> pd.DataFrame:
+    """
+    Parámetro remuneracional sintético: una fila por región y una columna
+    por cargo permitido, como el archivo que se sube.
+    """
+    cargos = [c.upper() for c in VALID_VALUES[TIPO]["CARGO"]["allowed"]]
+    regiones = np.asarray(list(regiones))
+    datos = {"COD_REGION": regiones}
+    for i, cargo in enumerate(cargos):
+        datos[cargo] = 800_000 + regiones * 1_000 + i * 50_000
+    return pd.DataFrame(datos)
@@ -1,5 +1,8 @@
 import pandas as pd
 
+from .fechas import interpretar_fechas
+from .helpers import es_numero
+
 
 def validar_columnas_obligatorias(df: pd.DataFrame, columnas: list) -> list:
     """
@@ -26,3 +29,83 @@ def validar_archivo(nombre_archivo):
             "Formato de archivo no permitido. Solo se permiten .xls, .xlsx o .csv."
         ]
     return True, []
+
+
+def mascara_vacios(serie: pd.Series) -> pd.Series:
+    """
+    Marca las celdas nulas o que solo contienen espacios.
+    """
+    vacios = serie.isna()
+    if not (
+        pd.api.types.is_numeric_dtype(serie)
+        or pd.api.types.is_datetime64_any_dtype(serie)
+    ):
+        vacios |= serie.astype(str).str.strip() == ""
+    return vacios
+
+
+def mascara_no_numericos(serie: pd.Series) -> pd.Series:
+    """
+    Marca las celdas que no se pueden convertir a número.
+    Solo los valores que pd.to_numeric rechaza se revisan uno a uno,
+    y cada valor distinto se revisa una sola vez.
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return pd.Series(False, index=serie.index)
+
+    dudosos = pd.to_numeric(serie, errors="coerce").isna() & serie.notna()
+    if not dudosos.any():
+        return dudosos
+
+    invalidos = {v for v in serie[dudosos].unique() if not es_numero(v)}
+    return dudosos & serie.isin(invalidos)
+
+
+def mascara_no_fechas(serie: pd.Series) -> pd.Series:
+    """
+    Marca las celdas que no se pueden interpretar como fecha
+    (interpretar_fechas: cada valor distinto se revisa una sola vez).
+    """
+    _, invalidos = interpretar_fechas(serie)
+    return pd.Series(invalidos, index=serie.index)
+
+
+def mascara_no_texto(serie: pd.Series) -> pd.Series:
+    """
+    Marca las celdas que no son texto.
+    """
+    if pd.api.types.infer_dtype(serie, skipna=True) in ("string", "empty"):
+        return pd.Series(False, index=serie.index)
+    return ~serie.map(lambda v: isinstance(v, str)).astype(bool)
+
+
+MASCARAS_TIPO = {
+    "numerico": mascara_no_numericos,
+    "fecha": mascara_no_fechas,
+    "texto": mascara_no_texto,
+}
+
+
+def mascara_tipo_invalido(serie: pd.Series, tipo: str) -> pd.Series:
+    """
+    Marca las celdas que no cumplen el tipo esperado (ver VALID_TYPES).
+    """
+    mascara = MASCARAS_TIPO.get(tipo)
+    if mascara is None:
+        return pd.Series(False, index=serie.index)
+    return mascara(serie)
+
+
+def mascara_fuera_de_rango(serie: pd.Series, min_val, max_val) -> pd.Series:
+    """
+    Marca los valores no nulos fuera del rango [min_val, max_val].
+    """
+    return serie.notna() & ~serie.between(min_val, max_val)
+
+
+def mascara_no_permitidos(serie: pd.Series, permitidos: set) -> pd.Series:
+    """
+    Marca los valores no vacíos (ni nulos) que no están en el conjunto
+    permitido.
+    """
+    return serie.notna() & (serie != "") & ~serie.isin(permitidos)
@@ -1,6 +1,15 @@
 import re
+import numpy as np
 import pandas as pd
 
+from .validaciones import mascara_vacios
+
+
+FACTORES_DV = np.array([2, 3, 4, 5, 6, 7])
+
+# Dígito verificador según 11 - (suma % 11), indexado por ese resto (1..11)
+DV_POR_RESTO = np.array(["", "1", "2", "3", "4", "5", "6", "7", "8", "9", "K", "0"])
+
 
 def calcular_dv(rut_num: str) -> str:
     reversed_digits = list(map(int, reversed(str(rut_num))))
@@ -24,21 +33,69 @@ def normalizar_y_validar_rut(rut_str: str):
     return f"{int(rut_num)}-{dv_esperado}" if dv_esperado == dv_ingresado else None
 
 
-def validar_rut(df: pd.DataFrame, col="RUT"):
-    errores = []
-    if col not in df.columns:
-        errores.append("Falta la columna 'RUT' para validación de RUTs.")
-        return errores
-
-    for i, val in df[col].items():
-        fila = i + 2
-        if pd.isna(val) or str(val).strip() == "":
-            errores.append(f"Fila {fila}, columna 'RUT': vacío no permitido.")
-            continue
-
-        rut_validado = normalizar_y_validar_rut(str(val))
-        if not rut_validado:
-            errores.append(f"Fila {fila}, columna 'RUT': '{val}' no es un RUT válido.")
-        else:
-            df.at[i, col] = rut_validado  # Normaliza el RUT
-    return errores
+def calcular_dv_vectorizado(cuerpos: pd.Series) -> np.ndarray:
+    """
+    Calcula el dígito verificador de muchos RUT a la vez.
+
+    Los cuerpos (solo dígitos ASCII) se llevan a una matriz de dígitos rellena
+    con ceros a la izquierda, donde la columna k es el k-ésimo dígito contado
+    desde la derecha, y se multiplican por los factores 2..7.
+    """
+    if cuerpos.empty:
+        return np.array([], dtype="<U1")
+
+    ancho = int(cuerpos.str.len().max())
+    if ancho <= 18:
+        numeros = cuerpos.astype(np.int64).to_numpy()
+        digitos = (numeros[:, None] // 10 ** np.arange(ancho)) % 10
+    else:
+        # No cabe en int64: se arma la matriz desde los bytes del texto
+        texto = "".join(cuerpos.str.zfill(ancho)).encode("ascii")
+        matriz = np.frombuffer(texto, dtype=np.uint8).reshape(-1, ancho)
+        digitos = (matriz[:, ::-1] - ord("0")).astype(np.int64)
+
+    total = digitos @ FACTORES_DV[np.arange(ancho) % 6]
+    return DV_POR_RESTO[11 - total % 11]
+
+
+def normalizar_ruts(valores: pd.Series) -> pd.Series:
+    """
+    Versión vectorizada de normalizar_y_validar_rut.
+
+    Retorna una serie con el RUT normalizado ('12345678-K') en las filas válidas
+    y None en las inválidas, con el mismo índice que `valores`.
+    """
+    limpios = valores.astype(str).str.replace(r"[^0-9kK]", "", regex=True)
+    cuerpos = limpios.str[:-1]
+    candidatos = ((limpios.str.len() >= 2) & cuerpos.str.isdigit()).to_numpy()
+
+    resultado = np.full(len(valores), None, dtype=object)
+    if candidatos.any():
+        cuerpos_candidatos = cuerpos[candidatos]
+        dv_esperado = calcular_dv_vectorizado(cuerpos_candidatos)
+        dv_ingresado = limpios[candidatos].str[-1].str.upper().to_numpy()
+        coinciden = dv_esperado == dv_ingresado
+
+        numeros = cuerpos_candidatos[coinciden].str.lstrip("0").replace("", "0")
+        posiciones = np.flatnonzero(candidatos)[coinciden]
+        resultado[posiciones] = (numeros + "-" + dv_esperado[coinciden]).to_numpy()
+
+    return pd.Series(resultado, index=valores.index, dtype=object)
+
+
+def mascaras_rut(df: pd.DataFrame, col="RUT"):
+    """
+    Marca los RUT vacíos y los inválidos, y deja normalizados los válidos en
+    df[col] (los inválidos conservan su valor original).
+
+    Returns:
+        tuple: (vacíos, inválidos) como arreglos booleanos
+    """
+    vacios = mascara_vacios(df[col])
+    normalizados = normalizar_ruts(df[col])
+    invalidos = ~vacios & normalizados.isna()
+
+    # Normaliza los RUT válidos en una sola asignación
+    df[col] = normalizados.where(normalizados.notna(), df[col])
+    return vacios.to_numpy(), invalidos.to_numpy()
+
@@ -148,6 +148,31 @@ class SemestreAnteriorForm(forms.Form):
             )
 
 
+class HomologacionNacionalForm(forms.Form):
+    anio = forms.ChoiceField(
+        choices=[(str(y), str(y)) for y in range(2018, date.today().year + 1)],
+        label="Año",
+    )
+    mes = forms.ChoiceField(
+        choices=MESES_CHOICES,
+        label="Mes",
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        hoy = date.today()
+        if not self.data:
+            self.fields["anio"].initial = str(hoy.year)
+            self.fields["mes"].initial = hoy.month
+
+        for field in self.fields.values():
+            field.widget.attrs.update(
+                {
+                    "class": "w-full border border-gray-300 rounded px-3 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
+                }
+            )
+
+
 class ParametroRemuneracionalForm(forms.Form):
     anio = forms.ChoiceField(
         choices=[(str(y), str(y)) for y in range(2020, date.today().year + 2)],
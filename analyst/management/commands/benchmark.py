@@ -0,0 +1,84 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from analyst.services.benchmark import (
+    TAMANOS,
+    TOLERANCIA,
+    comparar_con_linea_base,
+    ejecutar_benchmark,
+    guardar_linea_base,
+    leer_linea_base,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide validar, consolidar_sueldos, calcular_homologacion y la exportación "
+        "XLSX con planillas sintéticas de varios tamaños y compara con la línea "
+        "base. Termina con error si hay regresiones o escalamiento no lineal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanos",
+            type=int,
+            nargs="+",
+            default=list(TAMANOS),
+            help="Filas por planilla (por defecto 1000 10000 100000 1000000).",
+        )
+        parser.add_argument(
+            "--repeticiones",
+            type=int,
+            default=1,
+            help="Ejecuciones por etapa; se informa la más rápida.",
+        )
+        parser.add_argument(
+            "--linea-base",
+            default=os.path.join(settings.BASE_DIR, "benchmarks", "linea_base.json"),
+            help="Archivo JSON con la línea base.",
+        )
+        parser.add_argument(
+            "--tolerancia",
+            type=float,
+            default=TOLERANCIA,
+            help="Proporción sobre la línea base que se considera regresión.",
+        )
+        parser.add_argument(
+            "--actualizar",
+            action="store_true",
+            help="Guarda el resultado como nueva línea base.",
+        )
+        parser.add_argument(
+            "--salida",
+            help="Archivo donde escribir el resultado JSON de esta ejecución.",
+        )
+
+    def handle(self, *args, **options):
+        resultado = ejecutar_benchmark(options["tamanos"], options["repeticiones"])
+
+        for filas, etapas in resultado["segundos"].items():
+            tiempos = ", ".join(f"{e} {s:.3f}s" for e, s in etapas.items())
+            self.stdout.write(f"{filas} filas: {tiempos}")
+
+        if options["salida"]:
+            guardar_linea_base(resultado, options["salida"])
+
+        ruta = options["linea_base"]
+        if options["actualizar"]:
+            guardar_linea_base(resultado, ruta)
+            self.stdout.write(self.style.SUCCESS(f"Línea base guardada en {ruta}"))
+            return
+
+        base = leer_linea_base(ruta)
+        if base is None:
+            self.stdout.write(
+                f"No hay línea base en {ruta}; use --actualizar para crearla."
+            )
+        problemas = comparar_con_linea_base(resultado, base, options["tolerancia"])
+        if problemas:
+            self.stdout.write(json.dumps(resultado["escalamiento"], indent=2))
+            raise CommandError("\n".join(problemas))
+        self.stdout.write(self.style.SUCCESS("Sin regresiones."))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from analyst.models import ArchivoSubido
+from analyst.services.remuneraciones import cargar_remuneraciones
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga en RemuneracionMensual las planillas subidas que aún no tienen "
+        "sus filas en la tabla (o todas, con --todas)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--todas",
+            action="store_true",
+            help="Vuelve a cargar también las planillas que ya están en la tabla.",
+        )
+
+    def handle(self, *args, **options):
+        archivos = ArchivoSubido.objects.filter(proceso="planilla_validadora")
+        if not options["todas"]:
+            archivos = archivos.filter(remuneraciones__isnull=True).distinct()
+
+        cargados = 0
+        errores = 0
+        for archivo in archivos.order_by("id"):
+            try:
+                filas = cargar_remuneraciones(archivo)
+                cargados += 1
+                self.stdout.write(f"Cargado: {archivo.archivo.name} ({filas} filas)")
+            except Exception as e:
+                errores += 1
+                self.stderr.write(f"Error cargando {archivo.archivo.name}: {e}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{cargados} planillas cargadas, {errores} con error.")
+        )
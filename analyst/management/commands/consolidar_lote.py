@@ -0,0 +1,48 @@
+from django.core.management.base import CommandError
+
+from analyst.management.lote import ComandoLote
+from analyst.services.lotes import regiones_con_archivos, tareas_consolidacion
+
+
+class Command(ComandoLote):
+    help = (
+        "Consolida los archivos de las regiones y años indicados, entre "
+        "--mes-inicio y --mes-termino, y escribe los resultados en una carpeta."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--mes-inicio",
+            type=int,
+            default=1,
+            choices=range(1, 13),
+            metavar="MES",
+            help="Primer mes a consolidar (por defecto 1).",
+        )
+        parser.add_argument(
+            "--mes-termino",
+            type=int,
+            default=12,
+            choices=range(1, 13),
+            metavar="MES",
+            help="Último mes a consolidar (por defecto 12).",
+        )
+        parser.add_argument(
+            "--proceso",
+            default="planilla_validadora",
+            help="Proceso de los archivos (por defecto planilla_validadora).",
+        )
+
+    def handle(self, *args, **options):
+        mes_inicio = options["mes_inicio"]
+        mes_termino = options["mes_termino"]
+        if mes_termino < mes_inicio:
+            raise CommandError("El mes término no puede ser menor que el mes inicio.")
+
+        proceso = options["proceso"]
+        regiones = options["regiones"] or regiones_con_archivos(proceso)
+        tareas, omitidas = tareas_consolidacion(
+            regiones, options["anios"], mes_inicio, mes_termino, proceso
+        )
+        self.ejecutar(tareas, omitidas, options)
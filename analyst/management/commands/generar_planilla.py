@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from analyst.df_utils.sintetico import TIPOS_ERROR, generar_planilla
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera una planilla validadora sintética (CSV o XLSX) para pruebas de "
+        "carga, con RUT válidos y una tasa de errores controlable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("salida", help="Archivo a escribir (.csv o .xlsx).")
+        parser.add_argument("--filas", type=int, default=1000)
+        parser.add_argument("--anio", type=int, required=True)
+        parser.add_argument("--mes", type=int, required=True, choices=range(1, 13))
+        parser.add_argument("--region", type=int, default=13)
+        parser.add_argument(
+            "--tasa-errores",
+            type=float,
+            default=0.0,
+            help="Fracción de filas (0 a 1) con un error.",
+        )
+        parser.add_argument(
+            "--tipos-error",
+            nargs="+",
+            choices=TIPOS_ERROR,
+            default=list(TIPOS_ERROR),
+        )
+        parser.add_argument(
+            "--semilla",
+            type=int,
+            default=0,
+            help="Con la misma semilla, los meses comparten las mismas personas.",
+        )
+
+    def handle(self, *args, **options):
+        df = generar_planilla(
+            options["filas"],
+            options["anio"],
+            options["mes"],
+            region=options["region"],
+            tasa_errores=options["tasa_errores"],
+            tipos_error=options["tipos_error"],
+            semilla=options["semilla"],
+        )
+        salida = options["salida"]
+        if salida.lower().endswith(".xlsx"):
+            df.to_excel(salida, index=False)
+        else:
+            df.to_csv(salida, index=False)
+        self.stdout.write(self.style.SUCCESS(f"{len(df)} filas escritas en {salida}"))
@@ -0,0 +1,32 @@
+from analyst.management.lote import ComandoLote
+from analyst.services.lotes import regiones_con_archivos, tareas_homologacion
+
+
+class Command(ComandoLote):
+    help = (
+        "Calcula la homologación para las regiones, años y meses indicados y "
+        "escribe los resultados en una carpeta. Los resultados quedan además "
+        "en el caché, así la aplicación los entrega sin recalcular."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--meses",
+            type=int,
+            nargs="+",
+            required=True,
+            choices=range(1, 13),
+            metavar="MES",
+            help=(
+                "Meses de los datos base (1-12). Es el mes anterior al que se "
+                "elige en la aplicación."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        regiones = options["regiones"] or regiones_con_archivos()
+        tareas, omitidas = tareas_homologacion(
+            regiones, options["anios"], options["meses"]
+        )
+        self.ejecutar(tareas, omitidas, options)
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from analyst.models import ArchivoSubido, ValidacionPlanilla
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina las validaciones guardadas (y sus archivos) que no se usan "
+        "hace más de --dias días y que ninguna carga vigente comparte."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=90)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo lista las validaciones que se eliminarían.",
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timezone.timedelta(days=options["dias"])
+        en_uso = ArchivoSubido.objects.values("archivo")
+        antiguas = ValidacionPlanilla.objects.filter(usado__lt=limite).exclude(
+            archivo__in=en_uso
+        )
+
+        eliminadas = 0
+        for validacion in antiguas:
+            if options["dry_run"]:
+                self.stdout.write(f"Se eliminaría: {validacion}")
+                continue
+            validacion.archivo.delete(save=False)
+            validacion.delete()
+            eliminadas += 1
+
+        if not options["dry_run"]:
+            self.stdout.write(
+                self.style.SUCCESS(f"{eliminadas} validaciones eliminadas.")
+            )
@@ -0,0 +1,66 @@
+import os
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+
+from analyst.df_utils.almacenamiento import dataframe_a_parquet, leer_archivo_guardado
+from analyst.models import ArchivoSubido, ParametroRemuneracional
+
+
+class Command(BaseCommand):
+    help = (
+        "Convierte a Parquet los archivos subidos y parámetros remuneracionales "
+        "que aún están guardados como CSV."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo lista los archivos que se convertirían.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        convertidos = 0
+        errores = 0
+
+        pendientes = [
+            (registro, registro.proceso)
+            for registro in ArchivoSubido.objects.filter(archivo__endswith=".csv")
+        ] + [
+            (registro, None)
+            for registro in ParametroRemuneracional.objects.filter(
+                archivo__endswith=".csv"
+            )
+        ]
+
+        for registro, tipo in pendientes:
+            nombre_csv = registro.archivo.name
+            if dry_run:
+                self.stdout.write(f"Se convertiría: {nombre_csv}")
+                continue
+
+            try:
+                ruta_csv = registro.archivo.path
+                df = leer_archivo_guardado(ruta_csv, tipo)
+                nombre_parquet = os.path.splitext(os.path.basename(nombre_csv))[0]
+                registro.archivo.save(
+                    f"{nombre_parquet}.parquet",
+                    ContentFile(dataframe_a_parquet(df, tipo)),
+                    save=True,
+                )
+                if os.path.isfile(ruta_csv):
+                    os.remove(ruta_csv)
+                convertidos += 1
+                self.stdout.write(f"Convertido: {nombre_csv} → {registro.archivo.name}")
+            except Exception as e:
+                errores += 1
+                self.stderr.write(f"Error convirtiendo {nombre_csv}: {e}")
+
+        if not dry_run:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{convertidos} archivos convertidos a Parquet, {errores} con error."
+                )
+            )
@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analyst.services.trabajos import ColaTrabajos
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta los trabajos de homologación y consolidación encolados por la "
+        "aplicación. Por defecto queda esperando nuevos trabajos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--una-vez",
+            action="store_true",
+            help="Procesa los trabajos pendientes y termina.",
+        )
+        parser.add_argument(
+            "--varios-workers",
+            action="store_true",
+            help=(
+                "Hay otros procesar_trabajos corriendo: al iniciar no se marcan "
+                "con error sus trabajos en proceso, solo los que superan "
+                "TRABAJOS_TIEMPO_MAXIMO."
+            ),
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=2.0,
+            help="Segundos de espera cuando no hay trabajos pendientes.",
+        )
+
+    def handle(self, *args, **options):
+        una_vez = options["una_vez"]
+        intervalo = options["intervalo"]
+
+        # Con un solo worker, lo que quedó en proceso es de uno anterior que
+        # se detuvo (reinicio del contenedor, falta de memoria)
+        abandonados = ColaTrabajos.recuperar_abandonados(
+            None if options["varios_workers"] else 0
+        )
+        if abandonados:
+            self.stderr.write(f"{abandonados} trabajos interrumpidos marcados con error.")
+
+        while True:
+            trabajo = ColaTrabajos.tomar_siguiente()
+            if trabajo is None:
+                if una_vez:
+                    return
+                time.sleep(intervalo)
+                continue
+
+            self.stdout.write(f"Procesando trabajo {trabajo.pk}: {trabajo}")
+            inicio = time.perf_counter()
+            trabajo = ColaTrabajos.ejecutar(trabajo)
+            duracion = time.perf_counter() - inicio
+
+            if trabajo.estado == "terminado":
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Trabajo {trabajo.pk} terminado en {duracion:.1f}s."
+                    )
+                )
+            else:
+                self.stderr.write(f"Trabajo {trabajo.pk} con error: {trabajo.mensaje}")
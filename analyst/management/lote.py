@@ -0,0 +1,88 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analyst.df_utils.exportacion import FORMATOS_ARCHIVO
+from analyst.services.lotes import ejecutar_lote
+from analyst.services.trabajos import procesos_disponibles
+
+
+class ComandoLote(BaseCommand):
+    """
+    Base de los comandos que calculan resultados por lote fuera de la
+    aplicación web (homologar_lote y consolidar_lote).
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--salida",
+            required=True,
+            help="Carpeta donde se escriben los resultados y resumen.json.",
+        )
+        parser.add_argument(
+            "--anios",
+            type=int,
+            nargs="+",
+            required=True,
+            help="Años a procesar.",
+        )
+        parser.add_argument(
+            "--regiones",
+            type=int,
+            nargs="+",
+            help="Regiones a procesar. Por defecto, todas las que tienen archivos.",
+        )
+        parser.add_argument(
+            "--formato",
+            choices=FORMATOS_ARCHIVO,
+            default="xlsx",
+            help="Formato de los resultados (por defecto xlsx).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Procesos en paralelo (por defecto, los núcleos disponibles).",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Escribe el resumen JSON en la salida estándar.",
+        )
+
+    def ejecutar(self, tareas, omitidas, options):
+        workers = options["workers"]
+        if workers is None:
+            workers = procesos_disponibles()
+        if workers < 1:
+            raise CommandError("--workers debe ser al menos 1.")
+
+        resumen = ejecutar_lote(
+            tareas,
+            omitidas,
+            options["salida"],
+            options["formato"],
+            workers,
+        )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(resumen, ensure_ascii=False, indent=2))
+            return
+
+        for resultado in resumen["tareas"]:
+            linea = f"{resultado['nombre']}: {resultado['estado']}"
+            if resultado["estado"] == "terminado":
+                self.stdout.write(
+                    f"{linea} ({resultado['filas']} filas, {resultado['segundos']}s)"
+                )
+            else:
+                self.stderr.write(f"{linea}. {resultado['mensaje']}")
+
+        totales = ", ".join(f"{k}: {v}" for k, v in resumen["totales"].items())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Lote terminado en {resumen['segundos']}s con {resumen['workers']} "
+                f"proceso(s) ({totales or 'sin tareas'}). Resumen en "
+                f"{resumen['salida']}/resumen.json"
+            )
+        )
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:59
+
+import analyst.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyst', '0002_parametroremuneracional'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trabajo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('homologacion', 'Cálculo de Homologación'), ('consolidacion', 'Consolidación de Archivos')], max_length=30)),
+                ('region', models.IntegerField()),
+                ('anio', models.IntegerField()),
+                ('mes', models.IntegerField()),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('clave', models.CharField(db_index=True, max_length=100)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('terminado', 'Terminado'), ('error', 'Error')], default='pendiente', max_length=20)),
+                ('mensaje', models.TextField(blank=True)),
+                ('archivo', models.FileField(blank=True, upload_to=analyst.models.trabajo_resultado_path)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('iniciado', models.DateTimeField(blank=True, null=True)),
+                ('terminado', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-creado'],
+                'indexes': [models.Index(fields=['estado', 'creado'], name='analyst_tra_estado_24660b_idx')],
+            },
+        ),
+    ]
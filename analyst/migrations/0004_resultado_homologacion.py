@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:01
+
+import analyst.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyst', '0003_trabajo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivosubido',
+            name='hash_contenido',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.CreateModel(
+            name='ResultadoHomologacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.IntegerField()),
+                ('anio', models.IntegerField()),
+                ('mes', models.IntegerField()),
+                ('anio_parametro', models.IntegerField()),
+                ('clave', models.CharField(max_length=64, unique=True)),
+                ('archivo', models.FileField(upload_to=analyst.models.resultado_homologacion_path)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['region', 'anio', 'mes'], name='analyst_res_region_2260b5_idx')],
+            },
+        ),
+    ]
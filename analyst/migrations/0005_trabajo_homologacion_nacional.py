@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyst', '0004_resultado_homologacion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trabajo',
+            name='tipo',
+            field=models.CharField(choices=[('homologacion', 'Cálculo de Homologación'), ('homologacion_nacional', 'Cálculo de Homologación Nacional'), ('consolidacion', 'Consolidación de Archivos')], max_length=30),
+        ),
+    ]
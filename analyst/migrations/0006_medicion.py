@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyst', '0005_trabajo_homologacion_nacional'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicionEjecucion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('proceso', models.CharField(max_length=50)),
+                ('region', models.IntegerField(blank=True, null=True)),
+                ('anio', models.IntegerField(blank=True, null=True)),
+                ('mes', models.IntegerField(blank=True, null=True)),
+                ('inicio', models.DateTimeField()),
+                ('segundos', models.FloatField()),
+                ('rss_max_mb', models.FloatField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'medición de ejecución',
+                'verbose_name_plural': 'mediciones de ejecuciones',
+                'ordering': ['-inicio'],
+                'indexes': [models.Index(fields=['proceso', 'inicio'], name='analyst_med_proceso_4cae6e_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MedicionEtapa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('etapa', models.CharField(max_length=50)),
+                ('orden', models.IntegerField()),
+                ('veces', models.IntegerField(default=1)),
+                ('segundos', models.FloatField()),
+                ('filas_entrada', models.BigIntegerField(blank=True, null=True)),
+                ('filas_salida', models.BigIntegerField(blank=True, null=True)),
+                ('memoria_pico_mb', models.FloatField(blank=True, null=True)),
+                ('rss_max_mb', models.FloatField(blank=True, null=True)),
+                ('ejecucion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='etapas', to='analyst.medicionejecucion')),
+            ],
+            options={
+                'ordering': ['ejecucion', 'orden'],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:52
+
+import analyst.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyst', '0006_medicion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ErroresValidacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.IntegerField()),
+                ('anio', models.IntegerField()),
+                ('mes', models.IntegerField()),
+                ('nombre_archivo', models.CharField(max_length=255)),
+                ('total', models.IntegerField()),
+                ('resumen', models.JSONField(blank=True, default=list)),
+                ('generales', models.JSONField(blank=True, default=list)),
+                ('archivo', models.FileField(upload_to=analyst.models.errores_validacion_path)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-creado'],
+            },
+        ),
+    ]
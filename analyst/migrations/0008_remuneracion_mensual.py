@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyst', '0007_errores_validacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RemuneracionMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.IntegerField()),
+                ('anio', models.IntegerField()),
+                ('mes', models.IntegerField()),
+                ('codigo_establecimiento', models.BigIntegerField()),
+                ('rut', models.CharField(max_length=20)),
+                ('remuneraciones_incluye_bonos_y_asignaciones_pactadas', models.FloatField(blank=True, null=True)),
+                ('movilizacion_mas_colacion', models.FloatField(blank=True, null=True)),
+                ('asignacion_mensual_solicitada_de_cd', models.FloatField(blank=True, null=True)),
+                ('sueldo_base', models.FloatField(blank=True, null=True)),
+                ('horas_extras', models.FloatField(blank=True, null=True)),
+                ('antiguedad_bienios', models.FloatField(blank=True, null=True)),
+                ('incentivo', models.FloatField(blank=True, null=True)),
+                ('asignacion_responsabilidad', models.FloatField(blank=True, null=True)),
+                ('reliquidaciones', models.FloatField(blank=True, null=True)),
+                ('incrementos_junji', models.FloatField(blank=True, null=True)),
+                ('aguinaldo', models.FloatField(blank=True, null=True)),
+                ('asignacion_zona_extrema', models.FloatField(blank=True, null=True)),
+                ('bono', models.FloatField(blank=True, null=True)),
+                ('otros_ajustes', models.FloatField(blank=True, null=True)),
+                ('bono_vacaciones_fiscal', models.FloatField(blank=True, null=True)),
+                ('bono_termino_conflicto_fiscal', models.FloatField(blank=True, null=True)),
+                ('aguinaldo_2', models.FloatField(blank=True, null=True)),
+                ('bono_escolar', models.FloatField(blank=True, null=True)),
+                ('movilizacion', models.FloatField(blank=True, null=True)),
+                ('bono_2', models.FloatField(blank=True, null=True)),
+                ('colacion', models.FloatField(blank=True, null=True)),
+                ('asignaciones_familiares', models.FloatField(blank=True, null=True)),
+                ('asignacion_ley_20905', models.FloatField(blank=True, null=True)),
+                ('otros_ajustes_2', models.FloatField(blank=True, null=True)),
+                ('asignacion_carrera_docente_pagada', models.FloatField(blank=True, null=True)),
+                ('sueldo_bruto_o_total_haberes', models.FloatField(blank=True, null=True)),
+                ('archivo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='remuneraciones', to='analyst.archivosubido')),
+            ],
+            options={
+                'verbose_name': 'remuneración mensual',
+                'verbose_name_plural': 'remuneraciones mensuales',
+                'indexes': [models.Index(fields=['region', 'anio', 'mes'], name='analyst_rem_region_2cf01c_idx'), models.Index(fields=['rut'], name='analyst_rem_rut_bcc616_idx')],
+                'constraints': [models.UniqueConstraint(fields=('archivo', 'codigo_establecimiento', 'rut'), name='remuneracion_unica_por_archivo')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:12
+
+import analyst.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyst', '0008_remuneracion_mensual'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValidacionPlanilla',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=30)),
+                ('hash_contenido', models.CharField(max_length=64)),
+                ('version_reglas', models.CharField(max_length=64)),
+                ('valido', models.BooleanField()),
+                ('archivo', models.FileField(upload_to=analyst.models.validacion_planilla_path)),
+                ('hash_resultado', models.CharField(blank=True, max_length=64)),
+                ('resumen', models.JSONField(blank=True, default=dict)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('usado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'validación de planilla',
+                'verbose_name_plural': 'validaciones de planillas',
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'hash_contenido', 'version_reglas'), name='validacion_unica_por_contenido')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def cerrar_duplicados(apps, schema_editor):
+    """Deja activo solo el trabajo más antiguo de cada clave."""
+    Trabajo = apps.get_model("analyst", "Trabajo")
+    vistos = set()
+    activos = Trabajo.objects.filter(estado__in=["pendiente", "en_proceso"])
+    for trabajo in activos.order_by("creado"):
+        if trabajo.clave in vistos:
+            trabajo.estado = "error"
+            trabajo.mensaje = "Trabajo duplicado."
+            trabajo.save(update_fields=["estado", "mensaje"])
+        vistos.add(trabajo.clave)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyst', '0009_validacion_planilla'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(cerrar_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='trabajo',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado__in', ['pendiente', 'en_proceso'])), fields=('clave',), name='trabajo_activo_unico_por_clave'),
+        ),
+    ]
@@ -18,13 +18,13 @@ class PerfilUsuario(models.Model):
 
 
 def user_file_path(instance, filename):
-    # ext = filename.split(".")[-1]
+    ext = filename.split(".")[-1]
     process = instance.proceso
     mes = instance.mes
     anio = instance.anio
     region = instance.region
     username = instance.usuario.username
-    filename = f"{process}_{mes}_{anio}_{username}.csv"
+    filename = f"{process}_{mes}_{anio}_{username}.{ext}"
     return f"region_{region}/{anio}/{mes}/{filename}"
 
 
@@ -40,15 +40,73 @@ class ArchivoSubido(models.Model):
     mes = models.IntegerField()
     archivo = models.FileField(upload_to=user_file_path)
     proceso = models.CharField(max_length=30, choices=PROCESOS)
+    # SHA-256 del archivo guardado; identifica su contenido en el caché de resultados
+    hash_contenido = models.CharField(max_length=64, blank=True)
     creado = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ("usuario", "region", "anio", "mes", "proceso")
 
+    @property
+    def nombre_descarga(self):
+        # El archivo puede estar guardado por contenido (ValidacionPlanilla),
+        # compartido con otras cargas: se descarga con el nombre de esta
+        ext = self.archivo.name.rsplit(".", 1)[-1]
+        return f"{self.proceso}_{self.mes}_{self.anio}_{self.usuario.username}.{ext}"
+
+
+def validacion_planilla_path(instance, filename):
+    # Cabe en los 100 caracteres del campo archivo de ArchivoSubido
+    ext = filename.split(".")[-1]
+    hash_contenido = instance.hash_contenido
+    return (
+        f"contenido/{hash_contenido[:2]}/{hash_contenido[2:]}_"
+        f"{instance.version_reglas[:8]}.{ext}"
+    )
+
+
+class ValidacionPlanilla(models.Model):
+    """
+    Resultado de validar un archivo, identificado por el hash de su
+    contenido y la versión de las reglas de validación. Un archivo idéntico
+    se resuelve desde aquí sin volver a validarlo, y las cargas aceptadas con
+    el mismo contenido comparten el Parquet guardado.
+    """
+
+    tipo = models.CharField(max_length=30)
+    # SHA-256 del archivo tal como se subió
+    hash_contenido = models.CharField(max_length=64)
+    version_reglas = models.CharField(max_length=64)
+    valido = models.BooleanField()
+    # Parquet tipado (válida) o reporte de errores en Parquet (rechazada)
+    archivo = models.FileField(upload_to=validacion_planilla_path)
+    # SHA-256 del Parquet (ArchivoSubido.hash_contenido de las cargas)
+    hash_resultado = models.CharField(max_length=64, blank=True)
+    # Válida: filas y conteos del resumen. Rechazada: resumen de errores,
+    # mensajes generales, total y motivo de detención.
+    resumen = models.JSONField(default=dict, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    usado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tipo", "hash_contenido", "version_reglas"],
+                name="validacion_unica_por_contenido",
+            )
+        ]
+        verbose_name = "validación de planilla"
+        verbose_name_plural = "validaciones de planillas"
+
+    def __str__(self):
+        estado = "válida" if self.valido else "rechazada"
+        return f"{self.tipo} {self.hash_contenido[:12]} ({estado})"
+
 
 def parametro_remuneracional_path(instance, filename):
+    ext = filename.split(".")[-1]
     anio = instance.anio
-    return f"DIRNAC/PR/parametro_remuneracional_{anio}.csv"
+    return f"DIRNAC/PR/parametro_remuneracional_{anio}.{ext}"
 
 
 class ParametroRemuneracional(models.Model):
@@ -59,3 +117,216 @@ class ParametroRemuneracional(models.Model):
 
     def __str__(self):
         return f"Parámetro Remuneracional {self.anio}"
+
+
+def trabajo_resultado_path(instance, filename):
+    return f"trabajos/{instance.tipo}/{instance.id}/{filename}"
+
+
+class Trabajo(models.Model):
+    TIPOS = [
+        ("homologacion", "Cálculo de Homologación"),
+        ("homologacion_nacional", "Cálculo de Homologación Nacional"),
+        ("consolidacion", "Consolidación de Archivos"),
+    ]
+    ESTADOS = [
+        ("pendiente", "Pendiente"),
+        ("en_proceso", "En proceso"),
+        ("terminado", "Terminado"),
+        ("error", "Error"),
+    ]
+    ESTADOS_ACTIVOS = ("pendiente", "en_proceso")
+
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    tipo = models.CharField(max_length=30, choices=TIPOS)
+    region = models.IntegerField()
+    anio = models.IntegerField()
+    mes = models.IntegerField()
+    parametros = models.JSONField(default=dict, blank=True)
+    # Identifica trabajos equivalentes para no encolarlos dos veces
+    clave = models.CharField(max_length=100, db_index=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default="pendiente")
+    mensaje = models.TextField(blank=True)
+    archivo = models.FileField(upload_to=trabajo_resultado_path, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-creado"]
+        indexes = [models.Index(fields=["estado", "creado"])]
+        constraints = [
+            # A lo más un trabajo pendiente o en proceso por clave
+            models.UniqueConstraint(
+                fields=["clave"],
+                condition=models.Q(estado__in=["pendiente", "en_proceso"]),
+                name="trabajo_activo_unico_por_clave",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.mes}/{self.anio} región {self.region}"
+
+    @property
+    def activo(self):
+        return self.estado in self.ESTADOS_ACTIVOS
+
+
+def resultado_homologacion_path(instance, filename):
+    return f"cache/homologacion/region_{instance.region}/{filename}"
+
+
+class ResultadoHomologacion(models.Model):
+    """
+    Resultado ya calculado de una homologación. La clave resume todas sus
+    entradas, así un cambio en ellas nunca reutiliza un resultado antiguo.
+    """
+
+    region = models.IntegerField()
+    anio = models.IntegerField()
+    mes = models.IntegerField()
+    anio_parametro = models.IntegerField()
+    clave = models.CharField(max_length=64, unique=True)
+    archivo = models.FileField(upload_to=resultado_homologacion_path)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["region", "anio", "mes"])]
+
+    def __str__(self):
+        return f"Homologación {self.mes}/{self.anio} región {self.region}"
+
+
+def errores_validacion_path(instance, filename):
+    return f"errores_validacion/usuario_{instance.usuario_id}/{filename}"
+
+
+class ErroresValidacion(models.Model):
+    """
+    Errores de la última planilla rechazada de un usuario: el resumen por
+    columna y tipo de error, y el reporte completo en Parquet.
+    """
+
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    region = models.IntegerField()
+    anio = models.IntegerField()
+    mes = models.IntegerField()
+    nombre_archivo = models.CharField(max_length=255)
+    total = models.IntegerField()
+    # [{"columna", "codigo", "descripcion", "total", "guardadas"}]
+    resumen = models.JSONField(default=list, blank=True)
+    generales = models.JSONField(default=list, blank=True)
+    archivo = models.FileField(upload_to=errores_validacion_path)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-creado"]
+
+    def __str__(self):
+        return f"Errores de {self.nombre_archivo} ({self.mes}/{self.anio})"
+
+
+class MedicionEjecucion(models.Model):
+    """
+    Una ejecución medida (cálculo, validación o exportación) con el tiempo
+    total; el detalle por etapa está en MedicionEtapa.
+    """
+
+    proceso = models.CharField(max_length=50)
+    region = models.IntegerField(null=True, blank=True)
+    anio = models.IntegerField(null=True, blank=True)
+    mes = models.IntegerField(null=True, blank=True)
+    inicio = models.DateTimeField()
+    segundos = models.FloatField()
+    rss_max_mb = models.FloatField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-inicio"]
+        indexes = [models.Index(fields=["proceso", "inicio"])]
+        verbose_name = "medición de ejecución"
+        verbose_name_plural = "mediciones de ejecuciones"
+
+    def __str__(self):
+        return f"{self.proceso} {self.inicio:%Y-%m-%d %H:%M} ({self.segundos:.2f}s)"
+
+
+class MedicionEtapa(models.Model):
+    ejecucion = models.ForeignKey(
+        MedicionEjecucion, on_delete=models.CASCADE, related_name="etapas"
+    )
+    etapa = models.CharField(max_length=50)
+    orden = models.IntegerField()
+    # Veces que se ejecutó en la corrida (p. ej. una por bloque de filas)
+    veces = models.IntegerField(default=1)
+    segundos = models.FloatField()
+    filas_entrada = models.BigIntegerField(null=True, blank=True)
+    filas_salida = models.BigIntegerField(null=True, blank=True)
+    memoria_pico_mb = models.FloatField(null=True, blank=True)
+    rss_max_mb = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["ejecucion", "orden"]
+
+    def __str__(self):
+        return f"{self.etapa} ({self.segundos:.3f}s)"
+
+
+class RemuneracionMensual(models.Model):
+    """
+    Una fila por (CODIGO_ESTABLECIMIENTO, RUT) de cada planilla aceptada, con
+    los montos de la remuneración del mes. Se carga al subir la planilla y se
+    borra con ella; permite consultar varios meses sin leer los archivos.
+    """
+
+    archivo = models.ForeignKey(
+        ArchivoSubido, on_delete=models.CASCADE, related_name="remuneraciones"
+    )
+    region = models.IntegerField()
+    anio = models.IntegerField()
+    mes = models.IntegerField()
+    codigo_establecimiento = models.BigIntegerField()
+    rut = models.CharField(max_length=20)
+    remuneraciones_incluye_bonos_y_asignaciones_pactadas = models.FloatField(null=True, blank=True)
+    movilizacion_mas_colacion = models.FloatField(null=True, blank=True)
+    asignacion_mensual_solicitada_de_cd = models.FloatField(null=True, blank=True)
+    sueldo_base = models.FloatField(null=True, blank=True)
+    horas_extras = models.FloatField(null=True, blank=True)
+    antiguedad_bienios = models.FloatField(null=True, blank=True)
+    incentivo = models.FloatField(null=True, blank=True)
+    asignacion_responsabilidad = models.FloatField(null=True, blank=True)
+    reliquidaciones = models.FloatField(null=True, blank=True)
+    incrementos_junji = models.FloatField(null=True, blank=True)
+    aguinaldo = models.FloatField(null=True, blank=True)
+    asignacion_zona_extrema = models.FloatField(null=True, blank=True)
+    bono = models.FloatField(null=True, blank=True)
+    otros_ajustes = models.FloatField(null=True, blank=True)
+    bono_vacaciones_fiscal = models.FloatField(null=True, blank=True)
+    bono_termino_conflicto_fiscal = models.FloatField(null=True, blank=True)
+    aguinaldo_2 = models.FloatField(null=True, blank=True)
+    bono_escolar = models.FloatField(null=True, blank=True)
+    movilizacion = models.FloatField(null=True, blank=True)
+    bono_2 = models.FloatField(null=True, blank=True)
+    colacion = models.FloatField(null=True, blank=True)
+    asignaciones_familiares = models.FloatField(null=True, blank=True)
+    asignacion_ley_20905 = models.FloatField(null=True, blank=True)
+    otros_ajustes_2 = models.FloatField(null=True, blank=True)
+    asignacion_carrera_docente_pagada = models.FloatField(null=True, blank=True)
+    sueldo_bruto_o_total_haberes = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["region", "anio", "mes"]),
+            models.Index(fields=["rut"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["archivo", "codigo_establecimiento", "rut"],
+                name="remuneracion_unica_por_archivo",
+            )
+        ]
+        verbose_name = "remuneración mensual"
+        verbose_name_plural = "remuneraciones mensuales"
+
+    def __str__(self):
+        return f"{self.rut} {self.mes}/{self.anio} ({self.codigo_establecimiento})"
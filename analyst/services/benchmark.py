@@ -0,0 +1,198 @@
+import io
+import json
+import math
+import os
+import platform
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from django.utils import timezone
+
+from analyst.df_utils.almacenamiento import dataframe_a_parquet
+from analyst.df_utils.calculos import compilar_parametros
+from analyst.df_utils.consolidar import COLUMNA_SUELDO, consolidar_sueldos
+from analyst.df_utils.esquema import aplicar_esquema
+from analyst.df_utils.exportacion import escribir_excel
+from analyst.df_utils.sintetico import generar_parametros, generar_planilla
+from analyst.services.planilla_validadora import PlanillaValidadora
+from analyst.views.helpers import calcular_homologacion
+
+TAMANOS = (1_000, 10_000, 100_000, 1_000_000)
+ETAPAS = ("validar", "consolidar_sueldos", "calcular_homologacion", "exportar_xlsx")
+
+# Periodo de referencia: el semestre anterior va de julio a diciembre de 2024
+ANIO, MES = 2025, 2
+MESES_SEMESTRE = [(2024, m) for m in range(7, 13)] + [(2025, 1), (2025, 2)]
+
+# Una etapa que crece más que n^1.3 entre dos tamaños se reporta como no
+# lineal (n·log n y los efectos de caché quedan bajo ese límite)
+MAX_EXPONENTE = 1.3
+# Tiempo sobre la línea base (en proporción) que se considera regresión
+TOLERANCIA = 0.25
+# Bajo este tiempo las diferencias son ruido y no se comparan
+MIN_SEGUNDOS = 0.05
+
+
+def _datos(filas: int, semilla: int):
+    """
+    Planilla del mes de referencia (tipada como queda guardada tras subirla)
+    y los sueldos del semestre para consolidar.
+    """
+    planilla = generar_planilla(filas, ANIO, MES, semilla=semilla)
+    guardada = aplicar_esquema(
+        pd.read_parquet(
+            io.BytesIO(dataframe_a_parquet(planilla, "planilla_validadora"))
+        ),
+        "planilla_validadora",
+    )
+
+    rng = np.random.default_rng(semilla)
+    claves = guardada[["CODIGO_ESTABLECIMIENTO", "RUT"]]
+    semestre = pd.concat(
+        [
+            claves.assign(
+                ANIO=anio,
+                MES=mes,
+                **{COLUMNA_SUELDO: rng.integers(450_000, 1_500_000, filas)},
+            )
+            for anio, mes in MESES_SEMESTRE
+        ],
+        ignore_index=True,
+    )
+    return planilla, guardada, semestre
+
+
+def _medir(funcion, repeticiones: int):
+    """
+    Mejor tiempo de `repeticiones` ejecuciones y el resultado de la última.
+    """
+    mejor = math.inf
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def medir_tamano(filas: int, repeticiones: int = 1, semilla: int = 0) -> dict:
+    """
+    Segundos de cada etapa para planillas de `filas` filas.
+    """
+    planilla, guardada, semestre = _datos(filas, semilla)
+    tabla_param = compilar_parametros(generar_parametros())
+    tiempos = {}
+
+    tiempos["validar"], _ = _medir(
+        lambda: PlanillaValidadora("planilla_validadora").validar(
+            planilla.copy(), ANIO, MES
+        ),
+        repeticiones,
+    )
+    tiempos["consolidar_sueldos"], df_sueldos = _medir(
+        lambda: consolidar_sueldos(semestre), repeticiones
+    )
+    tiempos["calcular_homologacion"], resultado = _medir(
+        lambda: calcular_homologacion(
+            guardada, ANIO, MES, df_sueldos=df_sueldos, tabla_param=tabla_param
+        ),
+        repeticiones,
+    )
+
+    def exportar():
+        with tempfile.TemporaryFile() as destino:
+            escribir_excel(destino, {"Consolidado": resultado})
+
+    tiempos["exportar_xlsx"], _ = _medir(exportar, repeticiones)
+    return {etapa: round(segundos, 4) for etapa, segundos in tiempos.items()}
+
+
+def exponentes_escalamiento(resultados: dict) -> dict:
+    """
+    Exponente k de tiempo ∝ n^k entre cada par de tamaños consecutivos, por
+    etapa. Cerca de 1 es lineal.
+    """
+    tamanos = sorted(int(n) for n in resultados)
+    exponentes = {}
+    for etapa in ETAPAS:
+        tramos = {}
+        for menor, mayor in zip(tamanos, tamanos[1:]):
+            t_menor = resultados[str(menor)][etapa]
+            t_mayor = resultados[str(mayor)][etapa]
+            if t_menor < MIN_SEGUNDOS:
+                continue
+            tramos[f"{menor}-{mayor}"] = round(
+                math.log(t_mayor / t_menor) / math.log(mayor / menor), 3
+            )
+        exponentes[etapa] = tramos
+    return exponentes
+
+
+def ejecutar_benchmark(tamanos=TAMANOS, repeticiones: int = 1, semilla: int = 0) -> dict:
+    resultados = {}
+    for filas in sorted(tamanos):
+        resultados[str(filas)] = medir_tamano(filas, repeticiones, semilla)
+
+    return {
+        "fecha": timezone.now().isoformat(),
+        "entorno": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "procesador": platform.processor() or platform.machine(),
+            "nucleos": os.cpu_count(),
+        },
+        "repeticiones": repeticiones,
+        "segundos": resultados,
+        "escalamiento": exponentes_escalamiento(resultados),
+    }
+
+
+def comparar_con_linea_base(
+    actual: dict, base: dict, tolerancia: float = TOLERANCIA
+) -> list:
+    """
+    Problemas del benchmark actual: etapas más lentas que la línea base (en
+    los tamaños medidos en ambos) y tramos con escalamiento no lineal.
+
+    Returns:
+        list: mensajes, vacía si no hay problemas
+    """
+    problemas = []
+    for filas, etapas in actual["segundos"].items():
+        etapas_base = (base or {}).get("segundos", {}).get(filas, {})
+        for etapa, segundos in etapas.items():
+            anterior = etapas_base.get(etapa)
+            if anterior is None or max(segundos, anterior) < MIN_SEGUNDOS:
+                continue
+            if segundos > anterior * (1 + tolerancia):
+                problemas.append(
+                    f"{etapa} con {filas} filas: {segundos:.3f}s "
+                    f"(línea base {anterior:.3f}s, +{segundos / anterior - 1:.0%})"
+                )
+
+    for etapa, tramos in actual["escalamiento"].items():
+        for tramo, exponente in tramos.items():
+            if exponente > MAX_EXPONENTE:
+                problemas.append(
+                    f"{etapa} escala como n^{exponente} entre {tramo} filas"
+                )
+    return problemas
+
+
+def leer_linea_base(ruta: str):
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def guardar_linea_base(resultado: dict, ruta: str):
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+        f.write("\n")
@@ -0,0 +1,132 @@
+import hashlib
+import json
+
+from django.core.files import File
+from django.db.models import Q
+
+from analyst.df_utils.calculos import anio_parametro
+from analyst.models import ParametroRemuneracional, ResultadoHomologacion
+
+# Subir cuando cambie la lógica de calcular_homologacion, para no servir
+# resultados calculados con la versión anterior.
+VERSION_CALCULO = 2
+
+
+def hash_archivo(archivo, tamano_bloque: int = 1024 * 1024) -> str:
+    """
+    SHA-256 del contenido de un archivo abierto o de un FieldFile. Deja el
+    archivo posicionado al inicio.
+    """
+    sha = hashlib.sha256()
+    archivo.seek(0)
+    for bloque in iter(lambda: archivo.read(tamano_bloque), b""):
+        sha.update(bloque)
+    archivo.seek(0)
+    return sha.hexdigest()
+
+
+def hash_archivo_subido(archivo_subido) -> str:
+    """
+    Hash del archivo guardado de un ArchivoSubido. Para archivos subidos
+    antes de registrar el hash, se calcula una vez y se guarda.
+    """
+    if not archivo_subido.hash_contenido:
+        with archivo_subido.archivo.open("rb") as f:
+            archivo_subido.hash_contenido = hash_archivo(f)
+        archivo_subido.save(update_fields=["hash_contenido"])
+    return archivo_subido.hash_contenido
+
+
+class CacheHomologacion:
+    """
+    Caché persistente de resultados de calcular_homologacion. La clave se
+    arma con la región, el periodo, el hash de cada archivo usado y la
+    versión del parámetro remuneracional.
+    """
+
+    @staticmethod
+    def version_parametro(anio: int):
+        parametro = ParametroRemuneracional.objects.filter(anio=anio).first()
+        if parametro is None:
+            return None
+        return f"{parametro.pk}:{parametro.creado.isoformat()}"
+
+    @classmethod
+    def clave(cls, region: int, anio: int, mes: int, archivos):
+        """
+        Clave del resultado para esos archivos, o None si falta el parámetro
+        remuneracional (el cálculo fallaría y no hay nada que guardar).
+        """
+        version = cls.version_parametro(anio_parametro(anio, mes))
+        if version is None:
+            return None
+
+        material = {
+            "version_calculo": VERSION_CALCULO,
+            "region": region,
+            "anio": anio,
+            "mes": mes,
+            "parametro": version,
+            "archivos": [
+                [a.anio, a.mes, hash_archivo_subido(a)]
+                for a in archivos.order_by("anio", "mes", "id")
+            ],
+        }
+        texto = json.dumps(material, sort_keys=True)
+        return hashlib.sha256(texto.encode()).hexdigest()
+
+    @staticmethod
+    def obtener(clave):
+        if clave is None:
+            return None
+        resultado = ResultadoHomologacion.objects.filter(clave=clave).first()
+        if resultado is None:
+            return None
+        if not resultado.archivo.storage.exists(resultado.archivo.name):
+            resultado.delete()
+            return None
+        return resultado
+
+    @classmethod
+    def guardar(cls, clave, region: int, anio: int, mes: int, contenido):
+        """
+        Guarda el resultado (archivo Parquet abierto) bajo la clave.
+        """
+        if clave is None:
+            return None
+        existente = cls.obtener(clave)
+        if existente is not None:
+            return existente
+
+        resultado = ResultadoHomologacion(
+            region=region,
+            anio=anio,
+            mes=mes,
+            anio_parametro=anio_parametro(anio, mes),
+            clave=clave,
+        )
+        resultado.archivo.save(f"{clave}.parquet", File(contenido), save=True)
+        return resultado
+
+    @staticmethod
+    def _eliminar(resultados):
+        for resultado in resultados:
+            if resultado.archivo:
+                resultado.archivo.delete(save=False)
+            resultado.delete()
+
+    @classmethod
+    def invalidar_archivo(cls, region: int, anio: int, mes: int):
+        """
+        Elimina los resultados de la región que usan el archivo de anio/mes:
+        los del mismo año desde ese mes y, si es del segundo semestre, los del
+        primer semestre del año siguiente.
+        """
+        filtro = Q(anio=anio, mes__gte=mes)
+        if mes >= 7:
+            filtro |= Q(anio=anio + 1, mes__lte=6)
+        cls._eliminar(ResultadoHomologacion.objects.filter(filtro, region=region))
+
+    @classmethod
+    def invalidar_parametro(cls, anio: int):
+        cls._eliminar(ResultadoHomologacion.objects.filter(anio_parametro=anio))
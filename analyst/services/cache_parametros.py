@@ -0,0 +1,57 @@
+import os
+import threading
+
+from analyst.df_utils.calculos import (
+    TablaParametros,
+    compilar_parametros,
+    leer_parametro_remuneracional,
+)
+from analyst.models import ParametroRemuneracional
+
+
+class CacheParametros:
+    """
+    Parámetros remuneracionales compilados, compartidos por todo el proceso.
+    Cada año se lee y compila una vez; se vuelve a leer si cambia el registro
+    o la fecha de modificación del archivo.
+    """
+
+    _tablas = {}  # anio -> (firma, TablaParametros)
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _firma(parametro: ParametroRemuneracional):
+        return (
+            parametro.pk,
+            parametro.archivo.name,
+            os.path.getmtime(parametro.archivo.path),
+        )
+
+    @classmethod
+    def obtener(cls, anio: int) -> TablaParametros:
+        parametro = ParametroRemuneracional.objects.filter(anio=anio).first()
+        if parametro is None:
+            raise ValueError(f"No existe parámetro remuneracional para el año {anio}")
+
+        firma = cls._firma(parametro)
+        en_cache = cls._tablas.get(anio)
+        if en_cache is not None and en_cache[0] == firma:
+            return en_cache[1]
+
+        with cls._lock:
+            en_cache = cls._tablas.get(anio)
+            if en_cache is not None and en_cache[0] == firma:
+                return en_cache[1]
+
+            df_param = leer_parametro_remuneracional(parametro)
+            tabla = compilar_parametros(df_param)
+            cls._tablas[anio] = (firma, tabla)
+            return tabla
+
+    @classmethod
+    def invalidar(cls, anio: int = None):
+        with cls._lock:
+            if anio is None:
+                cls._tablas.clear()
+            else:
+                cls._tablas.pop(anio, None)
@@ -0,0 +1,172 @@
+import hashlib
+import io
+import json
+
+import pandas as pd
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+
+from analyst.constants.validaciones_config import (
+    COLUMNS_ALLOW_EMPTY,
+    VALID_COLUMNS,
+    VALID_RANGES,
+    VALID_TYPES,
+    VALID_VALUES,
+)
+from analyst.df_utils.exportacion import resultado_a_parquet
+from analyst.models import ArchivoSubido, ValidacionPlanilla
+from analyst.services.cache_homologacion import hash_archivo
+from analyst.services.errores_validacion import RegistroErrores
+from analyst.views.helpers import validar_planilla_por_bloques
+
+# Subir cuando cambie la lógica de PlanillaValidadora o de la escritura del
+# Parquet, para no reutilizar veredictos de la versión anterior.
+VERSION_VALIDACION = 1
+
+
+def version_reglas(tipo: str) -> str:
+    """
+    Hash de todo lo que decide el resultado de validar una planilla: las
+    reglas de validaciones_config, la configuración de la validación y
+    VERSION_VALIDACION.
+    """
+    material = {
+        "version": VERSION_VALIDACION,
+        "columnas": VALID_COLUMNS.get(tipo),
+        "tipos": VALID_TYPES.get(tipo),
+        "rangos": VALID_RANGES.get(tipo),
+        "valores": VALID_VALUES.get(tipo),
+        "vacias": COLUMNS_ALLOW_EMPTY.get(tipo),
+        "falla_rapida": settings.VALIDACION_FALLA_RAPIDA,
+        "max_errores": settings.VALIDACION_MAX_ERRORES,
+        "max_errores_columna": settings.VALIDACION_MAX_ERRORES_COLUMNA,
+        "max_proporcion_filas": settings.VALIDACION_MAX_PROPORCION_FILAS,
+        "filas_por_bloque": settings.PLANILLA_FILAS_POR_BLOQUE,
+    }
+    texto = json.dumps(material, sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+class CacheValidacion:
+    """
+    Caché persistente de validaciones de planillas por (tipo, hash del
+    contenido, versión de las reglas). Las planillas válidas guardan su
+    Parquet tipado una sola vez, con un nombre derivado del contenido, y
+    las cargas del mismo archivo lo comparten.
+    """
+
+    @staticmethod
+    def obtener(tipo: str, hash_contenido: str, version: str):
+        validacion = ValidacionPlanilla.objects.filter(
+            tipo=tipo, hash_contenido=hash_contenido, version_reglas=version
+        ).first()
+        if validacion is None:
+            return None
+        if not validacion.archivo.storage.exists(validacion.archivo.name):
+            validacion.delete()
+            return None
+        validacion.save(update_fields=["usado"])
+        return validacion
+
+    @classmethod
+    def validar(cls, archivo, tipo: str, hash_contenido: str = None):
+        """
+        Valida la planilla o, si ese mismo contenido ya se validó con las
+        reglas vigentes, entrega el resultado guardado.
+
+        Args:
+            archivo: archivo subido
+            tipo (str): tipo de planilla (ver VALID_COLUMNS)
+            hash_contenido (str, opcional): SHA-256 del archivo, si ya se
+                calculó al recibirlo
+
+        Returns:
+            tuple: (ValidacionPlanilla, RegistroErrores o None si es válida,
+                True si el resultado se reutilizó)
+        """
+        if hash_contenido is None:
+            hash_contenido = hash_archivo(archivo)
+        version = version_reglas(tipo)
+
+        validacion = cls.obtener(tipo, hash_contenido, version)
+        if validacion is not None:
+            return validacion, cls._errores(validacion), True
+
+        valido, temporal_o_errores, resumen = validar_planilla_por_bloques(archivo, tipo)
+        validacion = ValidacionPlanilla(
+            tipo=tipo,
+            hash_contenido=hash_contenido,
+            version_reglas=version,
+            valido=valido,
+        )
+        if valido:
+            with temporal_o_errores:
+                validacion.hash_resultado = hash_archivo(temporal_o_errores)
+                validacion.resumen = {
+                    "filas": resumen.filas,
+                    "filas_eliminadas": resumen.filas_eliminadas,
+                    "establecimientos_distintos": resumen.establecimientos_distintos,
+                    "rut_distintos": resumen.rut_distintos,
+                    "cantidad_ruts_repetidos": resumen.cantidad_ruts_repetidos,
+                }
+                validacion = cls._guardar(
+                    validacion, "planilla.parquet", File(temporal_o_errores)
+                )
+            return validacion, None, False
+
+        errores = temporal_o_errores
+        validacion.resumen = {
+            "errores": errores.resumen(),
+            "generales": errores.generales,
+            "detenida": errores.detenida,
+            "total": len(errores),
+        }
+        contenido = io.BytesIO()
+        resultado_a_parquet(errores.a_dataframe(), contenido)
+        validacion = cls._guardar(
+            validacion, "errores.parquet", ContentFile(contenido.getvalue())
+        )
+        return validacion, errores, False
+
+    @staticmethod
+    def _guardar(validacion: ValidacionPlanilla, nombre: str, contenido):
+        validacion.archivo.save(nombre, contenido, save=False)
+        try:
+            with transaction.atomic():
+                validacion.save()
+        except IntegrityError:
+            # Otra carga del mismo archivo terminó antes: se usa la suya
+            validacion.archivo.delete(save=False)
+            return ValidacionPlanilla.objects.get(
+                tipo=validacion.tipo,
+                hash_contenido=validacion.hash_contenido,
+                version_reglas=validacion.version_reglas,
+            )
+        return validacion
+
+    @staticmethod
+    def _errores(validacion: ValidacionPlanilla):
+        if validacion.valido:
+            return None
+        with validacion.archivo.open("rb") as f:
+            df = pd.read_parquet(f)
+        resumen = validacion.resumen
+        return RegistroErrores.desde_reporte(
+            df, resumen["errores"], resumen["generales"], resumen["detenida"]
+        )
+
+    @staticmethod
+    def en_uso(nombre: str, excluir_id: int = None) -> bool:
+        """
+        Si el archivo guardado lo usa una validación o alguna carga distinta
+        de `excluir_id` (y por lo tanto no se debe borrar).
+        """
+        cargas = ArchivoSubido.objects.filter(archivo=nombre)
+        if excluir_id is not None:
+            cargas = cargas.exclude(id=excluir_id)
+        return (
+            cargas.exists()
+            or ValidacionPlanilla.objects.filter(archivo=nombre).exists()
+        )
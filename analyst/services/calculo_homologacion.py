@@ -1,5 +1,8 @@
 import pandas as pd
 
+from analyst.df_utils.agregar_columnas.region import decodificar_region
+from analyst.df_utils.fechas import parsear_fechas
+
 
 class CalculoHomologacion:
     def __init__(
@@ -37,43 +40,27 @@ class CalculoHomologacion:
         self.df_base.at[idx, "LOG_ERRORES"] += mensaje
 
     def agregar_columna_region(self):
-        for idx, row in self.df_base.iterrows():
-            try:
-                codigo = str(row["CODIGO_ESTABLECIMIENTO"]).strip()
-
-                if not codigo.isdigit():
-                    raise ValueError(f"Código no numérico: {codigo}")
-
-                if len(codigo) == 7:
-                    region = int(codigo[0])  # Primer dígito
-                elif len(codigo) == 8:
-                    region = int(codigo[:2])  # Primeros dos dígitos
-                else:
-                    raise ValueError(f"Longitud inválida: {codigo}")
+        regiones, errores = decodificar_region(self.df_base["CODIGO_ESTABLECIMIENTO"])
+        self.df_base["REGION"] = regiones
 
-                self.df_base.at[idx, "REGION"] = region
-
-            except Exception as e:
-                self._log(idx, f"Error calculando región; {e}")
+        self.df_base["TIENE_ERRORES"] |= regiones.isna()
+        self.df_base["LOG_ERRORES"] += errores
 
     def agregar_fecha(self):
         self.df_base["FECHA"] = self.fecha_referencia
 
     def agregar_antiguedad_dias(self):
-        for idx, row in self.df_base.iterrows():
-            if self.df_base.at[idx, "TIENE_ERRORES"]:
-                continue
-            try:
-                fecha_contrato = pd.to_datetime(
-                    row["FECHA_ESTABLECIDA_CONTRATO"], errors="coerce"
-                )
-                if pd.isna(fecha_contrato):
-                    self._log(idx, "FECHA_ESTABLECIDA_CONTRATO inválida;")
-                    continue
-                dias = (self.fecha_referencia - fecha_contrato).days
-                self.df_base.at[idx, "ANTIGUEDAD_DIAS"] = dias
-            except Exception:
-                self._log(idx, "Error calculando antigüedad;")
+        pendientes = ~self.df_base["TIENE_ERRORES"].astype(bool)
+        fechas = parsear_fechas(self.df_base["FECHA_ESTABLECIDA_CONTRATO"])
+        invalidas = pendientes & fechas.isna()
+
+        dias = (self.fecha_referencia - fechas).dt.days.astype(float)
+        self.df_base["ANTIGUEDAD_DIAS"] = dias.where(pendientes & ~invalidas)
+        self.df_base["TIENE_ERRORES"] |= invalidas
+        self.df_base["LOG_ERRORES"] = self.df_base["LOG_ERRORES"].mask(
+            invalidas,
+            self.df_base["LOG_ERRORES"] + "FECHA_ESTABLECIDA_CONTRATO inválida;",
+        )
 
     def execute(self):
         """Ejecuta todos los cálculos y devuelve el DataFrame final."""
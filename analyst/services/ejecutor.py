@@ -0,0 +1,55 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+_ejecutor = None
+_lock_ejecutor = threading.Lock()
+
+
+def ejecutor() -> ThreadPoolExecutor:
+    """
+    Hilos para el trabajo pesado de las vistas async (validar planillas,
+    exportar resultados): a lo más EJECUTOR_HILOS tareas a la vez por
+    proceso; las demás esperan su turno sin ocupar el ciclo de eventos.
+    """
+    global _ejecutor
+    if _ejecutor is None:
+        # Dos solicitudes que llegan a la vez no deben crear dos ejecutores
+        with _lock_ejecutor:
+            if _ejecutor is None:
+                _ejecutor = ThreadPoolExecutor(
+                    max_workers=settings.EJECUTOR_HILOS, thread_name_prefix="ejecutor"
+                )
+    return _ejecutor
+
+
+def _ejecutar(funcion, *args, **kwargs):
+    try:
+        return funcion(*args, **kwargs)
+    finally:
+        # Django cierra las conexiones al terminar el request, pero solo las
+        # del hilo que lo atiende
+        close_old_connections()
+
+
+async def en_ejecutor(funcion, *args, **kwargs):
+    """
+    Ejecuta `funcion` (síncrona: pandas, ORM, archivos) en el ejecutor
+    acotado y espera su resultado sin bloquear el ciclo de eventos.
+    """
+    tarea = sync_to_async(_ejecutar, thread_sensitive=False, executor=ejecutor())
+    return await tarea(funcion, *args, **kwargs)
+
+
+async def iterar_en_ejecutor(iterable):
+    """
+    Recorre un iterable síncrono (p. ej. un CSV generado por bloques)
+    pidiendo cada elemento en el ejecutor.
+    """
+    iterador = iter(iterable)
+    fin = object()
+    while (elemento := await en_ejecutor(next, iterador, fin)) is not fin:
+        yield elemento
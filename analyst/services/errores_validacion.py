@@ -0,0 +1,292 @@
+import io
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils.html import escape
+
+from analyst.df_utils.exportacion import resultado_a_parquet
+from analyst.models import ErroresValidacion
+
+# Código de error → (descripción, mensaje de una celda; {valor} es el valor
+# de la celda)
+CODIGOS_ERROR = {
+    "vacio": ("Vacío no permitido", "vacío no permitido."),
+    "no_numerico": ("No es numérico", "'{valor}' no es numérico."),
+    "no_fecha": ("No es fecha válida", "'{valor}' no es fecha válida."),
+    "no_texto": ("No es texto", "no es texto."),
+    "fuera_de_rango": ("Valor fuera de rango", "valor {valor} fuera de rango."),
+    "fecha_fuera_de_rango": ("Fecha fuera de rango", "fecha fuera de rango."),
+    "no_permitido": ("Valor no permitido", "'{valor}' no permitido."),
+    "rut_invalido": ("RUT no válido", "'{valor}' no es un RUT válido."),
+}
+
+# Código del error de tipo según VALID_TYPES
+CODIGO_TIPO = {"numerico": "no_numerico", "fecha": "no_fecha", "texto": "no_texto"}
+
+COLUMNAS_REPORTE = ["FILA", "COLUMNA", "CODIGO", "ERROR", "VALOR"]
+
+
+class RegistroErrores:
+    """
+    Errores de validación de una planilla. Los mensajes generales (columnas
+    faltantes, periodo, lectura) se guardan como texto; los errores de celda,
+    como arreglos con los números de fila (y los valores) de cada par
+    (columna, código de error), sin armar un mensaje por celda.
+
+    De cada par se guardan a lo más `max_filas` filas; las demás solo se
+    cuentan.
+    """
+
+    def __init__(self, max_filas: int = None):
+        self.max_filas = (
+            settings.VALIDACION_MAX_ERRORES if max_filas is None else max_filas
+        )
+        self.generales = []
+        self.totales = {}  # (columna, código) → errores, en orden de aparición
+        # Motivo por el que la validación se detuvo antes de revisar todo el
+        # archivo (validación con falla rápida), o "" si lo revisó completo
+        self.detenida = ""
+        self._filas = defaultdict(list)
+        self._valores = defaultdict(list)
+        self._guardadas = Counter()
+        self._recientes = []
+
+    @classmethod
+    def desde_reporte(
+        cls, df: pd.DataFrame, resumen: list, generales: list, detenida: str = ""
+    ):
+        """
+        Rearma el registro desde el reporte de a_dataframe y el resumen
+        (resumen()) guardados, p. ej. para una planilla ya rechazada.
+        """
+        registro = cls()
+        registro.generales = list(generales)
+        registro.detenida = detenida
+        celdas = df[df["CODIGO"] != "general"]
+        grupos = dict(list(celdas.groupby(["COLUMNA", "CODIGO"], sort=False)))
+        for fila in resumen:
+            clave = (fila["columna"], fila["codigo"])
+            registro.totales[clave] = fila["total"]
+            registro._guardadas[clave] = fila["guardadas"]
+            grupo = grupos.get(clave)
+            if grupo is None:
+                continue
+            registro._filas[clave].append(grupo["FILA"].to_numpy(np.int64))
+            registro._valores[clave].append(grupo["VALOR"].to_numpy(object))
+        return registro
+
+    def __bool__(self):
+        return bool(self.generales or self.totales)
+
+    def __len__(self):
+        return len(self.generales) + sum(self.totales.values())
+
+    def agregar_general(self, mensaje: str):
+        self.generales.append(mensaje)
+
+    def agregar(self, columna: str, codigo: str, filas, valores=None):
+        """
+        Registra un error `codigo` en la columna para cada fila de `filas`
+        (números de fila del archivo), con el valor de cada celda si aplica.
+        """
+        filas = np.asarray(filas, dtype=np.int64)
+        if len(filas) == 0:
+            return
+        clave = (columna, codigo)
+        self.totales[clave] = self.totales.get(clave, 0) + len(filas)
+        self._recientes.append(filas)
+
+        cabe = self.max_filas - self._guardadas[clave]
+        if cabe <= 0:
+            return
+        self._filas[clave].append(filas[:cabe])
+        if valores is not None:
+            self._valores[clave].append(np.asarray(valores, dtype=object)[:cabe])
+        self._guardadas[clave] += min(cabe, len(filas))
+
+    def detener(self, motivo: str):
+        self.detenida = motivo
+        self.agregar_general(f"Validación detenida: {motivo}")
+
+    def filas_con_error_recientes(self) -> int:
+        """
+        Filas distintas con algún error de celda registradas desde la llamada
+        anterior (p. ej. las de un bloque). Reinicia la cuenta.
+        """
+        recientes, self._recientes = self._recientes, []
+        if not recientes:
+            return 0
+        return len(np.unique(np.concatenate(recientes)))
+
+    def errores_por_columna(self) -> Counter:
+        errores = Counter()
+        for (columna, _), total in self.totales.items():
+            errores[columna] += total
+        return errores
+
+    def filas(self, columna: str, codigo: str) -> np.ndarray:
+        tramos = self._filas.get((columna, codigo))
+        if not tramos:
+            return np.array([], dtype=np.int64)
+        return np.concatenate(tramos)
+
+    def valores(self, columna: str, codigo: str):
+        tramos = self._valores.get((columna, codigo))
+        if not tramos:
+            return None
+        return np.concatenate(tramos)
+
+    def resumen(self) -> list:
+        """
+        Una fila por (columna, código): descripción, errores y filas guardadas.
+        """
+        return [
+            {
+                "columna": columna,
+                "codigo": codigo,
+                "descripcion": CODIGOS_ERROR[codigo][0],
+                "total": total,
+                "guardadas": self._guardadas[(columna, codigo)],
+            }
+            for (columna, codigo), total in self.totales.items()
+        ]
+
+    def mensajes(self, columna: str, codigo: str, limite: int = None) -> list:
+        """
+        Mensajes de las primeras `limite` celdas con el error, como
+        "Fila 3, columna 'RUT': '1-2' no es un RUT válido."
+        """
+        filas = self.filas(columna, codigo)[:limite]
+        valores = self.valores(columna, codigo)
+        plantilla = CODIGOS_ERROR[codigo][1]
+        return [
+            f"Fila {fila}, columna '{columna}': "
+            + plantilla.format(valor=None if valores is None else valores[i])
+            for i, fila in enumerate(filas)
+        ]
+
+    def a_html(self, limite: int = None) -> list:
+        """
+        Resumen para la página de carga: por columna, cuántas filas tienen
+        cada error y los primeros `limite` casos.
+        """
+        limite = settings.VALIDACION_ERRORES_MOSTRAR if limite is None else limite
+        salida = []
+        if self.generales:
+            salida.append(
+                '<p class="font-semibold text-orange-600">ⓘ Errores en columna <code>Otros</code>:</p>'
+            )
+            for mensaje in self.generales:
+                salida.append(f'<p class="pl-4 text-sm text-gray-700">• {escape(mensaje)}</p>')
+
+        por_columna = defaultdict(list)
+        for fila in self.resumen():
+            por_columna[fila["columna"]].append(fila)
+
+        for columna, errores in por_columna.items():
+            salida.append(
+                f'<p class="font-semibold text-orange-600">ⓘ Errores en columna <code>{escape(columna)}</code>:</p>'
+            )
+            for error in errores:
+                salida.append(
+                    f'<p class="pl-4 text-sm font-medium text-gray-800">'
+                    f'{error["descripcion"]}: {error["total"]} fila(s)</p>'
+                )
+                for mensaje in self.mensajes(columna, error["codigo"], limite):
+                    salida.append(f'<p class="pl-8 text-sm text-gray-700">• {escape(mensaje)}</p>')
+                if error["total"] > limite:
+                    salida.append(
+                        f'<p class="pl-8 text-sm text-gray-500">… y {error["total"] - limite} más.</p>'
+                    )
+        return salida
+
+    def a_dataframe(self) -> pd.DataFrame:
+        """
+        Reporte completo (una fila por celda con error, ordenado por fila),
+        armado directo desde los arreglos. Los mensajes generales van al
+        inicio, sin número de fila.
+        """
+        partes = []
+        if self.generales:
+            partes.append(
+                pd.DataFrame(
+                    {
+                        "FILA": pd.array([None] * len(self.generales), dtype="Int64"),
+                        "COLUMNA": "",
+                        "CODIGO": "general",
+                        "ERROR": self.generales,
+                        "VALOR": None,
+                    }
+                )
+            )
+        for columna, codigo in self.totales:
+            filas = self.filas(columna, codigo)
+            if len(filas) == 0:
+                continue
+            valores = self.valores(columna, codigo)
+            if valores is not None:
+                valores = pd.Series(valores, dtype=object).astype(str)
+            partes.append(
+                pd.DataFrame(
+                    {
+                        "FILA": pd.array(filas, dtype="Int64"),
+                        "COLUMNA": columna,
+                        "CODIGO": codigo,
+                        "ERROR": CODIGOS_ERROR[codigo][0],
+                        "VALOR": valores,
+                    }
+                )
+            )
+        if not partes:
+            return pd.DataFrame(columns=COLUMNAS_REPORTE)
+
+        df = pd.concat(partes, ignore_index=True)[COLUMNAS_REPORTE]
+        return df.sort_values("FILA", kind="stable", na_position="first").reset_index(
+            drop=True
+        )
+
+
+def guardar_errores(registro: RegistroErrores, usuario, region, anio, mes, nombre_archivo):
+    """
+    Guarda los errores de una planilla rechazada para revisarlos y
+    descargarlos después. Se conservan solo los de la última planilla
+    rechazada de cada usuario.
+    """
+    for anterior in ErroresValidacion.objects.filter(usuario=usuario):
+        anterior.archivo.delete(save=False)
+        anterior.delete()
+
+    contenido = io.BytesIO()
+    resultado_a_parquet(registro.a_dataframe(), contenido)
+    errores = ErroresValidacion(
+        usuario=usuario,
+        region=region,
+        anio=anio,
+        mes=mes,
+        nombre_archivo=nombre_archivo[:255],
+        total=len(registro),
+        resumen=registro.resumen(),
+        generales=registro.generales,
+    )
+    errores.archivo.save(
+        "errores.parquet", ContentFile(contenido.getvalue()), save=True
+    )
+    return errores
+
+
+def leer_errores(errores: ErroresValidacion, columna: str, codigo: str) -> pd.DataFrame:
+    """
+    Filas guardadas de un par (columna, código), leyendo del Parquet solo
+    las que corresponden.
+    """
+    with errores.archivo.open("rb") as f:
+        tabla = pq.read_table(
+            f,
+            columns=["FILA", "VALOR"],
+            filters=[("COLUMNA", "==", columna), ("CODIGO", "==", codigo)],
+        )
+    return tabla.to_pandas()
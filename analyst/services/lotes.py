@@ -0,0 +1,232 @@
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import as_completed
+
+import pyarrow.parquet as pq
+from django.utils import timezone
+
+from analyst.df_utils.calculos import anio_parametro
+from analyst.df_utils.exportacion import exportar_parquet
+from analyst.models import ArchivoSubido
+from analyst.services.cache_parametros import CacheParametros
+from analyst.services.medicion import ejecucion_medida, etapa
+from analyst.services.trabajos import (
+    archivos_consolidacion,
+    archivos_semestre_anterior,
+    homologar_region,
+    leer_archivos,
+    pool_procesos,
+    preparar_remuneraciones,
+    resultado_temporal,
+    tabla_de_proceso,
+)
+
+
+def regiones_con_archivos(proceso: str = "planilla_validadora") -> list:
+    return sorted(
+        set(
+            ArchivoSubido.objects.filter(proceso=proceso)
+            .values_list("region", flat=True)
+            .distinct()
+        )
+    )
+
+
+def tareas_homologacion(regiones: list, anios: list, meses: list):
+    """
+    Una tarea por región, año y mes. Las que no tienen todos los meses del
+    semestre quedan omitidas, como en la vista.
+
+    Returns:
+        tuple: (tareas a ejecutar, tareas omitidas con su mensaje)
+    """
+    tareas = []
+    omitidas = []
+    for region in regiones:
+        for anio in anios:
+            for mes in meses:
+                archivos, meses_esperados, anio_referencia = (
+                    archivos_semestre_anterior(anio, mes, region)
+                )
+                tarea = {
+                    "tipo": "homologacion",
+                    "region": region,
+                    "anio": anio,
+                    "mes": mes,
+                    "nombre": f"CALCULO_HOMOLOGACION_{mes:02d}{anio_referencia}_region_{region}",
+                }
+                faltantes = meses_esperados - set(archivos.values_list("anio", "mes"))
+                if faltantes:
+                    faltantes_str = ", ".join(f"{m}/{a}" for a, m in sorted(faltantes))
+                    omitidas.append(
+                        {
+                            **tarea,
+                            "estado": "omitido",
+                            "mensaje": f"Faltan los meses: {faltantes_str}.",
+                        }
+                    )
+                else:
+                    tareas.append(tarea)
+    return tareas, omitidas
+
+
+def tareas_consolidacion(
+    regiones: list, anios: list, mes_inicio: int, mes_termino: int, proceso: str
+):
+    """
+    Una tarea por región y año; sin archivos en el rango quedan omitidas.
+
+    Returns:
+        tuple: (tareas a ejecutar, tareas omitidas con su mensaje)
+    """
+    tareas = []
+    omitidas = []
+    for region in regiones:
+        for anio in anios:
+            tarea = {
+                "tipo": "consolidacion",
+                "region": region,
+                "anio": anio,
+                "mes_inicio": mes_inicio,
+                "mes_termino": mes_termino,
+                "proceso": proceso,
+                "nombre": f"consolidado_{proceso}_{region}_{anio}_{mes_inicio:02d}_{mes_termino:02d}",
+            }
+            archivos = archivos_consolidacion(
+                anio, mes_inicio, mes_termino, region, proceso
+            )
+            if archivos.exists():
+                tareas.append(tarea)
+            else:
+                omitidas.append(
+                    {
+                        **tarea,
+                        "estado": "omitido",
+                        "mensaje": "No se encontraron archivos para esos filtros.",
+                    }
+                )
+    return tareas, omitidas
+
+
+def ejecutar_tarea(tarea: dict, salida: str, formato: str) -> dict:
+    """
+    Calcula una tarea del lote y escribe su resultado en `salida`. Corre
+    dentro de los procesos del pool, por eso no lanza excepciones: el error
+    queda en el resultado.
+    """
+    inicio = time.perf_counter()
+    resultado = {**tarea, "estado": "terminado", "mensaje": ""}
+    try:
+        with ejecucion_medida(
+            tarea["tipo"],
+            region=tarea["region"],
+            anio=tarea["anio"],
+            mes=tarea.get("mes", tarea.get("mes_termino")),
+        ):
+            resultado.update(_ejecutar_tarea(tarea, salida, formato))
+    except Exception as e:
+        resultado["estado"] = "error"
+        resultado["mensaje"] = str(e)
+    resultado["segundos"] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+def _ejecutar_tarea(tarea: dict, salida: str, formato: str) -> dict:
+    if tarea["tipo"] == "homologacion":
+        anio, mes = tarea["anio"], tarea["mes"]
+        contenido = homologar_region(
+            tarea["region"], anio, mes, tabla_de_proceso(anio, mes)
+        )
+    else:
+        archivos = archivos_consolidacion(
+            tarea["anio"],
+            tarea["mes_inicio"],
+            tarea["mes_termino"],
+            tarea["region"],
+            tarea["proceso"],
+        )
+        with etapa("leer_archivos") as e:
+            df = e.salida(leer_archivos(archivos))
+        contenido = resultado_temporal(df)
+
+    ruta = os.path.join(salida, f"{tarea['nombre']}.{formato}")
+    with contenido, etapa(f"exportar_{formato}"):
+        exportar_parquet(contenido, ruta, formato)
+        filas = pq.ParquetFile(contenido).metadata.num_rows
+    return {"archivo": ruta, "filas": filas}
+
+
+def _tablas_parametros(tareas: list) -> dict:
+    """
+    Tablas de parámetros de los periodos a homologar, compiladas una vez
+    para todos los procesos. Los años sin parámetro se omiten: sus tareas
+    fallarán con el mensaje de calcular_homologacion.
+    """
+    tablas = {}
+    anios = {
+        anio_parametro(t["anio"], t["mes"])
+        for t in tareas
+        if t["tipo"] == "homologacion"
+    }
+    for anio in anios:
+        try:
+            tablas[anio] = CacheParametros.obtener(anio)
+        except ValueError:
+            pass
+    return tablas
+
+
+def ejecutar_lote(
+    tareas: list, omitidas: list, salida: str, formato: str, workers: int
+) -> dict:
+    """
+    Ejecuta las tareas con hasta `workers` procesos y escribe
+    `resumen.json` en `salida` con el estado, las filas y el tiempo de cada
+    una.
+
+    Returns:
+        dict: el resumen escrito
+    """
+    os.makedirs(salida, exist_ok=True)
+    creado = timezone.now()
+    inicio = time.perf_counter()
+    workers = max(1, min(workers, len(tareas)))
+
+    resultados = []
+    if workers == 1:
+        for tarea in tareas:
+            resultados.append(ejecutar_tarea(tarea, salida, formato))
+    else:
+        # Una sola preparación por periodo, con todas sus regiones
+        regiones_por_periodo = {}
+        for tarea in tareas:
+            if tarea["tipo"] == "homologacion":
+                periodo = (tarea["anio"], tarea["mes"])
+                regiones_por_periodo.setdefault(periodo, []).append(tarea["region"])
+        for (anio, mes), regiones in regiones_por_periodo.items():
+            preparar_remuneraciones(anio, mes, regiones)
+        with pool_procesos(workers, _tablas_parametros(tareas)) as pool:
+            futuros = [
+                pool.submit(ejecutar_tarea, tarea, salida, formato)
+                for tarea in tareas
+            ]
+            for futuro in as_completed(futuros):
+                resultados.append(futuro.result())
+
+    resultados.sort(key=lambda r: r["nombre"])
+    resultados += omitidas
+
+    resumen = {
+        "inicio": creado.isoformat(),
+        "segundos": round(time.perf_counter() - inicio, 3),
+        "workers": workers,
+        "formato": formato,
+        "salida": os.path.abspath(salida),
+        "totales": dict(Counter(r["estado"] for r in resultados)),
+        "tareas": resultados,
+    }
+    with open(os.path.join(salida, "resumen.json"), "w", encoding="utf-8") as f:
+        json.dump(resumen, f, ensure_ascii=False, indent=2)
+    return resumen
@@ -0,0 +1,144 @@
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+
+from analyst.df_utils.consolidar import (
+    CLAVES_SUELDO,
+    matriz_sueldos,
+    nombre_columna_mes,
+    reemplazar_mes_matriz,
+    seleccionar_meses_matriz,
+)
+from analyst.models import ArchivoSubido
+from analyst.services.remuneraciones import (
+    cargar_remuneraciones_pendientes,
+    meses_enteros,
+    sueldos_remuneraciones,
+)
+
+
+class MatrizSueldos:
+    """
+    Matriz de sueldos (CODIGO_ESTABLECIMIENTO, RUT) × mes de una región,
+    guardada en Parquet y actualizada de a un mes al subir o eliminar
+    archivos, para no consultar y pivotear el semestre completo en cada
+    cálculo. Cada mes se arma desde RemuneracionMensual (una consulta por el
+    índice region, anio, mes), que sigue siendo la fuente de los datos.
+
+    Junto a la matriz se guardan, por mes, los archivos con que se armó (si
+    no coinciden con los actuales, el mes se recalcula antes de usarlo) y si
+    sus sueldos eran enteros.
+    """
+
+    def __init__(self, region: int):
+        self.region = region
+        self.ruta = os.path.join(
+            settings.MEDIA_ROOT, "matrices_sueldos", f"region_{region}.parquet"
+        )
+
+    @contextmanager
+    def _bloqueo(self):
+        # La web, el worker y los procesos del cálculo nacional pueden
+        # actualizar la misma región a la vez
+        os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        with open(f"{self.ruta}.lock", "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _meses_guardados(self) -> dict:
+        if not os.path.exists(self.ruta):
+            return {}
+        metadata = pq.read_schema(self.ruta).metadata or {}
+        return json.loads(metadata.get(b"meses", b"{}"))
+
+    def _leer(self, columnas: list = None) -> pd.DataFrame:
+        if not os.path.exists(self.ruta):
+            return pd.DataFrame(
+                index=pd.MultiIndex.from_arrays([[], []], names=CLAVES_SUELDO)
+            )
+        if columnas is not None:
+            disponibles = pq.read_schema(self.ruta).names
+            columnas = CLAVES_SUELDO + [c for c in columnas if c in disponibles]
+        tabla = pq.read_table(self.ruta, columns=columnas)
+        return tabla.to_pandas().set_index(CLAVES_SUELDO)
+
+    def _guardar(self, matriz: pd.DataFrame, meses: dict):
+        tabla = pa.Table.from_pandas(matriz.reset_index(), preserve_index=False)
+        tabla = tabla.replace_schema_metadata(
+            {**(tabla.schema.metadata or {}), b"meses": json.dumps(meses).encode()}
+        )
+        temporal = f"{self.ruta}.tmp"
+        pq.write_table(tabla, temporal)
+        os.replace(temporal, self.ruta)
+
+    def _archivos_mes(self, anio: int, mes: int):
+        return ArchivoSubido.objects.filter(
+            region=self.region,
+            anio=anio,
+            mes=mes,
+            proceso="planilla_validadora",
+        ).order_by("id")
+
+    def _recalcular_mes(self, matriz, meses, anio: int, mes: int):
+        columna = nombre_columna_mes(anio, mes)
+        archivos = self._archivos_mes(anio, mes)
+        ids = list(archivos.values_list("id", flat=True))
+        if not ids:
+            meses.pop(columna, None)
+            return reemplazar_mes_matriz(matriz, columna)
+
+        cargar_remuneraciones_pendientes(archivos)
+        df = sueldos_remuneraciones(self.region, archivos, [(anio, mes)])
+        sueldos = matriz_sueldos(df)[columna] if len(df) else None
+        meses[columna] = {"archivos": ids, "entero": columna in meses_enteros(df)}
+        return reemplazar_mes_matriz(matriz, columna, sueldos)
+
+    def actualizar_mes(self, anio: int, mes: int):
+        """
+        Agrega, reemplaza o quita (si ya no hay archivos) la columna del mes.
+        """
+        with self._bloqueo():
+            meses = self._meses_guardados()
+            matriz = self._recalcular_mes(self._leer(), meses, anio, mes)
+            self._guardar(matriz, meses)
+
+    def consolidar(self, archivos) -> pd.DataFrame:
+        """
+        Sueldos de los archivos con la misma forma que consolidar_sueldos:
+        una fila por (CODIGO_ESTABLECIMIENTO, RUT) y una columna ANIO_MES por
+        mes. Los meses cuya columna no corresponde a los archivos actuales se
+        recalculan y guardan antes.
+        """
+        esperados = {}
+        for anio, mes, id_archivo in archivos.order_by("id").values_list(
+            "anio", "mes", "id"
+        ):
+            esperados.setdefault((anio, mes), []).append(id_archivo)
+        columnas = [nombre_columna_mes(anio, mes) for anio, mes in esperados]
+
+        with self._bloqueo():
+            meses = self._meses_guardados()
+            desactualizados = [
+                (anio, mes)
+                for (anio, mes), ids in esperados.items()
+                if meses.get(nombre_columna_mes(anio, mes), {}).get("archivos") != ids
+            ]
+            if desactualizados:
+                matriz = self._leer()
+                for anio, mes in desactualizados:
+                    matriz = self._recalcular_mes(matriz, meses, anio, mes)
+                self._guardar(matriz, meses)
+            else:
+                matriz = self._leer(columnas)
+
+        enteras = {columna for columna, mes in meses.items() if mes["entero"]}
+        return seleccionar_meses_matriz(matriz, list(esperados), enteras)
@@ -0,0 +1,342 @@
+import json
+import logging
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import pandas as pd
+from django.conf import settings
+from django.utils import timezone
+
+from analyst.models import MedicionEjecucion, MedicionEtapa
+
+logger = logging.getLogger("analyst.medicion")
+
+# Ejecución medida activa en este hilo / tarea (None fuera de una ejecución)
+_ejecucion_actual = ContextVar("ejecucion_medida", default=None)
+
+# tracemalloc es global al proceso: con varias ejecuciones en curso (hilos del
+# ejecutor) el pico de una incluiría la memoria de las otras. La traza la
+# inicia y la usa solo una ejecución que comienza sin otras en curso, y deja
+# de medir si otra comienza mientras tanto.
+_lock_traza = threading.Lock()
+_en_curso = 0
+_duena_traza = None
+
+# ru_maxrss viene en KB en Linux y en bytes en macOS
+_FACTOR_RSS = 1 if sys.platform == "darwin" else 1024
+
+
+def _filas(datos):
+    if datos is None:
+        return None
+    try:
+        return len(datos)
+    except TypeError:
+        return None
+
+
+def _rss_maximo_mb() -> float:
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _FACTOR_RSS
+    return round(maximo / 1024 / 1024, 1)
+
+
+class Etapa:
+    """
+    Una etapa en curso. `salida(df)` registra las filas que produjo.
+    """
+
+    def __init__(self, nombre: str, filas_entrada=None):
+        self.nombre = nombre
+        self.filas_entrada = filas_entrada
+        self.filas_salida = None
+        self.pico_hijas = 0
+
+    def salida(self, datos):
+        self.filas_salida = _filas(datos)
+        return datos
+
+
+class EjecucionMedida:
+    """
+    Tiempos de las etapas de una ejecución (un cálculo, una validación, una
+    exportación). Si una etapa se repite (por ejemplo, una por bloque de
+    filas) sus tiempos y filas se suman.
+    """
+
+    def __init__(self, proceso: str, **contexto):
+        self.proceso = proceso
+        self.contexto = contexto
+        self.etapas = {}
+        self.pila = []
+        self.inicio = timezone.now()
+        # Otra ejecución comenzó mientras esta medía memoria
+        self.memoria_compartida = False
+
+    def mide_memoria(self) -> bool:
+        return self is _duena_traza and not self.memoria_compartida
+
+    def registrar(self, etapa: Etapa, segundos: float, memoria_pico_mb):
+        registro = self.etapas.setdefault(
+            etapa.nombre,
+            {
+                "etapa": etapa.nombre,
+                "orden": len(self.etapas),
+                "veces": 0,
+                "segundos": 0.0,
+                "filas_entrada": None,
+                "filas_salida": None,
+                "memoria_pico_mb": None,
+                "rss_max_mb": None,
+            },
+        )
+        registro["veces"] += 1
+        registro["segundos"] += segundos
+        for campo in ("filas_entrada", "filas_salida"):
+            valor = getattr(etapa, campo)
+            if valor is not None:
+                registro[campo] = (registro[campo] or 0) + valor
+        if memoria_pico_mb is not None:
+            registro["memoria_pico_mb"] = max(
+                registro["memoria_pico_mb"] or 0, memoria_pico_mb
+            )
+        registro["rss_max_mb"] = _rss_maximo_mb()
+
+
+@contextmanager
+def etapa(nombre: str, entrada=None):
+    """
+    Mide una etapa: tiempo, filas de entrada y de salida, y memoria.
+
+        with etapa("agregar_region", df) as e:
+            df = e.salida(agregar_columna_region(df))
+
+    Cada etapa se escribe en el log `analyst.medicion` como una línea JSON y,
+    dentro de `ejecucion_medida`, se guarda con la ejecución. El pico de
+    memoria propio de la etapa (tracemalloc) solo se mide con
+    MEDICION_MEMORIA activo, porque hace más lento el cálculo, y cuando la
+    ejecución corre sola en el proceso; siempre se registra el máximo de
+    memoria residente del proceso.
+    """
+    actual = Etapa(nombre, _filas(entrada))
+    if not settings.MEDICION_ETAPAS:
+        yield actual
+        return
+
+    ejecucion = _ejecucion_actual.get()
+    trazando = ejecucion is not None and ejecucion.mide_memoria()
+    if trazando:
+        pico_anterior = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+
+    if ejecucion is not None:
+        ejecucion.pila.append(actual)
+    inicio = time.perf_counter()
+    try:
+        yield actual
+    finally:
+        segundos = time.perf_counter() - inicio
+        if ejecucion is not None:
+            ejecucion.pila.pop()
+
+        memoria_pico_mb = None
+        if trazando and ejecucion.mide_memoria():
+            pico = max(tracemalloc.get_traced_memory()[1], actual.pico_hijas)
+            memoria_pico_mb = round(pico / 1024 / 1024, 1)
+            # La etapa que contiene a esta debe ver el pico de ambas
+            if ejecucion is not None and ejecucion.pila:
+                ejecucion.pila[-1].pico_hijas = max(
+                    ejecucion.pila[-1].pico_hijas, pico, pico_anterior
+                )
+
+        logger.info(
+            json.dumps(
+                {
+                    "evento": "etapa",
+                    "proceso": ejecucion.proceso if ejecucion else None,
+                    "etapa": nombre,
+                    "segundos": round(segundos, 4),
+                    "filas_entrada": actual.filas_entrada,
+                    "filas_salida": actual.filas_salida,
+                    "memoria_pico_mb": memoria_pico_mb,
+                    **(ejecucion.contexto if ejecucion else {}),
+                },
+                default=str,
+            )
+        )
+        if ejecucion is not None:
+            ejecucion.registrar(actual, segundos, memoria_pico_mb)
+
+
+@contextmanager
+def ejecucion_medida(proceso: str, **contexto):
+    """
+    Agrupa las etapas medidas dentro del bloque y, al terminar, guarda la
+    ejecución con sus etapas (MedicionEjecucion / MedicionEtapa). Las
+    ejecuciones anidadas se miden dentro de la exterior. Con MEDICION_MEMORIA,
+    la memoria por etapa solo se mide si ninguna otra ejecución del proceso
+    está en curso (ver _duena_traza).
+
+    Args:
+        proceso (str): nombre del proceso (homologacion, validacion, ...)
+        contexto: región, año, mes u otros datos que acompañan el registro
+    """
+    if not settings.MEDICION_ETAPAS or _ejecucion_actual.get() is not None:
+        yield _ejecucion_actual.get()
+        return
+
+    global _en_curso, _duena_traza
+    ejecucion = EjecucionMedida(proceso, **contexto)
+    token = _ejecucion_actual.set(ejecucion)
+    with _lock_traza:
+        _en_curso += 1
+        if _duena_traza is not None:
+            _duena_traza.memoria_compartida = True
+        elif (
+            settings.MEDICION_MEMORIA
+            and _en_curso == 1
+            and not tracemalloc.is_tracing()
+        ):
+            tracemalloc.start()
+            _duena_traza = ejecucion
+
+    inicio = time.perf_counter()
+    error = ""
+    try:
+        yield ejecucion
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        segundos = time.perf_counter() - inicio
+        with _lock_traza:
+            _en_curso -= 1
+            if _duena_traza is ejecucion:
+                tracemalloc.stop()
+                _duena_traza = None
+        _ejecucion_actual.reset(token)
+        _guardar(ejecucion, segundos, error)
+
+
+def reiniciar_medicion():
+    """
+    Olvida la ejecución medida en curso (para procesos creados con fork) y
+    la traza de memoria heredada del padre.
+    """
+    global _en_curso, _duena_traza
+    _ejecucion_actual.set(None)
+    _en_curso = 0
+    _duena_traza = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def _guardar(ejecucion: EjecucionMedida, segundos: float, error: str):
+    logger.info(
+        json.dumps(
+            {
+                "evento": "ejecucion",
+                "proceso": ejecucion.proceso,
+                "segundos": round(segundos, 4),
+                "error": error,
+                **ejecucion.contexto,
+            },
+            default=str,
+        )
+    )
+    try:
+        registro = MedicionEjecucion.objects.create(
+            proceso=ejecucion.proceso,
+            region=ejecucion.contexto.get("region"),
+            anio=ejecucion.contexto.get("anio"),
+            mes=ejecucion.contexto.get("mes"),
+            inicio=ejecucion.inicio,
+            segundos=segundos,
+            rss_max_mb=_rss_maximo_mb(),
+            error=error[:500],
+        )
+        MedicionEtapa.objects.bulk_create(
+            MedicionEtapa(ejecucion=registro, **datos)
+            for datos in ejecucion.etapas.values()
+        )
+    except Exception:
+        # La medición nunca debe hacer fallar el proceso medido
+        logger.exception("No se pudo guardar la medición de %s", ejecucion.proceso)
+
+
+def resumen_duraciones(dias: int = 30, proceso: str = None) -> dict:
+    """
+    Percentiles 50 y 95 de la duración de cada etapa en los últimos `dias`
+    días: en total por (proceso, etapa) y, por día, para cada etapa.
+
+    Returns:
+        dict: {"resumen": [filas], "por_dia": [filas], "procesos": [nombres]}
+    """
+    desde = timezone.now() - timezone.timedelta(days=dias)
+    ejecuciones = MedicionEjecucion.objects.filter(inicio__gte=desde)
+    procesos = sorted(set(ejecuciones.values_list("proceso", flat=True)))
+    if proceso:
+        ejecuciones = ejecuciones.filter(proceso=proceso)
+
+    totales = pd.DataFrame(
+        list(ejecuciones.values("proceso", "inicio", "segundos")),
+        columns=["proceso", "inicio", "segundos"],
+    ).assign(etapa="(total)", orden=-1)
+    etapas = pd.DataFrame(
+        list(
+            MedicionEtapa.objects.filter(ejecucion__in=ejecuciones).values(
+                "ejecucion__proceso", "ejecucion__inicio", "etapa", "orden", "segundos"
+            )
+        ),
+        columns=[
+            "ejecucion__proceso",
+            "ejecucion__inicio",
+            "etapa",
+            "orden",
+            "segundos",
+        ],
+    ).rename(columns={"ejecucion__proceso": "proceso", "ejecucion__inicio": "inicio"})
+
+    df = pd.concat([totales, etapas], ignore_index=True)
+    if df.empty:
+        return {"resumen": [], "por_dia": [], "procesos": procesos}
+
+    df["dia"] = pd.to_datetime(df["inicio"], utc=True).dt.tz_convert(
+        timezone.get_current_timezone()
+    ).dt.date
+    df["orden"] = df["orden"].astype(int)
+
+    def percentiles(grupo):
+        return pd.Series(
+            {
+                "n": len(grupo),
+                "p50": grupo["segundos"].quantile(0.5),
+                "p95": grupo["segundos"].quantile(0.95),
+                "max": grupo["segundos"].max(),
+                "orden": grupo["orden"].min(),
+            }
+        )
+
+    resumen = (
+        df.groupby(["proceso", "etapa"])[["segundos", "orden"]]
+        .apply(percentiles)
+        .reset_index()
+        .sort_values(["proceso", "orden", "etapa"])
+    )
+    por_dia = (
+        df.groupby(["proceso", "etapa", "dia"])[["segundos", "orden"]]
+        .apply(percentiles)
+        .reset_index()
+        .sort_values(["proceso", "orden", "etapa", "dia"])
+    )
+    resumen["n"] = resumen["n"].astype(int)
+    por_dia["n"] = por_dia["n"].astype(int)
+    return {
+        "resumen": resumen.round(4).to_dict("records"),
+        "por_dia": por_dia.round(4).to_dict("records"),
+        "procesos": procesos,
+    }
@@ -1,6 +1,7 @@
+import numpy as np
 import pandas as pd
-import re
-from collections import defaultdict
+from django.conf import settings
+
 from ..constants.validaciones_config import (
     VALID_COLUMNS,
     VALID_TYPES,
@@ -8,247 +9,390 @@ from ..constants.validaciones_config import (
     VALID_VALUES,
     COLUMNS_ALLOW_EMPTY,
 )
+from ..df_utils.fechas import parsear_fechas
+from ..df_utils.lectura import leer_planilla, leer_planilla_por_bloques
+from ..df_utils.limpieza import limpiar_dataframe
+from ..df_utils.validaciones import (
+    mascara_fuera_de_rango,
+    mascara_no_permitidos,
+    mascara_tipo_invalido,
+    mascara_vacios,
+)
+from ..df_utils.validaciones_rut import mascaras_rut
+from .errores_validacion import CODIGO_TIPO, RegistroErrores
+from .medicion import etapa
+
+
+TAMANO_BLOQUE_FILAS = 20_000
 
 
 class PlanillaValidadora:
-    def __init__(self, tipo: str):
+    def __init__(
+        self,
+        tipo: str,
+        falla_rapida: bool = False,
+        max_errores_columna: int = None,
+        max_proporcion_filas: float = None,
+    ):
+        """
+        Args:
+            tipo (str): tipo de planilla de validaciones_config
+            falla_rapida (bool): detener la validación ante una plantilla que
+                no corresponde (faltan columnas, otro periodo) o al agotar el
+                presupuesto de errores, en vez de revisar todas las filas
+            max_errores_columna (int): presupuesto de errores por columna
+                (VALIDACION_MAX_ERRORES_COLUMNA por defecto)
+            max_proporcion_filas (float): proporción de filas con error de
+                un bloque sobre la que se detiene
+                (VALIDACION_MAX_PROPORCION_FILAS por defecto)
+        """
         self.tipo = tipo
+        self.falla_rapida = falla_rapida
+        self.max_errores_columna = (
+            settings.VALIDACION_MAX_ERRORES_COLUMNA
+            if max_errores_columna is None
+            else max_errores_columna
+        )
+        self.max_proporcion_filas = (
+            settings.VALIDACION_MAX_PROPORCION_FILAS
+            if max_proporcion_filas is None
+            else max_proporcion_filas
+        )
         self.columnas = VALID_COLUMNS.get(tipo, [])
         self.tipos = VALID_TYPES.get(tipo, {})
-        self.rangos = VALID_RANGES.get(tipo, {})
+        # Los límites de las columnas de fecha se interpretan una sola vez
+        self.rangos = {
+            col: (
+                tuple(pd.Timestamp(v) for v in limites)
+                if "FECHA" in col.upper()
+                else limites
+            )
+            for col, limites in VALID_RANGES.get(tipo, {}).items()
+        }
         self.valores = VALID_VALUES.get(tipo, {})
         self.columnas_vacias = COLUMNS_ALLOW_EMPTY.get(tipo, {})
-        self.errores = []
+        self.errores = RegistroErrores()
+
+        # Estado para validar por bloques: filas ya revisadas y valores de
+        # ANIO/MES encontrados en los bloques anteriores.
+        self.desplazamiento_filas = 0
+        self._anios = {}
+        self._meses = {}
+        self._anio_distinto = False
+        self._mes_distinto = False
+        self._faltantes = []
 
     def cargar_archivo(self, archivo):
         ext = archivo.name.split(".")[-1].lower()
         try:
-            if ext in ["xls", "xlsx"]:
-                df = pd.read_excel(archivo)
-            elif ext == "csv":
-                df = pd.read_csv(archivo)
-            else:
+            if ext not in ["xls", "xlsx", "csv"]:
                 return f"Formato de archivo no soportado: {ext}"
 
+            df = leer_planilla(archivo, self.tipo)
             df = self._limpiar_dataframe(df)
             return df
         except Exception as e:
             return f"Error al leer archivo: {str(e)}"
 
     def _validar_anio_mes(self, df, anio_esperado, mes_esperado):
-        # Validar existencia de columnas
-        if "ANIO" not in df.columns:
-            self.errores.append("Falta la columna 'ANIO'.")
-            return
-        if "MES" not in df.columns:
-            self.errores.append("Falta la columna 'MES'.")
+        self._acumular_anio_mes(df, anio_esperado, mes_esperado)
+        self._reportar_anio_mes(df.columns, anio_esperado, mes_esperado)
+
+    def _acumular_anio_mes(self, df, anio_esperado, mes_esperado):
+        if "ANIO" not in df.columns or "MES" not in df.columns:
             return
 
         # Convertir a int por seguridad
         df["ANIO"] = df["ANIO"].astype(int, errors="ignore")
         df["MES"] = df["MES"].astype(int, errors="ignore")
 
+        # Un bloque puede leer 2025 como número y otro como texto: se
+        # consideran el mismo valor
+        for valor in df["ANIO"].unique():
+            self._anios.setdefault(str(valor), valor)
+        for valor in df["MES"].unique():
+            self._meses.setdefault(str(valor), valor)
+        self._anio_distinto |= not (df["ANIO"] == int(anio_esperado)).all()
+        self._mes_distinto |= not (df["MES"] == int(mes_esperado)).all()
+
+    def _reportar_anio_mes(self, columnas, anio_esperado, mes_esperado):
+        # Validar existencia de columnas
+        if "ANIO" not in columnas:
+            self.errores.agregar_general("Falta la columna 'ANIO'.")
+            return
+        if "MES" not in columnas:
+            self.errores.agregar_general("Falta la columna 'MES'.")
+            return
+
         # Validar unicidad
-        anios_unicos = df["ANIO"].unique()
-        meses_unicos = df["MES"].unique()
+        anios_unicos = list(self._anios.values())
+        meses_unicos = list(self._meses.values())
 
         if len(anios_unicos) > 1:
-            self.errores.append(
-                f"Se encontraron múltiples valores de ANIO en la planilla: {list(anios_unicos)}. "
+            self.errores.agregar_general(
+                f"Se encontraron múltiples valores de ANIO en la planilla: {anios_unicos}. "
                 f"Debe ser único y coincidir con {anio_esperado}."
             )
         if len(meses_unicos) > 1:
-            self.errores.append(
-                f"Se encontraron múltiples valores de MES en la planilla: {list(meses_unicos)}. "
+            self.errores.agregar_general(
+                f"Se encontraron múltiples valores de MES en la planilla: {meses_unicos}. "
                 f"Debe ser único y coincidir con {mes_esperado}."
             )
 
         # Validar contra los esperados
-        if not all(df["ANIO"] == int(anio_esperado)):
-            self.errores.append(
+        if self._anio_distinto:
+            self.errores.agregar_general(
                 f"El valor de ANIO no coincide con el esperado ({anio_esperado}). "
-                f"Valores encontrados: {list(anios_unicos)}"
+                f"Valores encontrados: {anios_unicos}"
             )
 
-        if not all(df["MES"] == int(mes_esperado)):
-            self.errores.append(
+        if self._mes_distinto:
+            self.errores.agregar_general(
                 f"El valor de MES no coincide con el esperado ({mes_esperado}). "
-                f"Valores encontrados: {list(meses_unicos)}"
+                f"Valores encontrados: {meses_unicos}"
             )
 
     def _limpiar_dataframe(self, df):
-        for col in df.select_dtypes(include=["object"]).columns:
-            df[col] = df[col].astype(str).str.strip()
-            df[col] = df[col].replace(r"^\s*$", pd.NA, regex=True)
-        df.dropna(how="all", inplace=True)
-        return df
-
-    def _calcular_dv(self, rut_num):
-        reversed_digits = list(map(int, reversed(str(rut_num))))
-        factors = [2, 3, 4, 5, 6, 7]
-        total = sum(d * factors[i % 6] for i, d in enumerate(reversed_digits))
-        remainder = 11 - (total % 11)
-        return "0" if remainder == 11 else "K" if remainder == 10 else str(remainder)
-
-    def _normalizar_y_validar_rut(self, rut_str):
-        if not isinstance(rut_str, str):
-            return None
-        rut_clean = re.sub(r"[^0-9kK]", "", rut_str)
-        if len(rut_clean) < 2:
-            return None
-        rut_num = rut_clean[:-1]
-        dv_ingresado = rut_clean[-1].upper()
-        if not rut_num.isdigit():
-            return None
-        dv_esperado = self._calcular_dv(rut_num)
-        return f"{int(rut_num)}-{dv_esperado}" if dv_esperado == dv_ingresado else None
+        return limpiar_dataframe(df)
 
     def _validar_rut(self, df):
-        col = "RUT"
-        if col not in df.columns:
-            self.errores.append("Falta la columna 'RUT' para validación de RUTs.")
+        if "RUT" not in df.columns:
+            self.errores.agregar_general(
+                "Falta la columna 'RUT' para validación de RUTs."
+            )
             return
-
-        for i, val in df[col].items():
-            fila = i + 2
-            if pd.isna(val) or str(val).strip() == "":
-                self.errores.append(f"Fila {fila}, columna 'RUT': vacío no permitido.")
-                continue
-
-            rut_validado = self._normalizar_y_validar_rut(str(val))
-            if not rut_validado:
-                self.errores.append(
-                    f"Fila {fila}, columna 'RUT': '{val}' no es un RUT válido."
-                )
-            else:
-                df.at[i, col] = rut_validado  # Normaliza el RUT
+        vacios, invalidos = mascaras_rut(df, col="RUT")
+        filas = df.index.to_numpy() + 2
+        self.errores.agregar("RUT", "vacio", filas[vacios])
+        self.errores.agregar(
+            "RUT", "rut_invalido", filas[invalidos], df["RUT"].to_numpy(object)[invalidos]
+        )
 
     def validar(self, df: pd.DataFrame, anio_esperado=None, mes_esperado=None):
-        self._validar_columnas(df)
+        with etapa("validar_columnas", df):
+            self._validar_columnas(df)
+        if self._plantilla_incorrecta():
+            return False, self._formatear_errores()
         if anio_esperado is not None and mes_esperado is not None:
-            self._validar_anio_mes(df, anio_esperado, mes_esperado)
-        self._validar_rut(df)
-        self._validar_tipos(df)
-        self._validar_rangos(df)
-        self._validar_valores_permitidos(df)
+            with etapa("validar_anio_mes", df):
+                self._validar_anio_mes(df, anio_esperado, mes_esperado)
+            if self._periodo_incorrecto():
+                return False, self._formatear_errores()
+        self._validar_bloque(df)
         return len(self.errores) == 0, self._formatear_errores()
 
+    def _plantilla_incorrecta(self) -> bool:
+        """
+        Con falla rápida, faltar columnas detiene la validación: el archivo
+        no es la plantilla (o el encabezado no está en la primera fila) y
+        revisar las filas solo repetiría errores con esa misma causa.
+        """
+        if not (self.falla_rapida and self._faltantes):
+            return False
+        self.errores.detener(
+            "el archivo no corresponde a la plantilla oficial "
+            f"(faltan {len(self._faltantes)} de {len(self.columnas)} columnas)."
+        )
+        return True
+
+    def _periodo_incorrecto(self) -> bool:
+        if not (self.falla_rapida and (self._anio_distinto or self._mes_distinto)):
+            return False
+        self.errores.detener("la planilla no corresponde al periodo seleccionado.")
+        return True
+
+    def _presupuesto_agotado(self, filas_bloque: int) -> str:
+        """
+        Motivo para no seguir validando tras un bloque: muchas filas del
+        bloque con errores o una columna que agotó su presupuesto. "" si se
+        puede seguir.
+        """
+        if not self.falla_rapida:
+            return ""
+        con_error = self.errores.filas_con_error_recientes()
+        if filas_bloque and con_error / filas_bloque > self.max_proporcion_filas:
+            return (
+                f"{con_error} de {filas_bloque} filas revisadas tienen errores "
+                f"(más del {self.max_proporcion_filas:.0%})."
+            )
+        for columna, total in self.errores.errores_por_columna().items():
+            if total >= self.max_errores_columna:
+                return f"la columna '{columna}' tiene {total} errores o más."
+        return ""
+
+    def validar_por_bloques(
+        self,
+        archivo,
+        anio_esperado=None,
+        mes_esperado=None,
+        al_validar_bloque=None,
+        tamano_bloque=TAMANO_BLOQUE_FILAS,
+    ):
+        """
+        Valida el archivo leyéndolo por bloques de `tamano_bloque` filas, de modo
+        que la memoria usada depende del bloque y no del tamaño del archivo.
+
+        Aplica las mismas reglas que `validar` y los números de fila de los
+        errores son los del archivo completo. Mientras no haya errores, cada
+        bloque ya validado (y normalizado) se entrega a `al_validar_bloque`.
+        """
+        ext = archivo.name.split(".")[-1].lower()
+        if ext not in ["xls", "xlsx", "csv"]:
+            self.errores.agregar_general(f"Formato de archivo no soportado: {ext}")
+            return False, self._formatear_errores()
+
+        self.iniciar_bloques(anio_esperado, mes_esperado)
+        bloques = leer_planilla_por_bloques(archivo, self.tipo, tamano_bloque)
+        while True:
+            try:
+                with etapa("leer_bloque") as e:
+                    bloque = e.salida(next(bloques, None))
+            except Exception as e:
+                self.errores.agregar_general(f"Error al leer archivo: {str(e)}")
+                break
+            if bloque is None or not self.validar_bloque_leido(bloque, al_validar_bloque):
+                break
+        return self.terminar_bloques()
+
+    def iniciar_bloques(self, anio_esperado=None, mes_esperado=None):
+        """
+        Prepara la validación de un archivo cuyos bloques se entregan uno a
+        uno a `validar_bloque_leido` (validar_por_bloques);
+        `terminar_bloques` entrega el resultado.
+        """
+        self._anio_esperado = anio_esperado
+        self._mes_esperado = mes_esperado
+        self._validar_periodo = anio_esperado is not None and mes_esperado is not None
+        self._columnas_bloques = None
+        self._motivo_detencion = ""
+
+    def validar_bloque_leido(self, bloque, al_validar_bloque=None) -> bool:
+        """
+        Valida el siguiente bloque del archivo. Retorna False si la validación
+        terminó y no hace falta leer más bloques.
+        """
+        if self._motivo_detencion:
+            # Quedan filas sin revisar
+            self.errores.detener(self._motivo_detencion)
+            return False
+
+        with etapa("limpiar_bloque", bloque) as e:
+            bloque = e.salida(self._limpiar_dataframe(bloque))
+        if self._columnas_bloques is None:
+            self._columnas_bloques = list(bloque.columns)
+            with etapa("validar_columnas", bloque):
+                self._validar_columnas(bloque)
+            if self._plantilla_incorrecta():
+                return False
+        if self._validar_periodo:
+            with etapa("validar_anio_mes", bloque):
+                self._acumular_anio_mes(bloque, self._anio_esperado, self._mes_esperado)
+            if self._periodo_incorrecto():
+                return False
+        self._validar_bloque(bloque)
+        self.desplazamiento_filas += len(bloque)
+        self._motivo_detencion = self._presupuesto_agotado(len(bloque))
+
+        if al_validar_bloque is not None and not self.errores:
+            with etapa("guardar_bloque", bloque):
+                al_validar_bloque(bloque)
+        return True
+
+    def terminar_bloques(self):
+        columnas = self._columnas_bloques
+        if columnas is None and not self.errores:
+            self.errores.agregar_general("El archivo no tiene filas para validar.")
+        if self._validar_periodo and columnas is not None:
+            self._reportar_anio_mes(columnas, self._anio_esperado, self._mes_esperado)
+
+        return len(self.errores) == 0, self._formatear_errores()
+
+    def _validar_bloque(self, df):
+        with etapa("validar_rut", df):
+            self._validar_rut(df)
+        with etapa("validar_tipos", df):
+            self._validar_tipos(df)
+        with etapa("validar_rangos", df):
+            self._validar_rangos(df)
+        with etapa("validar_valores_permitidos", df):
+            self._validar_valores_permitidos(df)
+
     def _validar_columnas(self, df):
         faltantes = [col for col in self.columnas if col not in df.columns]
+        self._faltantes = faltantes
         if faltantes:
-            self.errores.append(f"Faltan columnas: {', '.join(faltantes)}")
+            self.errores.agregar_general(f"Faltan columnas: {', '.join(faltantes)}")
 
         extras = [col for col in df.columns if col not in self.columnas]
         if extras:
-            self.errores.append(f"Columnas no reconocidas: {', '.join(extras)}")
+            self.errores.agregar_general(f"Columnas no reconocidas: {', '.join(extras)}")
 
     def _validar_tipos(self, df):
+        filas = df.index.to_numpy() + 2
         for col, tipo in self.tipos.items():
             if col not in df.columns:
                 continue
-            allow_empty = self._permite_vacio(col)
-            for i, valor in enumerate(df[col]):
-                fila = i + 2
-                if pd.isna(valor) or str(valor).strip() == "":
-                    if not allow_empty:
-                        self.errores.append(
-                            f"Fila {fila}, columna '{col}': vacío no permitido."
-                        )
-                    continue
-
-                if tipo == "numerico":
-                    if not self._es_numero(valor):
-                        self.errores.append(
-                            f"Fila {fila}, columna '{col}': '{valor}' no es numérico."
-                        )
-                elif tipo == "fecha":
-                    if not self._es_fecha(valor):
-                        self.errores.append(
-                            f"Fila {fila}, columna '{col}': '{valor}' no es fecha válida."
-                        )
-                elif tipo == "texto":
-                    if not isinstance(valor, str):
-                        self.errores.append(
-                            f"Fila {fila}, columna '{col}': no es texto."
-                        )
+            serie = df[col]
+            vacios = mascara_vacios(serie).to_numpy()
+            invalidos = mascara_tipo_invalido(serie, tipo).to_numpy() & ~vacios
+
+            if not self._permite_vacio(col):
+                self.errores.agregar(col, "vacio", filas[vacios])
+            if tipo in CODIGO_TIPO:
+                self.errores.agregar(
+                    col,
+                    CODIGO_TIPO[tipo],
+                    filas[invalidos],
+                    serie.to_numpy(object)[invalidos],
+                )
 
     def _validar_rangos(self, df):
+        filas = df.index.to_numpy() + 2
         for col, (min_val, max_val) in self.rangos.items():
             if col not in df.columns:
                 continue
-            fila_base = 2
 
             if "FECHA" in col.upper():
-                df[col] = pd.to_datetime(df[col], dayfirst=True, errors="coerce")
-                for i, valor in df[col].items():
-                    if pd.isna(valor):
-                        continue
-                    if not (
-                        pd.to_datetime(min_val) <= valor <= pd.to_datetime(max_val)
-                    ):
-                        self.errores.append(
-                            f"Fila {i + fila_base}, columna '{col}': fecha fuera de rango."
-                        )
+                df[col] = parsear_fechas(df[col])
+                fuera = mascara_fuera_de_rango(df[col], min_val, max_val).to_numpy()
+                codigo = "fecha_fuera_de_rango"
             else:
                 df[col] = pd.to_numeric(df[col], errors="coerce")
-                for i, valor in df[col].items():
-                    if pd.isna(valor):
-                        continue
-                    if not (min_val <= valor <= max_val):
-                        self.errores.append(
-                            f"Fila {i + fila_base}, columna '{col}': valor {valor} fuera de rango."
-                        )
+                fuera = mascara_fuera_de_rango(df[col], min_val, max_val).to_numpy()
+                codigo = "fuera_de_rango"
+            self.errores.agregar(
+                col, codigo, filas[fuera], df[col].to_numpy(object)[fuera]
+            )
 
     def _validar_valores_permitidos(self, df):
+        filas = df.index.to_numpy() + 2
         for col, reglas in self.valores.items():
             if col not in df.columns:
                 continue
             valores_permitidos = {v.strip().lower() for v in reglas.get("allowed", [])}
-            allow_empty = self._permite_vacio(col)
-            df[col] = df[col].astype(str).str.strip().str.lower()
-
-            for i, val in df[col].items():
-                fila = i + 2
-                if not val and not allow_empty:
-                    self.errores.append(
-                        f"Fila {fila}, columna '{col}': vacío no permitido."
-                    )
-                elif val not in valores_permitidos and val:
-                    self.errores.append(
-                        f"Fila {fila}, columna '{col}': '{val}' no permitido."
-                    )
+            # Los vacíos se marcan antes de pasar a texto (un nulo sería "nan")
+            # y siguen nulos
+            vacios = mascara_vacios(df[col])
+            df[col] = df[col].astype(str).str.strip().str.lower().mask(vacios)
 
-    def _permite_vacio(self, col):
-        return self.columnas_vacias.get(col, False)
+            serie = df[col]
+            vacios = vacios.to_numpy()
+            no_permitidos = mascara_no_permitidos(serie, valores_permitidos).to_numpy()
 
-    def _es_numero(self, valor):
-        try:
-            float(valor)
-            return True
-        except:
-            return False
+            # Si la columna tiene tipo, sus vacíos ya se reportaron en
+            # _validar_tipos
+            if not self._permite_vacio(col) and col not in self.tipos:
+                self.errores.agregar(col, "vacio", filas[vacios])
+            self.errores.agregar(
+                col,
+                "no_permitido",
+                filas[no_permitidos],
+                serie.to_numpy(object)[no_permitidos],
+            )
 
-    def _es_fecha(self, valor):
-        try:
-            pd.to_datetime(valor, dayfirst=True)
-            return True
-        except:
-            return False
+    def _permite_vacio(self, col):
+        return self.columnas_vacias.get(col, False)
 
     def _formatear_errores(self):
-        agrupados = defaultdict(list)
-        for err in self.errores:
-            match = re.search(r"columna '([^']+)'", err)
-            if match:
-                agrupados[match.group(1)].append(err)
-            else:
-                agrupados["Otros"].append(err)
-
-        salida = []
-        for col, msgs in agrupados.items():
-            salida.append(
-                f'<p class="font-semibold text-orange-600">ⓘ Errores en columna <code>{col}</code>:</p>'
-            )
-            for msg in msgs:
-                salida.append(f'<p class="pl-4 text-sm text-gray-700">• {msg}</p>')
-        return salida
+        with etapa("formatear_errores") as e:
+            return e.salida(self.errores.a_html())
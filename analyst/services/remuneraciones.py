@@ -0,0 +1,151 @@
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+import pandas as pd
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import Q
+
+from analyst.df_utils.almacenamiento import leer_archivo_guardado
+from analyst.df_utils.consolidar import (
+    COLUMNA_SUELDO,
+    matriz_sueldos,
+    nombre_columna_mes,
+    remuneraciones_del_mes,
+    seleccionar_meses_matriz,
+)
+from analyst.models import ArchivoSubido, RemuneracionMensual
+
+# Columnas de la planilla con un campo de monto en RemuneracionMensual
+COLUMNAS_MONTOS = [
+    campo.name.upper()
+    for campo in RemuneracionMensual._meta.get_fields()
+    if isinstance(campo, models.FloatField)
+]
+CAMPOS_MONTOS = [columna.lower() for columna in COLUMNAS_MONTOS]
+# Orden de los valores de cada fila al insertar
+CAMPOS_INSERCION = [
+    "archivo",
+    "region",
+    "anio",
+    "mes",
+    "codigo_establecimiento",
+    "rut",
+] + CAMPOS_MONTOS
+
+
+def _sql_insercion() -> str:
+    opciones = RemuneracionMensual._meta
+    columnas = [opciones.get_field(campo).column for campo in CAMPOS_INSERCION]
+    return "INSERT INTO {} ({}) VALUES ({})".format(
+        connection.ops.quote_name(opciones.db_table),
+        ", ".join(connection.ops.quote_name(c) for c in columnas),
+        ", ".join(["%s"] * len(columnas)),
+    )
+
+
+def cargar_remuneraciones(archivo: ArchivoSubido, df: pd.DataFrame = None) -> int:
+    """
+    Carga (o vuelve a cargar) en RemuneracionMensual las filas de una
+    planilla aceptada, en lotes de REMUNERACIONES_FILAS_POR_LOTE.
+
+    Se inserta con executemany y las tuplas armadas desde el DataFrame:
+    bulk_create prepara campo por campo cada instancia y, con más de 30
+    campos, en SQLite solo cabe una treintena de filas por INSERT.
+
+    Args:
+        archivo (ArchivoSubido): planilla guardada
+        df (pd.DataFrame, opcional): su contenido, si ya está leído
+
+    Returns:
+        int: filas cargadas
+    """
+    if df is None:
+        df = leer_archivo_guardado(archivo.archivo.path, archivo.proceso)
+    filas = remuneraciones_del_mes(df, archivo.anio, archivo.mes, COLUMNAS_MONTOS)
+    # Los montos vacíos se guardan como NULL
+    montos = filas[COLUMNAS_MONTOS].astype(object)
+    montos = montos.where(filas[COLUMNAS_MONTOS].notna(), None)
+    constantes = (archivo.id, archivo.region, archivo.anio, archivo.mes)
+    registros = (
+        constantes + (codigo, rut) + valores
+        for codigo, rut, valores in zip(
+            filas["CODIGO_ESTABLECIMIENTO"].tolist(),
+            filas["RUT"].tolist(),
+            montos.itertuples(index=False, name=None),
+        )
+    )
+
+    sql = _sql_insercion()
+    lote = settings.REMUNERACIONES_FILAS_POR_LOTE
+    with transaction.atomic(), connection.cursor() as cursor:
+        RemuneracionMensual.objects.filter(archivo=archivo).delete()
+        while True:
+            registros_lote = list(islice(registros, lote))
+            if not registros_lote:
+                break
+            cursor.executemany(sql, registros_lote)
+    return len(filas)
+
+
+def cargar_remuneraciones_pendientes(archivos) -> int:
+    """
+    Carga los archivos que aún no están en RemuneracionMensual.
+
+    Returns:
+        int: archivos cargados
+    """
+    pendientes = archivos.filter(remuneraciones__isnull=True).distinct()
+    cargados = 0
+    for archivo in pendientes:
+        cargar_remuneraciones(archivo)
+        cargados += 1
+    return cargados
+
+
+def consolidar_remuneraciones(region: int, archivos) -> pd.DataFrame:
+    """
+    Sueldos de los archivos con la misma forma que consolidar_sueldos: una
+    fila por (CODIGO_ESTABLECIMIENTO, RUT) y una columna ANIO_MES por mes.
+    Se responde con una consulta sobre el índice (region, anio, mes) de
+    RemuneracionMensual, sin leer los archivos.
+
+    Los archivos subidos antes de que existiera la tabla se cargan la
+    primera vez que se consultan.
+    """
+    cargar_remuneraciones_pendientes(archivos)
+
+    meses = sorted(set(archivos.values_list("anio", "mes")))
+    df = sueldos_remuneraciones(region, archivos, meses)
+    return seleccionar_meses_matriz(matriz_sueldos(df), meses, meses_enteros(df))
+
+
+def sueldos_remuneraciones(region: int, archivos, meses) -> pd.DataFrame:
+    """
+    Sueldos no vacíos de RemuneracionMensual para los archivos y meses
+    (anio, mes), en el orden de los archivos: columnas de claves, ANIO, MES
+    y sueldo, como las que recibe matriz_sueldos.
+    """
+    periodos = reduce(or_, (Q(anio=anio, mes=mes) for anio, mes in meses), Q())
+    filas = (
+        RemuneracionMensual.objects.filter(periodos, region=region, archivo__in=archivos)
+        .exclude(**{f"{COLUMNA_SUELDO.lower()}__isnull": True})
+        .order_by("archivo_id", "id")
+        .values_list("codigo_establecimiento", "rut", "anio", "mes", COLUMNA_SUELDO.lower())
+    )
+    return pd.DataFrame.from_records(
+        filas, columns=["CODIGO_ESTABLECIMIENTO", "RUT", "ANIO", "MES", COLUMNA_SUELDO]
+    )
+
+
+def meses_enteros(df: pd.DataFrame) -> set:
+    """
+    Columnas ANIO_MES cuyos sueldos son todos enteros: como en el pivot, esos
+    meses quedan como int.
+    """
+    return {
+        nombre_columna_mes(anio, mes)
+        for (anio, mes), sueldos in df.groupby(["ANIO", "MES"])[COLUMNA_SUELDO]
+        if (sueldos % 1 == 0).all()
+    }
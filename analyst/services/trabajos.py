@@ -0,0 +1,486 @@
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import pandas as pd
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from analyst.df_utils.almacenamiento import leer_archivo_guardado
+from analyst.df_utils.calculos import anio_parametro
+from analyst.df_utils.exportacion import resultado_a_parquet
+from analyst.models import ArchivoSubido, Trabajo
+from analyst.services.cache_homologacion import CacheHomologacion
+from analyst.services.cache_parametros import CacheParametros
+from analyst.services.matriz_sueldos import MatrizSueldos
+from analyst.services.remuneraciones import cargar_remuneraciones_pendientes
+from analyst.services.medicion import (
+    ejecucion_medida,
+    etapa,
+    reiniciar_medicion,
+)
+from analyst.views.helpers import calcular_homologacion
+
+
+def archivos_semestre_anterior(anio: int, mes: int, region: int):
+    """
+    Archivos de la planilla validadora que usa el cálculo de homologación
+    del mes `mes` (ya corrido al mes anterior) y los meses esperados.
+
+    Returns:
+        tuple: (queryset de archivos, set de (anio, mes) esperados, año de referencia)
+    """
+    if mes <= 6:
+        # Semestre anterior: julio a diciembre del año anterior
+        semestre_anio_anterior = anio - 1
+        meses_semestre_anterior = list(range(7, 13))  # 7 a 12
+
+        # Semestre actual: enero hasta el mes actual del año actual
+        semestre_anio_actual = anio
+        meses_semestre_actual = list(range(1, mes + 1))  # 1 hasta mes actual
+
+        archivos = ArchivoSubido.objects.filter(
+            Q(anio=semestre_anio_anterior, mes__in=meses_semestre_anterior)
+            | Q(anio=semestre_anio_actual, mes__in=meses_semestre_actual),
+            proceso="planilla_validadora",
+            region=region,
+        )
+
+        meses_esperados = {
+            (semestre_anio_anterior, m) for m in meses_semestre_anterior
+        } | {(semestre_anio_actual, m) for m in meses_semestre_actual}
+
+        anio_referencia = anio  # Para nombre del archivo
+
+    else:
+        semestre_anio = anio
+        meses_semestre = list(range(1, mes + 1))  # Enero a Junio
+
+        archivos = ArchivoSubido.objects.filter(
+            anio=semestre_anio,
+            mes__in=meses_semestre,
+            proceso="planilla_validadora",
+            region=region,
+        )
+
+        meses_esperados = {(semestre_anio, m) for m in meses_semestre}
+        anio_referencia = semestre_anio
+
+    return archivos, meses_esperados, anio_referencia
+
+
+def archivos_consolidacion(
+    anio: int, mes_inicio: int, mes_termino: int, region: int, proceso: str
+):
+    return ArchivoSubido.objects.filter(
+        anio=anio,
+        region=region,
+        proceso=proceso,
+        mes__gte=mes_inicio,
+        mes__lte=mes_termino,
+    )
+
+
+def leer_archivos(archivos) -> pd.DataFrame:
+    """
+    Lee y concatena los archivos guardados.
+    """
+    if not archivos.exists():
+        raise ValueError("No se encontraron archivos para esos filtros.")
+
+    dfs = []
+    for archivo in archivos:
+        try:
+            dfs.append(leer_archivo_guardado(archivo.archivo.path, archivo.proceso))
+        except Exception as e:
+            raise RuntimeError(f"Error leyendo archivo {archivo.archivo.name}: {e}")
+    return pd.concat(dfs, ignore_index=True)
+
+
+def resultado_temporal(df: pd.DataFrame):
+    """
+    Escribe el resultado en Parquet sobre un archivo temporal y lo retorna
+    posicionado al inicio.
+    """
+    temporal = tempfile.SpooledTemporaryFile(
+        max_size=settings.PLANILLA_MAX_BYTES_EN_MEMORIA
+    )
+    resultado_a_parquet(df, temporal)
+    temporal.seek(0)
+    return temporal
+
+
+def homologar_region(region: int, anio: int, mes: int, tabla_param=None):
+    """
+    Resultado de la homologación de una región, desde el caché si nada
+    cambió o calculado y guardado en él.
+
+    Returns:
+        archivo Parquet abierto y posicionado al inicio
+    """
+    with etapa("buscar_cache"):
+        archivos, _, _ = archivos_semestre_anterior(anio, mes, region)
+        clave = CacheHomologacion.clave(region, anio, mes, archivos)
+        resultado = CacheHomologacion.obtener(clave)
+    if resultado is not None:
+        return resultado.archivo.open("rb")
+
+    # Del mes consultado basta su archivo; los sueldos del semestre salen
+    # de la matriz de la región
+    with etapa("leer_archivos") as e:
+        df = e.salida(leer_archivos(archivos.filter(anio=anio, mes=mes)))
+    with etapa("matriz_sueldos") as e:
+        df_sueldos = e.salida(MatrizSueldos(region).consolidar(archivos))
+    with etapa("calcular_homologacion", df) as e:
+        df = e.salida(
+            calcular_homologacion(
+                df, anio, mes, df_sueldos=df_sueldos, tabla_param=tabla_param
+            )
+        )
+    with etapa("guardar_resultado", df):
+        contenido = resultado_temporal(df)
+        CacheHomologacion.guardar(clave, region, anio, mes, contenido)
+    contenido.seek(0)
+    return contenido
+
+
+def regiones_con_datos(anio: int, mes: int):
+    """
+    Regiones con planillas cargadas, separadas entre las que tienen todos
+    los meses del semestre y las que no.
+
+    Returns:
+        tuple: (lista de regiones completas, dict región → meses faltantes "m/aaaa")
+    """
+    regiones = (
+        ArchivoSubido.objects.filter(proceso="planilla_validadora")
+        .values_list("region", flat=True)
+        .distinct()
+    )
+    completas = []
+    incompletas = {}
+    for region in sorted(set(regiones)):
+        archivos, meses_esperados, _ = archivos_semestre_anterior(anio, mes, region)
+        faltantes = meses_esperados - set(archivos.values_list("anio", "mes"))
+        if faltantes:
+            incompletas[region] = [f"{m}/{a}" for a, m in sorted(faltantes)]
+        else:
+            completas.append(region)
+    return completas, incompletas
+
+
+def procesos_disponibles() -> int:
+    """
+    Procesos para el cálculo nacional: HOMOLOGACION_PROCESOS o, si es 0,
+    los núcleos disponibles para este proceso.
+    """
+    if settings.HOMOLOGACION_PROCESOS > 0:
+        return settings.HOMOLOGACION_PROCESOS
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# Parámetros compilados (año → TablaParametros) que recibe cada proceso del
+# pool al iniciar
+_tablas_proceso = {}
+
+
+def _iniciar_proceso(tablas: dict):
+    global _tablas_proceso
+    _tablas_proceso = tablas
+    # Con fork el proceso hereda la medición en curso del padre; la suya va
+    # por separado
+    reiniciar_medicion()
+
+
+def tabla_de_proceso(anio: int, mes: int):
+    """
+    Tabla de parámetros entregada al proceso del pool para ese periodo, o
+    None para que calcular_homologacion la tome de CacheParametros.
+    """
+    return _tablas_proceso.get(anio_parametro(anio, mes))
+
+
+def preparar_remuneraciones(anio: int, mes: int, regiones) -> None:
+    """
+    Carga en RemuneracionMensual los archivos del semestre de cada región que
+    aún no están y pone al día su matriz de sueldos, antes de repartir las
+    regiones en el pool: así los procesos hijos solo leen la tabla y no
+    compiten por escribir en SQLite.
+    """
+    with etapa("cargar_remuneraciones"):
+        for region in regiones:
+            archivos, _, _ = archivos_semestre_anterior(anio, mes, region)
+            cargar_remuneraciones_pendientes(archivos)
+            MatrizSueldos(region).consolidar(archivos)
+
+
+def pool_procesos(procesos: int, tablas: dict = None) -> ProcessPoolExecutor:
+    """
+    Pool de procesos para cálculos pesados. Cada proceso recibe una vez las
+    tablas de parámetros ya compiladas en el padre.
+
+    Las escrituras pesadas en la base (carga de RemuneracionMensual) se hacen
+    en el padre antes de crear el pool (preparar_remuneraciones); los hijos
+    solo guardan filas sueltas (caché de resultados, mediciones), que esperan
+    al candado de SQLite según OPTIONS["timeout"] de DATABASES.
+    """
+    # Los procesos hijos abren sus propias conexiones; con fork no deben
+    # heredar las abiertas del padre
+    connections.close_all()
+    return ProcessPoolExecutor(
+        max_workers=procesos,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_iniciar_proceso,
+        initargs=(tablas or {},),
+    )
+
+
+def _homologar_en_proceso(region: int, anio: int, mes: int) -> pd.DataFrame:
+    tabla_param = tabla_de_proceso(anio, mes)
+    with ejecucion_medida("homologacion", region=region, anio=anio, mes=mes):
+        with homologar_region(region, anio, mes, tabla_param) as contenido:
+            return pd.read_parquet(contenido)
+
+
+def homologacion_nacional(anio: int, mes: int, procesos: int = None):
+    """
+    Homologación de todas las regiones con el semestre completo, en un pool
+    de procesos (una región por tarea). La tabla de parámetros se carga una
+    sola vez y se entrega a cada proceso al iniciarlo.
+
+    Returns:
+        tuple: (DataFrame nacional con la columna REGION al inicio,
+            dict de regiones omitidas → meses faltantes)
+    """
+    regiones, omitidas = regiones_con_datos(anio, mes)
+    if not regiones:
+        raise ValueError("Ninguna región tiene cargados todos los meses del semestre.")
+
+    anio_param = anio_parametro(anio, mes)
+    tabla_param = CacheParametros.obtener(anio_param)
+    procesos = min(len(regiones), procesos or procesos_disponibles())
+
+    resultados = {}
+    with etapa("homologar_regiones"):
+        if procesos == 1:
+            for region in regiones:
+                with homologar_region(region, anio, mes, tabla_param) as contenido:
+                    resultados[region] = pd.read_parquet(contenido)
+        else:
+            preparar_remuneraciones(anio, mes, regiones)
+            with pool_procesos(procesos, {anio_param: tabla_param}) as pool:
+                futuros = {
+                    pool.submit(_homologar_en_proceso, region, anio, mes): region
+                    for region in regiones
+                }
+                for futuro in as_completed(futuros):
+                    resultados[futuros[futuro]] = futuro.result()
+
+    with etapa("combinar_regiones") as e:
+        df = pd.concat(
+            [resultados[r].assign(REGION=r) for r in regiones], ignore_index=True
+        )
+        df = e.salida(df[["REGION"] + [c for c in df.columns if c != "REGION"]])
+    return df, {str(r): meses for r, meses in omitidas.items()}
+
+
+def nombre_resultado(trabajo: Trabajo) -> str:
+    """
+    Nombre de descarga del resultado, sin extensión.
+    """
+    return os.path.splitext(trabajo.parametros["nombre_archivo"])[0]
+
+
+class ColaTrabajos:
+    """
+    Cola de trabajos guardada en la base de datos. Las vistas encolan y el
+    comando `procesar_trabajos` los ejecuta fuera del request.
+    """
+
+    @staticmethod
+    def clave_homologacion(region: int, anio: int, mes: int) -> str:
+        return f"homologacion:{region}:{anio}:{mes}"
+
+    @staticmethod
+    def clave_homologacion_nacional(anio: int, mes: int) -> str:
+        return f"homologacion_nacional:{anio}:{mes}"
+
+    @staticmethod
+    def clave_consolidacion(
+        region: int, anio: int, mes_inicio: int, mes_termino: int, proceso: str
+    ) -> str:
+        return f"consolidacion:{proceso}:{region}:{anio}:{mes_inicio}-{mes_termino}"
+
+    @classmethod
+    def encolar(cls, usuario, tipo, region, anio, mes, clave, parametros=None):
+        """
+        Encola un trabajo, salvo que ya haya uno equivalente pendiente o en
+        proceso: en ese caso retorna el existente. La restricción
+        trabajo_activo_unico_por_clave evita que dos solicitudes simultáneas
+        encolen el mismo.
+
+        Returns:
+            tuple: (Trabajo, creado)
+        """
+        cls.recuperar_abandonados()
+        existente = cls._activo(clave)
+        if existente:
+            return existente, False
+
+        try:
+            with transaction.atomic():
+                trabajo = Trabajo.objects.create(
+                    usuario=usuario,
+                    tipo=tipo,
+                    region=region,
+                    anio=anio,
+                    mes=mes,
+                    clave=clave,
+                    parametros=parametros or {},
+                )
+        except IntegrityError:
+            # Otra solicitud lo encoló entre la consulta y la creación
+            existente = cls._activo(clave)
+            if existente is None:
+                raise
+            return existente, False
+        return trabajo, True
+
+    @staticmethod
+    def _activo(clave: str):
+        return (
+            Trabajo.objects.filter(clave=clave, estado__in=Trabajo.ESTADOS_ACTIVOS)
+            .order_by("creado")
+            .first()
+        )
+
+    @staticmethod
+    def recuperar_abandonados(tiempo_maximo: int = None) -> int:
+        """
+        Marca con error los trabajos en proceso iniciados hace más de
+        `tiempo_maximo` segundos (TRABAJOS_TIEMPO_MAXIMO por defecto): el
+        worker que los tomó se detuvo (p. ej. sin memoria o al reiniciar el
+        contenedor) y, mientras sigan activos, bloquean su clave. Con
+        tiempo_maximo=0 se marcan todos.
+
+        Returns:
+            int: trabajos marcados
+        """
+        if tiempo_maximo is None:
+            tiempo_maximo = settings.TRABAJOS_TIEMPO_MAXIMO
+        ahora = timezone.now()
+        return Trabajo.objects.filter(
+            estado="en_proceso", iniciado__lte=ahora - timedelta(seconds=tiempo_maximo)
+        ).update(
+            estado="error",
+            mensaje="El trabajo se interrumpió antes de terminar. Vuelva a solicitarlo.",
+            terminado=ahora,
+        )
+
+    @classmethod
+    def tomar_siguiente(cls):
+        """
+        Marca como en proceso el trabajo pendiente más antiguo y lo retorna.
+        La actualización es condicional, así dos procesos nunca toman el mismo.
+        """
+        cls.recuperar_abandonados()
+        while True:
+            trabajo = (
+                Trabajo.objects.filter(estado="pendiente").order_by("creado").first()
+            )
+            if trabajo is None:
+                return None
+
+            ahora = timezone.now()
+            tomado = Trabajo.objects.filter(pk=trabajo.pk, estado="pendiente").update(
+                estado="en_proceso", iniciado=ahora
+            )
+            if tomado:
+                trabajo.estado = "en_proceso"
+                trabajo.iniciado = ahora
+                return trabajo
+
+    @classmethod
+    def ejecutar(cls, trabajo: Trabajo):
+        """
+        Ejecuta el trabajo y guarda su resultado o el error. Solo se guarda si
+        el trabajo sigue en proceso: si entretanto recuperar_abandonados lo
+        marcó con error (y quizá ya se encoló otro con la misma clave), el
+        resultado se descarta.
+        """
+        try:
+            with ejecucion_medida(
+                trabajo.tipo,
+                region=trabajo.region,
+                anio=trabajo.anio,
+                mes=trabajo.mes,
+                trabajo=trabajo.pk,
+            ):
+                if trabajo.tipo == "homologacion":
+                    contenido = cls._ejecutar_homologacion(trabajo)
+                elif trabajo.tipo == "homologacion_nacional":
+                    contenido = cls._ejecutar_homologacion_nacional(trabajo)
+                elif trabajo.tipo == "consolidacion":
+                    contenido = cls._ejecutar_consolidacion(trabajo)
+                else:
+                    raise ValueError(f"Tipo de trabajo desconocido: {trabajo.tipo}")
+
+                # El resultado se guarda en Parquet; al descargarlo se exporta
+                # al formato pedido (XLSX, CSV o CSV gzip)
+                with contenido, etapa("guardar_archivo"):
+                    trabajo.archivo.save(
+                        f"{nombre_resultado(trabajo)}.parquet",
+                        File(contenido),
+                        save=False,
+                    )
+            trabajo.estado = "terminado"
+            trabajo.mensaje = ""
+        except Exception as e:
+            trabajo.estado = "error"
+            trabajo.mensaje = str(e)
+
+        trabajo.terminado = timezone.now()
+        guardado = Trabajo.objects.filter(pk=trabajo.pk, estado="en_proceso").update(
+            estado=trabajo.estado,
+            mensaje=trabajo.mensaje,
+            archivo=trabajo.archivo.name or "",
+            parametros=trabajo.parametros,
+            terminado=trabajo.terminado,
+        )
+        if not guardado:
+            if trabajo.archivo:
+                trabajo.archivo.delete(save=False)
+            trabajo.refresh_from_db()
+        return trabajo
+
+    @staticmethod
+    def _ejecutar_homologacion(trabajo: Trabajo):
+        return homologar_region(trabajo.region, trabajo.anio, trabajo.mes)
+
+    @staticmethod
+    def _ejecutar_homologacion_nacional(trabajo: Trabajo):
+        df, omitidas = homologacion_nacional(trabajo.anio, trabajo.mes)
+        trabajo.parametros["regiones_omitidas"] = omitidas
+        return resultado_temporal(df)
+
+    @staticmethod
+    def _ejecutar_consolidacion(trabajo: Trabajo):
+        parametros = trabajo.parametros
+        archivos = archivos_consolidacion(
+            trabajo.anio,
+            parametros["mes_inicio"],
+            parametros["mes_termino"],
+            trabajo.region,
+            parametros["proceso"],
+        )
+        with etapa("leer_archivos") as e:
+            df = e.salida(leer_archivos(archivos))
+        with etapa("escribir_resultado", df):
+            return resultado_temporal(df)
@@ -1,3 +1,732 @@
-from django.test import TestCase
+import gzip
+import io
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .df_utils import fechas
+from .df_utils.agregar_columnas.region import decodificar_region
+from .df_utils.calculos import anio_parametro, compilar_parametros
+from .df_utils.consolidar import consolidar_sueldos
+from .df_utils.exportacion import bloques_dataframe, csv_en_bloques, escribir_excel
+from .df_utils.lectura import leer_planilla_por_bloques
+from .df_utils.limpieza import limpiar_categorica
+from .df_utils.sintetico import TIPO, generar_parametros, generar_planilla
+from .df_utils.validaciones_rut import (
+    calcular_dv,
+    calcular_dv_vectorizado,
+    mascaras_rut,
+    normalizar_y_validar_rut,
+)
+from .models import (
+    ArchivoSubido,
+    PerfilUsuario,
+    Region,
+    ResultadoHomologacion,
+    Trabajo,
+)
+from .services.cache_homologacion import CacheHomologacion
+from .services.cache_validacion import CacheValidacion
+from .services.errores_validacion import guardar_errores
+from .services.matriz_sueldos import MatrizSueldos
+from .services.planilla_validadora import PlanillaValidadora
+from .services.remuneraciones import cargar_remuneraciones, consolidar_remuneraciones
+from .services.trabajos import ColaTrabajos, archivos_semestre_anterior, leer_archivos
+from .views.helpers import calcular_homologacion, validar_planilla_por_bloques
+from .views.uploads import _recibir_planilla_validadora
+
+
+def archivo_csv(df: pd.DataFrame, nombre: str = "planilla.csv"):
+    return SimpleUploadedFile(nombre, df.to_csv(index=False).encode("utf-8"))
+
+
+def archivo_xlsx(df: pd.DataFrame, nombre: str = "planilla.xlsx"):
+    contenido = io.BytesIO()
+    df.to_excel(contenido, index=False)
+    return SimpleUploadedFile(nombre, contenido.getvalue())
+
+
+def errores_por_tipo(validador: PlanillaValidadora) -> dict:
+    return {
+        clave: validador.errores.filas(*clave).tolist()
+        for clave in validador.errores.totales
+    }
+
+
+class LimpiezaCategoricaTests(TestCase):
+    def test_quita_espacios_y_vacios(self):
+        serie = pd.Series([" a", "a ", "  ", None, "b"], dtype="category")
+        limpia = limpiar_categorica(serie)
+        self.assertEqual(list(limpia.cat.categories), ["a", "b"])
+        self.assertEqual(limpia.isna().tolist(), [False, False, True, True, False])
+
+    def test_columna_sin_categorias(self):
+        serie = pd.Series([None, None], dtype="category")
+        limpia = limpiar_categorica(serie)
+        self.assertTrue(limpia.isna().all())
+
+
+class ColumnaEnumeradaVaciaTests(TestCase):
+    def test_validacion_por_bloques(self):
+        df = generar_planilla(120, 2025, 3)
+        df["NIVEL_ATENCION"] = None
+        validador = PlanillaValidadora(TIPO)
+
+        valido, _ = validador.validar_por_bloques(
+            archivo_csv(df), 2025, 3, tamano_bloque=50
+        )
+
+        self.assertFalse(valido)
+        self.assertEqual(validador.errores.generales, [])
+        self.assertEqual(validador.errores.totales[("NIVEL_ATENCION", "vacio")], 120)
+        self.assertNotIn(("NIVEL_ATENCION", "no_permitido"), validador.errores.totales)
+
+    def test_vacios_parciales_una_vez(self):
+        df = generar_planilla(120, 2025, 3)
+        df.loc[:9, "CARGO"] = None
+        validador = PlanillaValidadora(TIPO)
+
+        validador.validar_por_bloques(archivo_csv(df), 2025, 3, tamano_bloque=50)
+
+        self.assertEqual(dict(validador.errores.totales), {("CARGO", "vacio"): 10})
+
+
+class ValidacionCSVXLSXTests(TestCase):
+    def validar(self, archivo, tamano_bloque=100):
+        validador = PlanillaValidadora(TIPO)
+        valido, _ = validador.validar_por_bloques(
+            archivo, 2025, 3, tamano_bloque=tamano_bloque
+        )
+        return valido, validador
+
+    def test_planilla_sin_errores(self):
+        df = generar_planilla(300, 2025, 3, semilla=1)
+        for archivo in (archivo_csv(df), archivo_xlsx(df)):
+            valido, validador = self.validar(archivo)
+            self.assertTrue(valido, archivo.name)
+            self.assertEqual(len(validador.errores), 0)
+
+    def test_mismos_errores_en_csv_y_xlsx(self):
+        df = generar_planilla(300, 2025, 3, tasa_errores=0.1, semilla=2)
+
+        _, desde_csv = self.validar(archivo_csv(df))
+        _, desde_xlsx = self.validar(archivo_xlsx(df))
+
+        self.assertEqual(
+            {columna for columna, _ in desde_csv.errores.totales},
+            {"RUT", "SUELDO_BASE", "JORNADA_HORAS", "CARGO", "NOMBRE"},
+        )
+        self.assertEqual(errores_por_tipo(desde_csv), errores_por_tipo(desde_xlsx))
+
+    def test_filas_segun_archivo_completo(self):
+        df = generar_planilla(300, 2025, 3, tasa_errores=0.1, semilla=2)
+
+        _, por_bloques = self.validar(archivo_csv(df), tamano_bloque=40)
+        _, en_un_bloque = self.validar(archivo_csv(df), tamano_bloque=1_000)
+
+        self.assertEqual(errores_por_tipo(por_bloques), errores_por_tipo(en_un_bloque))
+
+
+class SubidaPlanillaCSRFTests(TestCase):
+    TOKEN = "a" * 32
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.usuario = User.objects.create_user("analista")
+        PerfilUsuario.objects.create(
+            usuario=self.usuario, region=Region.objects.create(nombre="Metropolitana")
+        )
+
+    def subir(self, token: str):
+        df = generar_planilla(50, 2025, 3, semilla=1)
+        datos = {"anio": 2025, "mes": 3, "archivo": archivo_csv(df)}
+        if token:
+            datos["csrfmiddlewaretoken"] = token
+        request = RequestFactory().post("/subir/planilla_validadora/", datos)
+        request.COOKIES["csrftoken"] = self.TOKEN
+        request.user = self.usuario
+        with mock.patch.object(
+            CacheValidacion, "validar", wraps=CacheValidacion.validar
+        ) as validar:
+            respuesta = _recibir_planilla_validadora(request)
+        return respuesta, validar
+
+    def test_token_incorrecto_no_valida(self):
+        for token in (None, "b" * 32):
+            respuesta, validar = self.subir(token)
+            self.assertEqual(respuesta.status_code, 403)
+            validar.assert_not_called()
+        self.assertFalse(ArchivoSubido.objects.exists())
+
+    def test_token_correcto_valida(self):
+        respuesta, validar = self.subir(self.TOKEN)
+
+        self.assertEqual(respuesta.status_code, 200)
+        validar.assert_called_once()
+        self.assertTrue(ArchivoSubido.objects.filter(anio=2025, mes=3).exists())
+
+
+class ExportacionTests(TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame(
+            {
+                "RUT": [f"{i}-{i % 10}" for i in range(25)],
+                "SUELDO": np.arange(25) * 1000.0,
+                "DETALLE_MESES": [[i, i + 1] for i in range(25)],
+            }
+        )
+
+    def test_excel_reparte_filas_en_hojas(self):
+        nombre = "Consolidado_de_una_region_muy_largo"
+        contenido = io.BytesIO()
+        escribir_excel(
+            contenido,
+            {nombre: bloques_dataframe(self.df, tamano_bloque=7), "Vacia": self.df.head(0)},
+            max_filas_hoja=10,
+        )
+
+        hojas = pd.read_excel(io.BytesIO(contenido.getvalue()), sheet_name=None)
+        self.assertEqual(
+            list(hojas),
+            [nombre[:31], nombre[:29] + "_2", nombre[:29] + "_3", "Vacia"],
+        )
+        self.assertEqual([len(h) for h in hojas.values()], [10, 10, 5, 0])
+        leido = pd.concat(list(hojas.values())[:3], ignore_index=True)
+        pd.testing.assert_series_equal(leido["RUT"], self.df["RUT"])
+        self.assertEqual(leido["DETALLE_MESES"].iloc[3], "[3, 4]")
+
+    def test_csv_gzip_igual_a_csv(self):
+        plano = b"".join(csv_en_bloques(bloques_dataframe(self.df, 7)))
+        comprimido = b"".join(
+            csv_en_bloques(bloques_dataframe(self.df, 7), comprimir=True)
+        )
+
+        self.assertEqual(gzip.decompress(comprimido), plano)
+        self.assertEqual(plano.decode("utf-8"), self.df.to_csv(index=False))
+
+
+class InvalidarCacheHomologacionTests(TestCase):
+    PERIODOS = [(anio, mes) for anio in (2024, 2025) for mes in range(1, 13)]
+
+    def crear_resultados(self, region: int = 5):
+        for anio, mes in self.PERIODOS:
+            ResultadoHomologacion.objects.create(
+                region=region,
+                anio=anio,
+                mes=mes,
+                anio_parametro=anio_parametro(anio, mes),
+                clave=f"{region}-{anio}-{mes}",
+            )
+
+    def en_cache(self, region: int = 5) -> set:
+        return set(
+            ResultadoHomologacion.objects.filter(region=region).values_list(
+                "anio", "mes"
+            )
+        )
+
+    def test_archivo_invalida_los_meses_que_lo_usan(self):
+        for anio, mes in self.PERIODOS:
+            with self.subTest(archivo=(anio, mes)):
+                ResultadoHomologacion.objects.all().delete()
+                self.crear_resultados()
+                self.crear_resultados(region=13)
+
+                CacheHomologacion.invalidar_archivo(5, anio, mes)
+
+                # Quedan justo los resultados cuyo cálculo no usa ese archivo
+                usan_archivo = {
+                    periodo
+                    for periodo in self.PERIODOS
+                    if (anio, mes) in archivos_semestre_anterior(*periodo, 5)[1]
+                }
+                self.assertEqual(self.en_cache(), set(self.PERIODOS) - usan_archivo)
+                self.assertEqual(self.en_cache(region=13), set(self.PERIODOS))
+
+    def test_semestre_anterior_completo(self):
+        # Marzo de 2025 usa los seis meses de julio a diciembre de 2024
+        for mes in range(7, 13):
+            with self.subTest(mes=mes):
+                ResultadoHomologacion.objects.all().delete()
+                self.crear_resultados()
+
+                CacheHomologacion.invalidar_archivo(5, 2024, mes)
+
+                self.assertNotIn((2025, 3), self.en_cache())
+                self.assertIn((2024, mes - 1), self.en_cache())
+
+    def test_parametro(self):
+        self.crear_resultados()
+        self.crear_resultados(region=13)
+
+        CacheHomologacion.invalidar_parametro(2025)
+
+        # El parámetro de 2025 se usa de julio de 2024 a junio de 2025
+        restantes = {
+            (anio, mes)
+            for anio, mes in self.PERIODOS
+            if (anio, mes) < (2024, 7) or (anio, mes) > (2025, 6)
+        }
+        self.assertEqual(self.en_cache(), restantes)
+        self.assertEqual(self.en_cache(region=13), restantes)
+
+
+class FallaRapidaTests(TestCase):
+    def validar(self, df, falla_rapida=True, mes=3, **kwargs):
+        """
+        Valida en bloques de 50 filas. Retorna el validador y cuántos bloques
+        se leyeron del archivo.
+        """
+        leidos = []
+
+        def leer_contando(*args, **kwargs_lectura):
+            for bloque in leer_planilla_por_bloques(*args, **kwargs_lectura):
+                leidos.append(len(bloque))
+                yield bloque
+
+        validador = PlanillaValidadora(TIPO, falla_rapida=falla_rapida, **kwargs)
+        with mock.patch(
+            "analyst.services.planilla_validadora.leer_planilla_por_bloques",
+            leer_contando,
+        ):
+            validador.validar_por_bloques(archivo_csv(df), 2025, mes, tamano_bloque=50)
+        return validador, len(leidos)
+
+    def test_plantilla_incorrecta(self):
+        df = generar_planilla(500, 2025, 3, semilla=1).drop(
+            columns=["SUELDO_BASE", "CARGO"]
+        )
+
+        validador, leidos = self.validar(df)
+        self.assertIn("no corresponde a la plantilla", validador.errores.detenida)
+        self.assertIn("faltan 2 de", validador.errores.detenida)
+        self.assertEqual(leidos, 1)
+
+        validador, leidos = self.validar(df, falla_rapida=False)
+        self.assertEqual(validador.errores.detenida, "")
+        self.assertEqual(leidos, 10)
+
+    def test_periodo_incorrecto(self):
+        df = generar_planilla(500, 2024, 4, semilla=1)
+
+        validador, leidos = self.validar(df)
+        self.assertIn("periodo seleccionado", validador.errores.detenida)
+        self.assertEqual(leidos, 1)
+
+        validador, leidos = self.validar(df, falla_rapida=False)
+        self.assertEqual(validador.errores.detenida, "")
+        self.assertEqual(leidos, 10)
+
+    def test_presupuesto_agotado(self):
+        df = generar_planilla(500, 2025, 3, tasa_errores=0.3, semilla=1)
+
+        validador, leidos = self.validar(df, max_errores_columna=5)
+        self.assertTrue(validador.errores.detenida)
+        # El bloque que agota el presupuesto se valida completo y el
+        # siguiente solo se lee para saber que quedaban filas
+        self.assertEqual(leidos, 2)
+        self.assertEqual(validador.desplazamiento_filas, 50)
+
+        validador, leidos = self.validar(df, falla_rapida=False, max_errores_columna=5)
+        self.assertEqual(validador.errores.detenida, "")
+        self.assertEqual(validador.desplazamiento_filas, 500)
+        self.assertEqual(leidos, 10)
+
+
+class ErroresValidacionTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=media, VALIDACION_ERRORES_POR_PAGINA=7)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.usuario = User.objects.create_user("analista")
+        self.client.force_login(self.usuario)
+
+    def test_paginas_y_reporte_coinciden_con_totales(self):
+        df = generar_planilla(300, 2025, 3, tasa_errores=0.2, semilla=3)
+        validador = PlanillaValidadora(TIPO)
+        validador.validar_por_bloques(archivo_csv(df), 2025, 3, tamano_bloque=100)
+        registro = validador.errores
+        errores = guardar_errores(registro, self.usuario, 13, 2025, 3, "planilla.csv")
+        url = reverse("detalle_errores_validacion", args=[errores.id])
+
+        self.assertEqual(errores.total, len(registro))
+        # Varias páginas por error
+        self.assertGreater(min(registro.totales.values()), 7)
+        for (columna, codigo), total in registro.totales.items():
+            filas = []
+            pagina = 1
+            while True:
+                respuesta = self.client.get(
+                    url, {"columna": columna, "codigo": codigo, "pagina": pagina}
+                )
+                filas += [fila["FILA"] for fila in respuesta.context["filas"]]
+                if not respuesta.context["pagina"].has_next():
+                    break
+                pagina += 1
+            self.assertEqual(filas, registro.filas(columna, codigo).tolist())
+            self.assertEqual(len(filas), total)
+
+        respuesta = self.client.get(
+            reverse("descargar_errores_validacion", args=[errores.id]),
+            {"formato": "csv"},
+        )
+        reporte = pd.read_csv(io.BytesIO(b"".join(respuesta.streaming_content)))
+        por_error = reporte.groupby(["COLUMNA", "CODIGO"], dropna=False).size()
+        self.assertEqual(
+            {clave: total for clave, total in por_error.items() if clave[1] != "general"},
+            registro.totales,
+        )
+        self.assertEqual(len(reporte), len(registro))
+
+
+def rut_con_dv(cuerpo: int, dv: str) -> str:
+    """Primer RUT desde `cuerpo` cuyo dígito verificador es `dv`."""
+    while calcular_dv(str(cuerpo)) != dv:
+        cuerpo += 1
+    return f"{cuerpo}-{dv}"
+
+
+class RutTests(TestCase):
+    def test_dv_vectorizado_igual_a_por_fila(self):
+        rng = np.random.default_rng(7)
+        # Hasta 18 dígitos se calcula con int64; los más largos, desde el texto
+        cuerpos = [
+            "".join(map(str, rng.integers(0, 10, largo)))
+            for largo in rng.integers(1, 25, 2_000)
+        ] + ["0", "00012345", "9" * 18, "9" * 19]
+        esperado = [calcular_dv(c) for c in cuerpos]
+
+        self.assertEqual(calcular_dv_vectorizado(pd.Series(cuerpos)).tolist(), esperado)
+        self.assertTrue({"K", "0"} <= set(esperado))
+
+    def test_mascaras_igual_a_por_fila(self):
+        valores = [
+            rut_con_dv(12_345_678, "K"),
+            rut_con_dv(12_345_678, "K").lower(),
+            rut_con_dv(7_654_321, "0"),
+            "12.345.678-5",
+            "12.345.678-6",  # dígito verificador incorrecto
+            " 5.126.663-3 ",
+            "51266633",
+            "0005126663-3",
+            "12.345.678",
+            "abc",
+            "1",
+            "-5",
+            "12-34-5",
+            "K-K",
+            "",
+            "   ",
+            None,
+            np.nan,
+        ]
+        df = pd.DataFrame({"RUT": valores})
+
+        vacios, invalidos = mascaras_rut(df)
+
+        for pos, valor in enumerate(valores):
+            with self.subTest(valor=valor):
+                vacio = pd.isna(valor) or str(valor).strip() == ""
+                normalizado = None if vacio else normalizar_y_validar_rut(str(valor))
+                self.assertEqual(vacios[pos], vacio)
+                self.assertEqual(invalidos[pos], not vacio and normalizado is None)
+                if normalizado is not None:
+                    self.assertEqual(df["RUT"].iat[pos], normalizado)
+        self.assertEqual(df["RUT"].iat[0][-2:], "-K")
+        self.assertEqual(df["RUT"].iat[1][-2:], "-K")
+        self.assertEqual(df["RUT"].iat[3], "12345678-5")
+        self.assertEqual(df["RUT"].iat[7], "5126663-3")
+
+
+class RegionTests(TestCase):
+    @staticmethod
+    def region_por_fila(codigo):
+        """Decodificación fila a fila, como antes de decodificar_region."""
+        codigo = str(codigo).strip()
+        if not codigo.isdigit():
+            return None, f"Error calculando región; Código no numérico: {codigo}"
+        if len(codigo) == 7:
+            return int(codigo[0]), ""
+        if len(codigo) == 8:
+            return int(codigo[:2]), ""
+        return None, f"Error calculando región; Longitud inválida: {codigo}"
+
+    def test_igual_a_por_fila(self):
+        codigos = pd.Series(
+            [
+                5_123_456,
+                13_000_001,
+                "1234567",
+                " 16000123 ",
+                "123456",
+                "123456789",
+                "12a4567",
+                "",
+                None,
+                np.nan,
+                5_123_456,
+                13_000_001.0,
+            ],
+            dtype=object,
+            index=range(10, 22),
+        )
+
+        regiones, mensajes = decodificar_region(codigos)
+
+        self.assertTrue(regiones.index.equals(codigos.index))
+        for codigo, region, mensaje in zip(codigos, regiones, mensajes):
+            with self.subTest(codigo=codigo):
+                esperada, mensaje_esperado = self.region_por_fila(codigo)
+                self.assertEqual(None if pd.isna(region) else region, esperada)
+                self.assertEqual(mensaje, mensaje_esperado)
+        self.assertEqual(regiones.iloc[:4].tolist(), [5, 13, 1, 16])
+
+    def test_columnas_numericas_igual_a_por_fila(self):
+        for codigos in (
+            pd.Series([5_123_456, None, 13_000_001, 123_456], dtype="Int64"),
+            pd.Series([5_123_456.0, np.nan, 13_000_001.0]),
+            pd.Series([5_123_456, 13_000_001, 5_123_456]),
+        ):
+            with self.subTest(dtype=codigos.dtype):
+                regiones, mensajes = decodificar_region(codigos)
+                esperado = [self.region_por_fila(codigo) for codigo in codigos]
+                self.assertEqual(
+                    [None if pd.isna(r) else r for r in regiones],
+                    [region for region, _ in esperado],
+                )
+                self.assertEqual(mensajes.tolist(), [mensaje for _, mensaje in esperado])
+
+
+class HomologacionTablaHechosTests(TestCase):
+    """
+    La homologación con los sueldos de RemuneracionMensual debe coincidir
+    con la que consolida los sueldos leyendo los archivos del semestre.
+    """
+
+    REGION = 13
+    MESES = [(2024, m) for m in range(7, 13)] + [(2025, 1), (2025, 2)]
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.usuario = User.objects.create_user("analista")
+        for anio, mes in self.MESES:
+            self.subir(anio, mes)
+        self.tabla = compilar_parametros(generar_parametros())
+
+    def subir(self, anio, mes, semilla=5):
+        """Guarda la planilla como la vista: Parquet validado y sus remuneraciones."""
+        df = generar_planilla(150, anio, mes, region=self.REGION, semilla=semilla)
+        valido, temporal, _ = validar_planilla_por_bloques(archivo_csv(df), TIPO)
+        self.assertTrue(valido)
+        archivo = ArchivoSubido(
+            usuario=self.usuario, region=self.REGION, anio=anio, mes=mes, proceso=TIPO
+        )
+        with temporal:
+            archivo.archivo.save(f"{anio}_{mes}_{semilla}.parquet", File(temporal))
+        cargar_remuneraciones(archivo)
+        MatrizSueldos(self.REGION).actualizar_mes(anio, mes)
+        return archivo
+
+    def subir_sin_matriz(self, anio, mes):
+        with mock.patch.object(MatrizSueldos, "actualizar_mes"):
+            return self.subir(anio, mes, semilla=7)
+
+    def sueldos_desde_archivos(self, archivos):
+        return consolidar_sueldos(leer_archivos(archivos))
+
+    def test_mismo_resultado(self):
+        archivos, _, _ = archivos_semestre_anterior(2025, 2, self.REGION)
+
+        desde_archivos = calcular_homologacion(
+            leer_archivos(archivos), 2025, 2, tabla_param=self.tabla
+        )
+        desde_tabla = calcular_homologacion(
+            leer_archivos(archivos.filter(anio=2025, mes=2)),
+            2025,
+            2,
+            df_sueldos=consolidar_remuneraciones(self.REGION, archivos),
+            tabla_param=self.tabla,
+        )
+
+        self.assertEqual(len(desde_tabla), 150)
+        pd.testing.assert_frame_equal(desde_tabla, desde_archivos)
+
+    def test_matriz_igual_a_consolidar(self):
+        archivos, _, _ = archivos_semestre_anterior(2025, 2, self.REGION)
+
+        matriz = MatrizSueldos(self.REGION).consolidar(archivos)
+
+        pd.testing.assert_frame_equal(
+            matriz, consolidar_remuneraciones(self.REGION, archivos)
+        )
+        pd.testing.assert_frame_equal(
+            matriz, self.sueldos_desde_archivos(archivos), check_dtype=False
+        )
+
+    def test_matriz_se_actualiza_por_mes(self):
+        matriz = MatrizSueldos(self.REGION)
+        archivos, _, _ = archivos_semestre_anterior(2025, 2, self.REGION)
+        matriz.consolidar(archivos)
+
+        # Quitar un mes
+        ArchivoSubido.objects.filter(anio=2024, mes=9).delete()
+        matriz.actualizar_mes(2024, 9)
+        self.assertNotIn("2024_9", matriz._meses_guardados())
+        self.assertNotIn("2024_9", matriz.consolidar(archivos).columns)
+
+        # Reemplazar otro por una planilla distinta
+        ArchivoSubido.objects.filter(anio=2024, mes=10).delete()
+        self.subir(2024, 10, semilla=9)
+        with mock.patch(
+            "analyst.services.matriz_sueldos.sueldos_remuneraciones"
+        ) as consulta:
+            sueldos = matriz.consolidar(archivos)
+        consulta.assert_not_called()
+        pd.testing.assert_frame_equal(
+            sueldos, self.sueldos_desde_archivos(archivos), check_dtype=False
+        )
+
+    def test_matriz_recalcula_meses_desactualizados(self):
+        matriz = MatrizSueldos(self.REGION)
+        # Sin actualizar_mes: la columna guardada ya no corresponde al archivo
+        ArchivoSubido.objects.filter(anio=2024, mes=11).delete()
+        nuevo = self.subir_sin_matriz(2024, 11)
+        archivos, _, _ = archivos_semestre_anterior(2025, 2, self.REGION)
+
+        sueldos = matriz.consolidar(archivos)
+
+        self.assertEqual(matriz._meses_guardados()["2024_11"]["archivos"], [nuevo.id])
+        pd.testing.assert_frame_equal(
+            sueldos, self.sueldos_desde_archivos(archivos), check_dtype=False
+        )
+
+
+class CacheFechasTests(TestCase):
+    def test_hilos_con_cache_que_se_vacia(self):
+        """
+        Varios hilos interpretan fechas mientras el caché se vacía a cada
+        rato: ninguno debe fallar ni recibir fechas de otro.
+        """
+        errores = []
+
+        def interpretar(semilla):
+            rng = np.random.default_rng(semilla)
+            for _ in range(50):
+                esperadas = pd.Timestamp("2000-01-01") + pd.to_timedelta(
+                    rng.integers(0, 5_000, 200), "D"
+                )
+                textos = pd.Series(esperadas.strftime("%d/%m/%Y"))
+                try:
+                    obtenidas, _ = fechas.interpretar_fechas(textos)
+                    if not (pd.DatetimeIndex(obtenidas) == esperadas).all():
+                        errores.append("fechas distintas")
+                except Exception as e:
+                    errores.append(repr(e))
+
+        with mock.patch.object(fechas, "MAX_CACHE_FECHAS", 300):
+            hilos = [threading.Thread(target=interpretar, args=(i,)) for i in range(6)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+
+        self.assertEqual(errores, [])
+
+
+class ColaTrabajosTests(TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user("analista")
+
+    def encolar(self, clave="homologacion:13:2025:2"):
+        return ColaTrabajos.encolar(self.usuario, "homologacion", 13, 2025, 2, clave)
+
+    def test_reutiliza_trabajo_activo(self):
+        trabajo, creado = self.encolar()
+        repetido, creado_repetido = self.encolar()
+
+        self.assertTrue(creado)
+        self.assertFalse(creado_repetido)
+        self.assertEqual(repetido.pk, trabajo.pk)
+
+    def test_un_activo_por_clave(self):
+        self.encolar()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Trabajo.objects.create(
+                usuario=self.usuario,
+                tipo="homologacion",
+                region=13,
+                anio=2025,
+                mes=2,
+                clave="homologacion:13:2025:2",
+            )
+
+    @override_settings(TRABAJOS_TIEMPO_MAXIMO=3600)
+    def test_trabajo_abandonado(self):
+        trabajo, _ = self.encolar()
+        Trabajo.objects.filter(pk=trabajo.pk).update(
+            estado="en_proceso", iniciado=timezone.now() - timedelta(hours=2)
+        )
+
+        nuevo, creado = self.encolar()
+
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, "error")
+        self.assertTrue(creado)
+        self.assertNotEqual(nuevo.pk, trabajo.pk)
+
+    @override_settings(TRABAJOS_TIEMPO_MAXIMO=3600)
+    def test_trabajo_en_curso_no_se_recupera(self):
+        trabajo, _ = self.encolar()
+        tomado = ColaTrabajos.tomar_siguiente()
+
+        self.assertEqual(tomado.pk, trabajo.pk)
+        self.assertEqual(ColaTrabajos.recuperar_abandonados(), 0)
+        self.assertEqual(ColaTrabajos.recuperar_abandonados(0), 1)
+
+    def test_no_sobrescribe_trabajo_recuperado(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        trabajo, _ = self.encolar()
+        trabajo.parametros = {"nombre_archivo": "resultado.xlsx"}
+        trabajo.save()
+        tomado = ColaTrabajos.tomar_siguiente()
+
+        def homologar(trabajo):
+            # El worker se da por abandonado mientras calcula
+            ColaTrabajos.recuperar_abandonados(0)
+            return io.BytesIO(b"resultado")
+
+        with override_settings(MEDIA_ROOT=media), mock.patch.object(
+            ColaTrabajos, "_ejecutar_homologacion", side_effect=homologar
+        ):
+            ColaTrabajos.ejecutar(tomado)
+
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, "error")
+        self.assertFalse(trabajo.archivo)
+        self.assertEqual(tomado.estado, "error")
@@ -0,0 +1,40 @@
+import hashlib
+
+from django.core.files.uploadhandler import FileUploadHandler
+
+from analyst.services.cache_homologacion import hash_archivo
+
+
+class HashContenidoUploadHandler(FileUploadHandler):
+    """
+    Calcula el SHA-256 de cada archivo mientras se recibe, sin guardarlo: los
+    bloques siguen a los demás manejadores (memoria o archivo temporal). El
+    hash queda en `request.hashes_subidos[nombre del campo]`.
+
+    Debe ir primero en FILE_UPLOAD_HANDLERS.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not hasattr(self.request, "hashes_subidos"):
+            self.request.hashes_subidos = {}
+        self.request.hashes_subidos[self.field_name] = self.sha.hexdigest()
+        return None
+
+
+def hash_subido(request, campo: str) -> str:
+    """
+    SHA-256 del archivo subido en `campo`: el calculado al recibirlo o, si
+    no pasó por HashContenidoUploadHandler, leyéndolo completo.
+    """
+    hashes = getattr(request, "hashes_subidos", {})
+    if campo in hashes:
+        return hashes[campo]
+    return hash_archivo(request.FILES[campo])
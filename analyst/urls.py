@@ -6,6 +6,8 @@ from analyst.views.uploads import (
     subir_planilla_validadora,
     listar_archivos_subidos,
     eliminar_archivo_subido,
+    detalle_errores_validacion,
+    descargar_errores_validacion,
 )
 
 from analyst.views.parametros import (
@@ -16,7 +18,9 @@ from analyst.views.parametros import (
 from analyst.views.consolidar import (
     consolidar_archivos,
     consolidar_semestre_anterior,
+    homologacion_nacional,
 )
+from analyst.views.trabajos import descargar_trabajo, estado_trabajo
 from analyst.views.diccionarios import diccionario_planilla_validadora
 from analyst.views.helpers import descargar_plantilla_excel
 
@@ -44,6 +48,16 @@ urlpatterns = [
         name="descargar_plantilla_excel",
     ),
     path("mis-archivos/", listar_archivos_subidos, name="listar_archivos_subidos"),
+    path(
+        "errores-validacion/<int:errores_id>/",
+        detalle_errores_validacion,
+        name="detalle_errores_validacion",
+    ),
+    path(
+        "errores-validacion/<int:errores_id>/descargar/",
+        descargar_errores_validacion,
+        name="descargar_errores_validacion",
+    ),
     path(
         "eliminar_archivo/<int:archivo_id>/",
         eliminar_archivo_subido,
@@ -54,6 +68,17 @@ urlpatterns = [
         consolidar_semestre_anterior,
         name="consolidar_semestre_anterior",
     ),
+    path(
+        "consolidar/nacional/",
+        homologacion_nacional,
+        name="homologacion_nacional",
+    ),
+    path("trabajos/<int:trabajo_id>/", estado_trabajo, name="estado_trabajo"),
+    path(
+        "trabajos/<int:trabajo_id>/descargar/",
+        descargar_trabajo,
+        name="descargar_trabajo",
+    ),
     path(
         "subir-parametro-remuneracional/",
         subir_parametro_remuneracional,
@@ -1,15 +1,24 @@
-import io
-import pandas as pd
+import os
 
+from asgiref.sync import sync_to_async
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
-from django.shortcuts import render
-from django.db.models import Q
+from django.shortcuts import redirect, render
 
-from analyst.forms import ConsolidarForm, SemestreAnteriorForm
+from analyst.forms import (
+    ConsolidarForm,
+    HomologacionNacionalForm,
+    SemestreAnteriorForm,
+)
 from analyst.models import ArchivoSubido, Region
-from analyst.views.helpers import calcular_homologacion
+from analyst.services.cache_homologacion import CacheHomologacion
+from analyst.services.trabajos import (
+    ColaTrabajos,
+    archivos_consolidacion,
+    archivos_semestre_anterior,
+    regiones_con_datos,
+)
+from analyst.views.helpers import respuesta_resultado_async
 
 
 @staff_member_required
@@ -36,49 +45,31 @@ def consolidar_archivos(request):
                     {"form": form, "mensaje": mensaje},
                 )
 
-            archivos = ArchivoSubido.objects.filter(
-                anio=anio,
-                region=region,
-                proceso=proceso,
-                mes__gte=mes_inicio,
-                mes__lte=mes_termino,
+            archivos = archivos_consolidacion(
+                anio, mes_inicio, mes_termino, region, proceso
             )
 
             if not archivos.exists():
                 mensaje = "No se encontraron archivos para esos filtros."
             else:
-                dfs = []
-                for archivo in archivos:
-                    try:
-                        df = pd.read_csv(archivo.archivo.path)
-                        dfs.append(df)
-                    except Exception as e:
-                        mensaje = f"Error leyendo archivo {archivo.archivo.name}: {e}"
-                        break
-
-                if mensaje:
-                    return render(
-                        request,
-                        "analyst/consolidar_admin.html",
-                        {"form": form, "mensaje": mensaje},
-                    )
-
-                df_consolidado = pd.concat(dfs, ignore_index=True)
-
-                output = io.BytesIO()
-                with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-                    df_consolidado.to_excel(
-                        writer, index=False, sheet_name="Consolidado"
-                    )
-
-                output.seek(0)
                 filename = f"consolidado_{proceso}_{region}_{anio}_{mes_inicio:02d}_{mes_termino:02d}.xlsx"
-                response = HttpResponse(
-                    output.read(),
-                    content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                trabajo, _ = ColaTrabajos.encolar(
+                    usuario=request.user,
+                    tipo="consolidacion",
+                    region=region,
+                    anio=anio,
+                    mes=mes_termino,
+                    clave=ColaTrabajos.clave_consolidacion(
+                        region, anio, mes_inicio, mes_termino, proceso
+                    ),
+                    parametros={
+                        "mes_inicio": mes_inicio,
+                        "mes_termino": mes_termino,
+                        "proceso": proceso,
+                        "nombre_archivo": filename,
+                    },
                 )
-                response["Content-Disposition"] = f"attachment; filename={filename}"
-                return response
+                return redirect("estado_trabajo", trabajo_id=trabajo.id)
         else:
             mensaje = "Formulario inválido, revise los datos."
     else:
@@ -95,7 +86,23 @@ def consolidar_archivos(request):
 
 
 @login_required
-def consolidar_semestre_anterior(request):
+async def consolidar_semestre_anterior(request):
+    """
+    Vista async: el formulario y las consultas se atienden fuera del ciclo
+    de eventos y un cálculo ya guardado se exporta en el ejecutor acotado.
+    """
+    respuesta = await sync_to_async(_consolidar_semestre_anterior)(request)
+    if isinstance(respuesta, tuple):
+        archivo, nombre = respuesta
+        return await respuesta_resultado_async(request, archivo, nombre, "xlsx")
+    return respuesta
+
+
+def _consolidar_semestre_anterior(request):
+    """
+    Retorna la respuesta del formulario o, si el cálculo pedido ya está
+    guardado, (archivo, nombre) del resultado a descargar.
+    """
     mensaje = None
     user = request.user
 
@@ -116,41 +123,9 @@ def consolidar_semestre_anterior(request):
             mes = int(form.cleaned_data["mes"]) - 1  # mes anterior
             region = form.cleaned_data["region"]
 
-            if mes <= 6:
-                # Semestre anterior: julio a diciembre del año anterior
-                semestre_anio_anterior = anio - 1
-                meses_semestre_anterior = list(range(7, 13))  # 7 a 12
-
-                # Semestre actual: enero hasta el mes actual del año actual
-                semestre_anio_actual = anio
-                meses_semestre_actual = list(range(1, mes + 1))  # 1 hasta mes actual
-
-                archivos = ArchivoSubido.objects.filter(
-                    Q(anio=semestre_anio_anterior, mes__in=meses_semestre_anterior)
-                    | Q(anio=semestre_anio_actual, mes__in=meses_semestre_actual),
-                    proceso="planilla_validadora",
-                    region=region.id,
-                )
-
-                meses_esperados = {
-                    (semestre_anio_anterior, m) for m in meses_semestre_anterior
-                } | {(semestre_anio_actual, m) for m in meses_semestre_actual}
-
-                anio_referencia = anio  # Para nombre del archivo
-
-            else:
-                semestre_anio = anio
-                meses_semestre = list(range(1, mes + 1))  # Enero a Junio
-
-                archivos = ArchivoSubido.objects.filter(
-                    anio=semestre_anio,
-                    mes__in=meses_semestre,
-                    proceso="planilla_validadora",
-                    region=region.id,
-                )
-
-                meses_esperados = {(semestre_anio, m) for m in meses_semestre}
-                anio_referencia = semestre_anio
+            archivos, meses_esperados, anio_referencia = archivos_semestre_anterior(
+                anio, mes, region.id
+            )
 
             # Verificar meses faltantes
             meses_cargados = set(archivos.values_list("anio", "mes"))
@@ -167,37 +142,26 @@ def consolidar_semestre_anterior(request):
                     {"form": form, "mensaje": mensaje},
                 )
 
-            # Consolidar archivos en un DataFrame
-            dfs = []
-            for archivo in archivos:
-                try:
-                    df = pd.read_csv(archivo.archivo.path)
-                    dfs.append(df)
-                except Exception as e:
-                    mensaje = f"Error leyendo archivo {archivo.archivo.name}: {e}"
-                    return render(
-                        request,
-                        "analyst/consolidar_semestre.html",
-                        {"form": form, "mensaje": mensaje},
-                    )
-
-            df_consolidado = pd.concat(dfs, ignore_index=True)
-
-            df_consolidado = calcular_homologacion(df_consolidado, anio, mes)
-
-            # Exportar a Excel
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-                df_consolidado.to_excel(writer, index=False, sheet_name="Consolidado")
-
-            output.seek(0)
             filename = f"CALCULO_HOMOLOGACION_{mes:02d}{anio_referencia}_{region}.xlsx"
-            response = HttpResponse(
-                output.read(),
-                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+
+            # Si nada cambió desde el último cálculo se entrega el guardado
+            resultado = CacheHomologacion.obtener(
+                CacheHomologacion.clave(region.id, anio, mes, archivos)
+            )
+            if resultado is not None:
+                return resultado.archivo, os.path.splitext(filename)[0]
+
+            # El cálculo se ejecuta fuera del request (comando procesar_trabajos)
+            trabajo, _ = ColaTrabajos.encolar(
+                usuario=user,
+                tipo="homologacion",
+                region=region.id,
+                anio=anio,
+                mes=mes,
+                clave=ColaTrabajos.clave_homologacion(region.id, anio, mes),
+                parametros={"nombre_archivo": filename},
             )
-            response["Content-Disposition"] = f"attachment; filename={filename}"
-            return response
+            return redirect("estado_trabajo", trabajo_id=trabajo.id)
 
     else:
         form = SemestreAnteriorForm(request.user)
@@ -205,3 +169,44 @@ def consolidar_semestre_anterior(request):
     return render(
         request, "analyst/consolidar_semestre.html", {"form": form, "mensaje": mensaje}
     )
+
+
+@staff_member_required
+def homologacion_nacional(request):
+    mensaje = None
+
+    if request.method == "POST":
+        form = HomologacionNacionalForm(request.POST)
+        if form.is_valid():
+            anio = int(form.cleaned_data["anio"])
+            mes = int(form.cleaned_data["mes"]) - 1  # mes anterior
+
+            regiones, _ = regiones_con_datos(anio, mes)
+            if not regiones:
+                mensaje = (
+                    "Ninguna región tiene cargados todos los meses del semestre."
+                )
+            else:
+                anio_referencia = anio
+                filename = f"CALCULO_HOMOLOGACION_NACIONAL_{mes:02d}{anio_referencia}.xlsx"
+                # Se calcula en paralelo por región fuera del request
+                trabajo, _ = ColaTrabajos.encolar(
+                    usuario=request.user,
+                    tipo="homologacion_nacional",
+                    region=0,
+                    anio=anio,
+                    mes=mes,
+                    clave=ColaTrabajos.clave_homologacion_nacional(anio, mes),
+                    parametros={"nombre_archivo": filename, "hojas_por": "REGION"},
+                )
+                return redirect("estado_trabajo", trabajo_id=trabajo.id)
+        else:
+            mensaje = "Formulario inválido, revise los datos."
+    else:
+        form = HomologacionNacionalForm()
+
+    return render(
+        request,
+        "analyst/homologacion_nacional.html",
+        {"form": form, "mensaje": mensaje},
+    )
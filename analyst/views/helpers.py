@@ -1,7 +1,14 @@
 import os
 import re
+import tempfile
+from collections import Counter
+
 import pandas as pd
-from django.http import FileResponse, Http404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from analyst.services.cache_parametros import CacheParametros
+from analyst.services.ejecutor import en_ejecutor, iterar_en_ejecutor
+from analyst.services.medicion import ejecucion_medida, etapa
 from analyst.services.planilla_validadora import PlanillaValidadora
 from macro_vtf import settings
 
@@ -11,10 +18,17 @@ from analyst.df_utils.agregar_columnas import (
     agregar_antiguedad_dias,
 )
 from analyst.df_utils.calculos import (
+    anio_parametro,
+    asignar_valores_parametro,
     calcular_brecha,
-    calcular_promedio_semestre_anterior,
-    obtener_parametro_remuneracional_df,
-    obtener_valores_por_region_cargo,
+    calcular_promedios_semestre_anterior,
+)
+from analyst.df_utils.almacenamiento import EscritorParquet
+from analyst.df_utils.exportacion import (
+    bloques_parquet,
+    csv_en_bloques,
+    escribir_excel,
+    valores_columna_parquet,
 )
 from analyst.df_utils.consolidar import consolidar_sueldos
 
@@ -53,6 +67,8 @@ def calcular_homologacion(
     df: pd.DataFrame,
     anio_consultado: int,
     mes_consultado: int,
+    df_sueldos: pd.DataFrame = None,
+    tabla_param=None,
 ) -> pd.DataFrame:
     """
     Retorna df con los calculos de la homologacion
@@ -61,91 +77,117 @@ def calcular_homologacion(
         df (pd.DataFrame): DataFrame de entrada
         anio_consultado (int): Año de referencia
         mes_consultado (int): Mes de referencia
+        df_sueldos (pd.DataFrame, opcional): Sueldos ya consolidados (por
+            ejemplo desde RemuneracionMensual). Si se entrega, `df` basta con que
+            traiga el mes de referencia.
+        tabla_param (TablaParametros, opcional): Parámetros ya compilados.
+            Si no se entrega, se toman de CacheParametros.
 
     Returns:
         pd.DataFrame: DataFrame con cálculos de homologación
     """
 
     # Crear una copia y normalizar cabeceras
-    df_original = df.copy()
-    df_original.columns = [col.upper() for col in df_original.columns]
+    with etapa("seleccionar_base", df) as e:
+        df_original = df.copy()
+        df_original.columns = [col.upper() for col in df_original.columns]
 
-    fecha_referencia = pd.to_datetime(f"{anio_consultado}-{mes_consultado:02d}-01")
+        fecha_referencia = pd.to_datetime(
+            f"{anio_consultado}-{mes_consultado:02d}-01"
+        )
 
-    # Crear DataFrame BASE (MES, ANIO consultado)
-    df_base = df_original[
-        (df_original["ANIO"] == anio_consultado)
-        & (df_original["MES"] == mes_consultado)
-    ].copy()
+        # Crear DataFrame BASE (MES, ANIO consultado)
+        df_base = df_original[
+            (df_original["ANIO"] == anio_consultado)
+            & (df_original["MES"] == mes_consultado)
+        ].copy()
 
-    df_base = df_base.drop_duplicates(subset=["CODIGO_ESTABLECIMIENTO", "RUT"])
+        df_base = df_base.drop_duplicates(subset=["CODIGO_ESTABLECIMIENTO", "RUT"])
 
-    df_base["TIENE_ERRORES"] = False
-    df_original["TIENE_ERRORES"] = False
-    df_base["LOG_ERRORES"] = ""
-    df_original["LOG_ERRORES"] = ""
+        df_base["TIENE_ERRORES"] = False
+        df_original["TIENE_ERRORES"] = False
+        df_base["LOG_ERRORES"] = ""
+        df_original["LOG_ERRORES"] = ""
+        e.salida(df_base)
 
     # Agregar REGION
-    df_original = agregar_columna_region(df_original)
-    df_base = agregar_columna_region(df_base)
+    with etapa("agregar_columna_region", df_original) as e:
+        df_original = agregar_columna_region(df_original)
+        df_base = e.salida(agregar_columna_region(df_base))
 
     # Agregar FECHA_REFERENCIA
-    df_base = agregar_fecha(df_base, anio_consultado, mes_consultado)
-    df_original = agregar_fecha(df_original, anio_consultado, mes_consultado)
+    with etapa("agregar_fecha", df_original) as e:
+        df_base = agregar_fecha(df_base, anio_consultado, mes_consultado)
+        df_original = e.salida(
+            agregar_fecha(df_original, anio_consultado, mes_consultado)
+        )
 
     # Calcular ANTIGUEDAD_DIAS
-    df_base = agregar_antiguedad_dias(df_base, fecha_referencia)
-    df_original = agregar_antiguedad_dias(df_original, fecha_referencia)
+    with etapa("agregar_antiguedad_dias", df_original) as e:
+        df_base = agregar_antiguedad_dias(df_base, fecha_referencia)
+        df_original = e.salida(agregar_antiguedad_dias(df_original, fecha_referencia))
 
     # Obtener parámetros remuneracionales
-    if mes_consultado > 6:
-        anio_param = anio_consultado + 1
-    else:
-        anio_param = anio_consultado
-    df_param = obtener_parametro_remuneracional_df(anio_param)
-    df_param.columns = [col.upper() for col in df_param.columns]
-
-    # Agregar valores remuneracionales
-    df_base = obtener_valores_por_region_cargo(df_base, df_param)
-
-    df_consolidado = consolidar_sueldos(df_original)
-
-    # 2. Recuperar la columna ANTIGUEDAD_DIAS
-    df_antiguedad = df_base[
-        ["CODIGO_ESTABLECIMIENTO", "RUT", "ANTIGUEDAD_DIAS"]
-    ].drop_duplicates()
-
-    # 3. Merge para agregar la columna
-    df_consolidado = df_consolidado.merge(
-        df_antiguedad, on=["CODIGO_ESTABLECIMIENTO", "RUT"], how="left"
-    )
+    with etapa("asignar_valores_parametro", df_base) as e:
+        if tabla_param is None:
+            tabla_param = CacheParametros.obtener(
+                anio_parametro(anio_consultado, mes_consultado)
+            )
+
+        # Agregar valores remuneracionales
+        df_base = e.salida(asignar_valores_parametro(df_base, tabla_param))
+
+    with etapa("consolidar_sueldos", df_original) as e:
+        if df_sueldos is None:
+            df_consolidado = consolidar_sueldos(df_original)
+        else:
+            df_consolidado = df_sueldos.copy()
+        e.salida(df_consolidado)
+
+    with etapa("merge_antiguedad", df_consolidado) as e:
+        # 2. Recuperar la columna ANTIGUEDAD_DIAS
+        df_antiguedad = df_base[
+            ["CODIGO_ESTABLECIMIENTO", "RUT", "ANTIGUEDAD_DIAS"]
+        ].drop_duplicates()
+
+        # 3. Merge para agregar la columna
+        df_consolidado = e.salida(
+            df_consolidado.merge(
+                df_antiguedad, on=["CODIGO_ESTABLECIMIENTO", "RUT"], how="left"
+            )
+        )
 
     # --- Detectar columnas de sueldos (las que tienen guión o formato YYYY_MM)
     col_sueldos = [
         c for c in df_consolidado.columns if re.fullmatch(r"\d{4}_\d{1,2}", str(c))
     ]
 
-    # --- Aplicar la función para calcular promedio semestre anterior
-    df_consolidado[["PROMEDIO_SUELDO", "DETALLE_MESES"]] = df_consolidado.apply(
-        lambda row: calcular_promedio_semestre_anterior(
-            row,
-            mes_consultado=mes_consultado,
-            anio_consultado=anio_consultado,
-            col_sueldos=col_sueldos,
-        ),
-        axis=1,
-    )
-
-    df_merge = df_base.merge(
-        df_consolidado,
-        on=["CODIGO_ESTABLECIMIENTO", "RUT", "ANTIGUEDAD_DIAS"],
-        how="left",
-    )
+    # --- Calcular promedio semestre anterior sobre la matriz de sueldos
+    with etapa("promedios_semestre_anterior", df_consolidado) as e:
+        df_consolidado[["PROMEDIO_SUELDO", "DETALLE_MESES"]] = (
+            calcular_promedios_semestre_anterior(
+                df_consolidado,
+                mes_consultado=mes_consultado,
+                anio_consultado=anio_consultado,
+                col_sueldos=col_sueldos,
+            )
+        )
+        e.salida(df_consolidado)
+
+    with etapa("merge_resultado", df_base) as e:
+        df_merge = e.salida(
+            df_base.merge(
+                df_consolidado,
+                on=["CODIGO_ESTABLECIMIENTO", "RUT", "ANTIGUEDAD_DIAS"],
+                how="left",
+            )
+        )
 
-    df_merge = calcular_brecha(df_merge)
+    with etapa("calcular_brecha", df_merge) as e:
+        df_merge = calcular_brecha(df_merge)
 
-    # Seleccionar las columans que se necesitan
-    df_merge = df_merge[columnas]
+        # Seleccionar las columans que se necesitan
+        df_merge = e.salida(df_merge[columnas])
 
     return df_merge
 
@@ -184,18 +226,177 @@ def validar_archivo(nombre_archivo):
     return True, []
 
 
-def validar_columnas_y_convertir(archivo, tipo):
-    validador = PlanillaValidadora(tipo)
-    df = validador.cargar_archivo(archivo)
+class ResumenPlanilla:
+    """
+    Resumen de una planilla acumulado bloque a bloque: filas, filas vacías
+    eliminadas, establecimientos y RUT distintos.
+    """
 
-    if isinstance(df, str):
-        return False, [df]  # error de carga
+    def __init__(self):
+        self.filas = 0
+        self.filas_eliminadas = 0
+        self.establecimientos = set()
+        self.ruts = Counter()
+
+    def agregar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Elimina las filas vacías del bloque, lo suma al resumen y lo retorna.
+        """
+        total_filas = len(df)
+        df = df.dropna(how="all")
+        self.filas += len(df)
+        self.filas_eliminadas += total_filas - len(df)
+        self.establecimientos.update(df["CODIGO_ESTABLECIMIENTO"].dropna().unique())
+        self.ruts.update(df["RUT"].value_counts().to_dict())
+        return df
+
+    @property
+    def establecimientos_distintos(self):
+        return len(self.establecimientos)
+
+    @property
+    def rut_distintos(self):
+        return len(self.ruts)
+
+    @property
+    def cantidad_ruts_repetidos(self):
+        return sum(1 for cantidad in self.ruts.values() if cantidad > 1)
+
+
+class ValidacionPorBloques:
+    """
+    Validación de una planilla por bloques que escribe los bloques válidos
+    en Parquet sobre un archivo temporal (en memoria hasta cierto tamaño,
+    luego en disco). Los bloques se leen del archivo
+    (validar_planilla_por_bloques).
+    """
 
-    valido, errores = validador.validar(df)
-    if not valido:
-        return False, errores
+    def __init__(self, tipo):
+        self.validador = PlanillaValidadora(
+            tipo, falla_rapida=settings.VALIDACION_FALLA_RAPIDA
+        )
+        self.resumen = ResumenPlanilla()
+        self.temporal = tempfile.SpooledTemporaryFile(
+            max_size=settings.PLANILLA_MAX_BYTES_EN_MEMORIA
+        )
+        self.escritor = EscritorParquet(self.temporal, tipo)
+
+    def guardar_bloque(self, bloque):
+        self.escritor.escribir(self.resumen.agregar(bloque))
+
+    def resultado(self, valido):
+        """
+        Returns:
+            tuple: (True, archivo temporal, ResumenPlanilla) o
+                (False, RegistroErrores, None)
+        """
+        self.escritor.cerrar()
+        if not valido:
+            self.temporal.close()
+            return False, self.validador.errores, None
 
-    return True, df
+        self.temporal.seek(0)
+        return True, self.temporal, self.resumen
+
+
+def validar_planilla_por_bloques(archivo, tipo):
+    """
+    Valida la planilla por bloques y escribe los bloques válidos en Parquet
+    sobre un archivo temporal (ver ValidacionPorBloques).
+
+    Returns:
+        tuple: (True, archivo temporal, ResumenPlanilla) o
+            (False, RegistroErrores, None)
+    """
+    validacion = ValidacionPorBloques(tipo)
+    valido, _ = validacion.validador.validar_por_bloques(
+        archivo,
+        al_validar_bloque=validacion.guardar_bloque,
+        tamano_bloque=settings.PLANILLA_FILAS_POR_BLOQUE,
+    )
+    return validacion.resultado(valido)
+
+
+FORMATOS_DESCARGA = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "csv.gz": "application/gzip",
+}
+
+
+def respuesta_resultado(
+    archivo,
+    nombre: str,
+    formato: str = "xlsx",
+    hojas_por: str = None,
+    hoja: str = "Consolidado",
+):
+    """
+    Respuesta de descarga de un resultado guardado en Parquet, exportado por
+    bloques al formato pedido: el XLSX se arma en un archivo temporal (en
+    memoria hasta cierto tamaño) y el CSV se envía a medida que se genera.
+
+    Args:
+        archivo: FieldFile con el resultado
+        nombre (str): nombre de descarga sin extensión
+        formato (str): "xlsx", "csv" o "csv.gz"
+        hojas_por (str, opcional): columna por cuyos valores el XLSX suma
+            una hoja más (p. ej. REGION en el cálculo nacional)
+        hoja (str): nombre de la hoja con todos los datos
+    """
+    if formato not in FORMATOS_DESCARGA:
+        raise Http404("Formato no soportado.")
+
+    # Resultados guardados antes del formato Parquet
+    if archivo.name.endswith(".xlsx"):
+        return FileResponse(
+            archivo.open("rb"), as_attachment=True, filename=f"{nombre}.xlsx"
+        )
+
+    if formato == "xlsx":
+        temporal = tempfile.SpooledTemporaryFile(
+            max_size=settings.PLANILLA_MAX_BYTES_EN_MEMORIA
+        )
+        with ejecucion_medida("exportacion_xlsx"), etapa("escribir_excel"):
+            hojas = {hoja: bloques_parquet(archivo.path)}
+            if hojas_por:
+                hojas = {"Nacional": hojas[hoja]}
+                for valor in valores_columna_parquet(archivo.path, hojas_por):
+                    hojas[f"{hojas_por.capitalize()} {valor}"] = bloques_parquet(
+                        archivo.path, filtros=[(hojas_por, "==", valor)]
+                    )
+            escribir_excel(temporal, hojas)
+        temporal.seek(0)
+        return FileResponse(
+            temporal,
+            as_attachment=True,
+            filename=f"{nombre}.xlsx",
+            content_type=FORMATOS_DESCARGA["xlsx"],
+        )
+
+    respuesta = StreamingHttpResponse(
+        csv_en_bloques(bloques_parquet(archivo.path), comprimir=formato == "csv.gz"),
+        content_type=FORMATOS_DESCARGA[formato],
+    )
+    respuesta["Content-Disposition"] = f'attachment; filename="{nombre}.{formato}"'
+    return respuesta
+
+
+async def respuesta_resultado_async(request, archivo, nombre: str, formato: str = "xlsx", **opciones):
+    """
+    respuesta_resultado para vistas async: el XLSX se arma en el ejecutor
+    acotado y, bajo ASGI, el CSV se genera bloque a bloque en él. Con WSGI
+    el CSV se sigue entregando con un iterador síncrono, ya que uno async se
+    juntaría completo antes de enviarlo.
+    """
+    respuesta = await en_ejecutor(respuesta_resultado, archivo, nombre, formato, **opciones)
+    if (
+        isinstance(request, ASGIRequest)
+        and respuesta.streaming
+        and not isinstance(respuesta, FileResponse)
+    ):
+        respuesta.streaming_content = iterar_en_ejecutor(respuesta.streaming_content)
+    return respuesta
 
 
 def descargar_plantilla_excel(request):
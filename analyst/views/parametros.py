@@ -1,13 +1,15 @@
 import os
-import io
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 
+from analyst.df_utils.almacenamiento import dataframe_a_parquet
+from analyst.df_utils.lectura import leer_planilla
 from analyst.forms import ParametroRemuneracionalForm
 from analyst.models import ParametroRemuneracional
+from analyst.services.cache_homologacion import CacheHomologacion
+from analyst.services.cache_parametros import CacheParametros
 from django.core.files.base import ContentFile
-import pandas as pd
 
 
 @staff_member_required
@@ -32,7 +34,7 @@ def subir_parametro_remuneracional(request):
 
             try:
                 # Leer archivo en DataFrame
-                df = pd.read_excel(archivo)  # o read_csv según corresponda
+                df = leer_planilla(archivo)
                 total_filas_original = len(df)
 
                 # Eliminar filas vacías
@@ -45,17 +47,11 @@ def subir_parametro_remuneracional(request):
                 if filas_eliminadas > 0:
                     resumen += f" Se eliminaron {filas_eliminadas} filas vacías."
 
-                # Convertir a CSV
-                buffer = io.StringIO()
-                df.to_csv(buffer, index=False)
-                buffer.seek(0)
-
+                # Guardar en Parquet
                 filename = (
-                    f"parametro_remuneracional_{anio}_{request.user.username}.csv"
-                )
-                file_content = ContentFile(
-                    buffer.getvalue().encode("utf-8"), name=filename
+                    f"parametro_remuneracional_{anio}_{request.user.username}.parquet"
                 )
+                file_content = ContentFile(dataframe_a_parquet(df), name=filename)
 
                 # Guardar en el modelo
                 ParametroRemuneracional.objects.create(
@@ -94,6 +90,8 @@ def eliminar_parametro_remuneracional(request, pk):
             os.remove(parametro.archivo.path)
 
     parametro.delete()
+    CacheHomologacion.invalidar_parametro(parametro.anio)
+    CacheParametros.invalidar(parametro.anio)
     messages.success(
         request, f"Archivo del año {parametro.anio} eliminado correctamente."
     )
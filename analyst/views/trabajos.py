@@ -0,0 +1,49 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.http import Http404
+from django.shortcuts import get_object_or_404, render
+
+from analyst.models import Trabajo
+from analyst.services.trabajos import nombre_resultado
+from analyst.views.helpers import respuesta_resultado_async
+
+
+def _obtener_trabajo(request, trabajo_id):
+    """
+    Un trabajo lo ven el staff, quien lo pidió y los usuarios de su región
+    (un mismo cálculo pedido dos veces se comparte).
+    """
+    trabajo = get_object_or_404(Trabajo, id=trabajo_id)
+    user = request.user
+    if user.is_staff or trabajo.usuario_id == user.id:
+        return trabajo
+
+    perfil = getattr(user, "perfilusuario", None)
+    if perfil and perfil.region_id == trabajo.region:
+        return trabajo
+    raise Http404("El trabajo no existe.")
+
+
+@login_required
+def estado_trabajo(request, trabajo_id):
+    trabajo = _obtener_trabajo(request, trabajo_id)
+    return render(
+        request,
+        "analyst/estado_trabajo.html",
+        {"trabajo": trabajo, "segundos_refresco": 5},
+    )
+
+
+@login_required
+async def descargar_trabajo(request, trabajo_id):
+    trabajo = await sync_to_async(_obtener_trabajo)(request, trabajo_id)
+    if trabajo.estado != "terminado" or not trabajo.archivo:
+        raise Http404("El archivo aún no está disponible.")
+
+    return await respuesta_resultado_async(
+        request,
+        trabajo.archivo,
+        nombre_resultado(trabajo),
+        request.GET.get("formato", "xlsx"),
+        hojas_por=trabajo.parametros.get("hojas_por"),
+    )
@@ -1,26 +1,73 @@
 from datetime import date
-import io
-
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, render
-from django.core.files.base import ContentFile
 from django.urls import reverse
 from django.contrib import messages
 from django.utils import timezone
+from django.utils.html import escape
 from django.shortcuts import redirect
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 
 from analyst.forms import PlanillaValidadoraForm
-from analyst.models import ArchivoSubido
+from analyst.upload_handlers import hash_subido
+from analyst.models import ArchivoSubido, ErroresValidacion
+from analyst.services.cache_homologacion import CacheHomologacion
+from analyst.services.cache_validacion import CacheValidacion
+from analyst.services.ejecutor import en_ejecutor
+from analyst.services.errores_validacion import guardar_errores, leer_errores
+from analyst.services.matriz_sueldos import MatrizSueldos
+from analyst.services.medicion import ejecucion_medida
+from analyst.services.remuneraciones import cargar_remuneraciones
 from analyst.views.helpers import (
+    respuesta_resultado_async,
     validar_archivo,
-    validar_columnas_y_convertir,
     validar_perfil,
+    validar_planilla_por_bloques,
 )
 
 
+@csrf_exempt
 @login_required
-def subir_planilla_validadora(request):
+async def subir_planilla_validadora(request):
+    """
+    Vista async: la recepción, la validación y el guardado de una planilla
+    se ejecutan en el ejecutor acotado (services/ejecutor.py), sin ocupar el
+    ciclo de eventos mientras tanto.
+    """
+    if request.method != "POST":
+        return await sync_to_async(_subir_planilla_validadora)(request)
+    return await en_ejecutor(_recibir_planilla_validadora, request)
+
+
+def _recibir_planilla_validadora(request):
+    """
+    Verifica el token CSRF antes de validar la planilla, para no validar
+    archivos de solicitudes que se van a rechazar. El token viene en el
+    formulario, así que verificarlo recibe el archivo; la validación queda
+    para _subir_planilla_validadora.
+    """
+    perfil = getattr(request.user, "perfilusuario", None)
+    if not validar_perfil(perfil)[0]:
+        return _subir_planilla_validadora(request)
+
+    # Leer el token recibe el cuerpo completo
+    with ejecucion_medida("recepcion_planilla", region=perfil.region.id):
+        rechazo = CsrfViewMiddleware(_subir_planilla_validadora).process_view(
+            request, _subir_planilla_validadora, (), {}
+        )
+    if rechazo is not None:
+        return rechazo
+    return _subir_planilla_validadora(request)
+
+
+@csrf_protect
+def _subir_planilla_validadora(request):
     form = PlanillaValidadoraForm(request.POST or None, request.FILES or None)
     detalles_validacion = []
 
@@ -48,10 +95,19 @@ def subir_planilla_validadora(request):
             if not archivo_valido:
                 detalles_validacion.extend(errores_archivo)
             else:
-                valido, df_o_errores = validar_columnas_y_convertir(
-                    archivo, "planilla_validadora"
-                )
-                if valido:
+                with ejecucion_medida(
+                    "validacion_planilla",
+                    region=perfil.region.id,
+                    anio=int(form.cleaned_data["anio"]),
+                    mes=int(form.cleaned_data["mes"]),
+                ):
+                    # Un archivo idéntico a uno ya validado no se vuelve a validar
+                    validacion, registro_errores, _ = CacheValidacion.validar(
+                        archivo,
+                        "planilla_validadora",
+                        hash_subido(request, "archivo"),
+                    )
+                if validacion.valido:
                     usuario = request.user
                     region = perfil.region.id
                     anio = form.cleaned_data["anio"]
@@ -75,23 +131,17 @@ def subir_planilla_validadora(request):
                         instancia.region = region
                         instancia.proceso = proceso
 
-                        # Eliminar filas con valores vacíos (NaN)
-                        total_filas_original = len(df_o_errores)
-                        df_o_errores = df_o_errores.dropna(how="all")
-                        filas_eliminadas = total_filas_original - len(df_o_errores)
-
-                        # Calcular resumen
-                        establecimientos_distintos = df_o_errores[
-                            "CODIGO_ESTABLECIMIENTO"
-                        ].nunique()
-                        rut_distintos = df_o_errores["RUT"].nunique()
-                        ruts_repetidos = df_o_errores["RUT"].value_counts()
-                        cantidad_ruts_repetidos = (ruts_repetidos > 1).sum()
+                        # Resumen acumulado al validar (sin filas vacías)
+                        resumen = validacion.resumen
+                        filas_eliminadas = resumen["filas_eliminadas"]
+                        establecimientos_distintos = resumen["establecimientos_distintos"]
+                        rut_distintos = resumen["rut_distintos"]
+                        cantidad_ruts_repetidos = resumen["cantidad_ruts_repetidos"]
 
                         # Crear mensaje informativo
                         mensaje = (
                             f"Archivo <code>{archivo.name}</code> subido correctamente con "
-                            f"<strong>{len(df_o_errores)} filas</strong>."
+                            f"<strong>{resumen['filas']} filas</strong>."
                         )
                         if filas_eliminadas > 0:
                             mensaje += f" Se eliminaron <strong>{filas_eliminadas}</strong> filas vacías."
@@ -105,17 +155,31 @@ def subir_planilla_validadora(request):
                             f"</ul>"
                         )
 
-                        # Convertir el DataFrame a CSV
-                        buffer = io.StringIO()
-                        df_o_errores.to_csv(buffer, index=False)
-                        buffer.seek(0)
-
-                        # Crear un archivo ContentFile desde el buffer CSV
-                        filename = f"{proceso}_{mes}_{anio}_{usuario.username}.csv"
-                        file_content = ContentFile(
-                            buffer.getvalue().encode("utf-8"), name=filename
+                        # El mismo contenido ya subido para otro periodo suele
+                        # ser un error al elegir el mes
+                        otros_periodos = (
+                            ArchivoSubido.objects.filter(
+                                region=region,
+                                proceso=proceso,
+                                archivo=validacion.archivo.name,
+                            )
+                            .exclude(anio=anio, mes=mes)
+                            .values_list("mes", "anio")
                         )
-                        instancia.archivo.save(filename, file_content, save=True)
+                        if otros_periodos:
+                            periodos = ", ".join(f"{m}/{a}" for m, a in otros_periodos)
+                            mensaje += (
+                                f"<strong>Atención:</strong> el archivo es idéntico al "
+                                f"subido para {periodos}. Revise que el mes sea el correcto."
+                            )
+
+                        # Se comparte el Parquet tipado guardado al validar
+                        instancia.archivo = validacion.archivo.name
+                        instancia.hash_contenido = validacion.hash_resultado
+                        instancia.save()
+                        CacheHomologacion.invalidar_archivo(region, int(anio), int(mes))
+                        cargar_remuneraciones(instancia)
+                        MatrizSueldos(region).actualizar_mes(int(anio), int(mes))
 
                         return render(
                             request,
@@ -129,9 +193,35 @@ def subir_planilla_validadora(request):
                             },
                         )
                 else:
-                    detalles_validacion.extend(
-                        df_o_errores or ["El archivo no tiene las columnas válidas."]
-                    )
+                    if registro_errores:
+                        errores = guardar_errores(
+                            registro_errores,
+                            request.user,
+                            perfil.region.id,
+                            int(form.cleaned_data["anio"]),
+                            int(form.cleaned_data["mes"]),
+                            archivo.name,
+                        )
+                        url_detalle = reverse(
+                            "detalle_errores_validacion", args=[errores.id]
+                        )
+                        if registro_errores.detenida:
+                            detalles_validacion.append(
+                                "<strong>La validación se detuvo antes de revisar "
+                                "todo el archivo</strong>: "
+                                f"{escape(registro_errores.detenida)} Revise que "
+                                "esté usando la plantilla oficial."
+                            )
+                        detalles_validacion.append(
+                            f"Se encontraron <strong>{errores.total}</strong> errores. "
+                            f'<a class="underline" href="{url_detalle}">'
+                            f"Ver el detalle o descargar el reporte completo</a>."
+                        )
+                        detalles_validacion.extend(registro_errores.a_html())
+                    else:
+                        detalles_validacion.append(
+                            "El archivo no tiene las columnas válidas."
+                        )
                     form.add_error(
                         "archivo",
                         "El archivo no tiene las columnas válidas. "
@@ -181,7 +271,7 @@ def listar_archivos_subidos(request):
         usuario=request.user,
         region=perfil.region.id if hasattr(perfil.region, "id") else perfil.region,
         proceso="planilla_validadora",
-    ).order_by("-creado")
+    ).select_related("usuario").order_by("-creado")
 
     hoy = date.today()
     year_now = str(hoy.year)  # ejemplo: "2025"
@@ -219,12 +309,78 @@ def eliminar_archivo_subido(request, archivo_id):
 
     if request.method == "POST":
         # Borrar archivo físico
-        if archivo.archivo:
+        # El archivo se borra solo si ninguna otra carga ni validación lo usa
+        if archivo.archivo and not CacheValidacion.en_uso(
+            archivo.archivo.name, excluir_id=archivo.id
+        ):
             archivo.archivo.delete(save=False)
         archivo.delete()
+        CacheHomologacion.invalidar_archivo(archivo.region, archivo.anio, archivo.mes)
+        MatrizSueldos(archivo.region).actualizar_mes(archivo.anio, archivo.mes)
         messages.success(request, "Archivo eliminado correctamente.")
         return redirect("listar_archivos_subidos")
 
     return render(
         request, "analyst/confirmar_eliminar_archivo.html", {"archivo": archivo}
     )
+
+
+def _obtener_errores(request, errores_id):
+    errores = get_object_or_404(ErroresValidacion, id=errores_id)
+    if not request.user.is_staff and errores.usuario_id != request.user.id:
+        raise Http404("El reporte de errores no existe.")
+    return errores
+
+
+@login_required
+def detalle_errores_validacion(request, errores_id):
+    """
+    Resumen de los errores de la planilla rechazada y, para la columna y el
+    error elegidos, las filas con error por páginas.
+    """
+    errores = _obtener_errores(request, errores_id)
+    columna = request.GET.get("columna")
+    codigo = request.GET.get("codigo")
+
+    seleccionado = next(
+        (
+            fila
+            for fila in errores.resumen
+            if fila["columna"] == columna and fila["codigo"] == codigo
+        ),
+        None,
+    )
+    pagina = None
+    filas = []
+    if seleccionado is not None:
+        df = leer_errores(errores, columna, codigo)
+        pagina = Paginator(
+            range(len(df)), settings.VALIDACION_ERRORES_POR_PAGINA
+        ).get_page(request.GET.get("pagina"))
+        filas = df.iloc[
+            pagina.start_index() - 1 : pagina.end_index()
+        ].to_dict("records")
+
+    return render(
+        request,
+        "analyst/errores_validacion.html",
+        {
+            "errores": errores,
+            "seleccionado": seleccionado,
+            "pagina": pagina,
+            "filas": filas,
+        },
+    )
+
+
+@login_required
+async def descargar_errores_validacion(request, errores_id):
+    errores = await sync_to_async(_obtener_errores)(request, errores_id)
+    nombre = errores.nombre_archivo.rsplit(".", 1)[0]
+    return await respuesta_resultado_async(
+        request,
+        errores.archivo,
+        f"ERRORES_{nombre}",
+        request.GET.get("formato", "xlsx"),
+        hoja="Errores",
+    )
@@ -19,5 +19,14 @@ else:
     print("ℹ️ Superusuario 'junjivtf' ya existe")
 EOF
 
+# SERVIDOR=asgi: workers de uvicorn, donde las vistas async (subida,
+# consolidación, descargas) no ocupan un worker mientras calculan. Las
+# planillas se validan después de recibirlas, no mientras se suben
+if [ "$SERVIDOR" = "asgi" ]; then
+    echo "🚀 Iniciando Gunicorn (ASGI, uvicorn)..."
+    exec gunicorn macro_vtf.asgi:application --bind 0.0.0.0:8000 --workers=3 \
+        --worker-class uvicorn_worker.UvicornWorker
+fi
+
 echo "🚀 Iniciando Gunicorn..."
 exec gunicorn macro_vtf.wsgi:application --bind 0.0.0.0:8000 --workers=3
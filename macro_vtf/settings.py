@@ -86,6 +86,15 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db", "db.sqlite3"),
+        # La web, el worker y los procesos del cálculo nacional escriben en
+        # la misma base: WAL deja leer mientras otro escribe, las
+        # transacciones toman el candado de escritura al comenzar y una
+        # escritura espera hasta SQLITE_TIMEOUT segundos por el candado.
+        "OPTIONS": {
+            "timeout": int(os.getenv("SQLITE_TIMEOUT", "30")),
+            "transaction_mode": "IMMEDIATE",
+            "init_command": "PRAGMA journal_mode=WAL;",
+        },
     }
 }
 
@@ -136,6 +145,79 @@ MEDIA_URL = "/media/"
 # Carpeta física donde se almacenan los archivos subidos
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Las planillas se validan y guardan por bloques de filas; el Parquet
+# resultante se mantiene en memoria hasta este tamaño y luego pasa a disco.
+PLANILLA_FILAS_POR_BLOQUE = int(os.getenv("PLANILLA_FILAS_POR_BLOQUE", "20000"))
+PLANILLA_MAX_BYTES_EN_MEMORIA = int(
+    os.getenv("PLANILLA_MAX_BYTES_EN_MEMORIA", str(10 * 1024 * 1024))
+)
+
+# Procesos del cálculo de homologación nacional (una región por tarea);
+# 0 usa los núcleos disponibles.
+HOMOLOGACION_PROCESOS = int(os.getenv("HOMOLOGACION_PROCESOS", "0"))
+
+# Segundos tras los cuales un trabajo que sigue en proceso se da por
+# abandonado (el worker se detuvo) y se marca con error.
+TRABAJOS_TIEMPO_MAXIMO = int(os.getenv("TRABAJOS_TIEMPO_MAXIMO", "7200"))
+
+# Errores de validación: filas guardadas por columna y tipo de error (del
+# resto solo se cuentan), casos que se muestran al subir la planilla y filas
+# por página en el detalle.
+VALIDACION_MAX_ERRORES = int(os.getenv("VALIDACION_MAX_ERRORES", "200000"))
+VALIDACION_ERRORES_MOSTRAR = int(os.getenv("VALIDACION_ERRORES_MOSTRAR", "10"))
+VALIDACION_ERRORES_POR_PAGINA = int(os.getenv("VALIDACION_ERRORES_POR_PAGINA", "100"))
+
+# Falla rápida al subir planillas: la validación se detiene si el archivo no
+# es la plantilla (faltan columnas) o, entre bloques, si una columna acumula
+# VALIDACION_MAX_ERRORES_COLUMNA errores o si en un bloque fallan más de
+# VALIDACION_MAX_PROPORCION_FILAS de las filas.
+VALIDACION_FALLA_RAPIDA = os.getenv("VALIDACION_FALLA_RAPIDA", "1") == "1"
+VALIDACION_MAX_ERRORES_COLUMNA = int(os.getenv("VALIDACION_MAX_ERRORES_COLUMNA", "1000"))
+VALIDACION_MAX_PROPORCION_FILAS = float(
+    os.getenv("VALIDACION_MAX_PROPORCION_FILAS", "0.5")
+)
+
+# Los archivos subidos se identifican por el hash de su contenido, calculado
+# mientras se reciben (ver analyst/upload_handlers.py y CacheValidacion).
+FILE_UPLOAD_HANDLERS = [
+    "analyst.upload_handlers.HashContenidoUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
+# Filas por INSERT al cargar las remuneraciones de una planilla aceptada
+# (RemuneracionMensual).
+REMUNERACIONES_FILAS_POR_LOTE = int(os.getenv("REMUNERACIONES_FILAS_POR_LOTE", "5000"))
+
+# Hilos por proceso para el trabajo pesado de las vistas async (validación
+# de planillas, exportaciones; ver analyst/services/ejecutor.py). Bajo ASGI
+# las demás solicitudes se siguen atendiendo mientras tanto.
+EJECUTOR_HILOS = int(os.getenv("EJECUTOR_HILOS", "2"))
+
+# Medición de tiempos por etapa (ver analyst/services/medicion.py). El pico de
+# memoria por etapa usa tracemalloc y hace más lento el cálculo: solo se
+# activa con MEDICION_MEMORIA=1, y se mide mientras no haya otra ejecución en
+# curso en el proceso.
+MEDICION_ETAPAS = os.getenv("MEDICION_ETAPAS", "1") == "1"
+MEDICION_MEMORIA = os.getenv("MEDICION_MEMORIA", "0") == "1"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"mensaje": {"format": "%(message)s"}},
+    "handlers": {
+        "medicion": {"class": "logging.StreamHandler", "formatter": "mensaje"},
+    },
+    "loggers": {
+        # Una línea JSON por etapa y por ejecución medida
+        "analyst.medicion": {
+            "handlers": ["medicion"],
+            "level": os.getenv("MEDICION_LOG_NIVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 